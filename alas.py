@@ -384,19 +384,30 @@ class AzurLaneAutoScript:
         """
         future = future + timedelta(seconds=1)
         self.config.start_watching()
-        while 1:
-            if datetime.now() > future:
-                return True
-            if self.stop_event is not None:
-                if self.stop_event.is_set():
-                    logger.info("Update event detected")
-                    logger.info(f"[{self.config_name}] exited. Reason: Update")
-                    exit(0)
-
-            time.sleep(5)
-
-            if self.config.should_reload():
-                return False
+        try:
+            while 1:
+                if datetime.now() > future:
+                    return True
+                if self.stop_event is not None:
+                    if self.stop_event.is_set():
+                        logger.info("Update event detected")
+                        logger.info(f"[{self.config_name}] exited. Reason: Update")
+                        exit(0)
+
+                self.config.flush_due()
+
+                # Sleep until the next task, or config file modified
+                timeout = (future - datetime.now()).total_seconds()
+                if self.stop_event is not None:
+                    timeout = min(timeout, 5)
+                remain = self.config.flush_remain()
+                if remain is not None:
+                    # Wake up to write journal into config file
+                    timeout = min(timeout, remain + 0.1)
+                if self.config.wait_change(timeout=max(timeout, 0)):
+                    return False
+        finally:
+            self.config.stop_watching()
 
     def get_next_task(self):
         """
@@ -488,6 +499,7 @@ class AzurLaneAutoScript:
             logger.hr(task, level=0)
             success = self.run(inflection.underscore(task))
             logger.info(f'Scheduler: End task `{task}`')
+            self.config.flush()
             is_first = False
 
             # Check failures
@@ -35,6 +35,8 @@ class ConfigModel:
     StartOcrServer: bool = False
     OcrServerPort: int = 22268
     OcrClientAddress: str = "127.0.0.1:22268"
+    OcrBackend: str = "mxnet"
+    OcrThreads: int = 0
 
     # Update
     EnableReload: bool = True
@@ -0,0 +1,64 @@
+"""
+Measure startup time of campaign tasks, each step in a new process.
+
+    python -m dev_tools.campaign_startup
+    python -m dev_tools.campaign_startup --map campaign_main.campaign_7_2 --repeat 5
+
+Steps:
+    import module.campaign.run, module.hard.hard
+    import the map file that `CampaignRun.load_campaign()` loads
+    build the same map from `MAP_INDEX`, for comparison
+"""
+import argparse
+import subprocess
+import sys
+
+from module.logger import logger
+
+STEPS = {
+    'import module.campaign.run': (
+        'import module.campaign.run', ''),
+    'import module.hard.hard': (
+        'import module.hard.hard', ''),
+    'load map file': (
+        'import module.campaign.run',
+        'import importlib; importlib.import_module("campaign.{map}")'),
+    'build map from MAP_INDEX': (
+        'import module.campaign.run; from module.campaign.map_index import MAP_INDEX',
+        'MAP_INDEX.get_module("campaign.{map}").build()'),
+}
+
+
+def measure(setup, statement, repeat):
+    """
+    Args:
+        setup (str): Code before timing, or the code to time if statement is empty.
+        statement (str):
+        repeat (int):
+
+    Returns:
+        list[float]: Seconds of each run.
+    """
+    if statement:
+        code = f'{setup}\nimport time\nt = time.perf_counter()\n{statement}\nprint(time.perf_counter() - t)'
+    else:
+        code = f'import time\nt = time.perf_counter()\n{setup}\nprint(time.perf_counter() - t)'
+    result = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', code], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                check=True).stdout
+        result.append(float(output.decode().strip().splitlines()[-1]))
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Alas campaign startup time')
+    parser.add_argument('--map', type=str, default='campaign_main.campaign_7_2',
+                        help='Map module under ./campaign, such as campaign_main.campaign_7_2')
+    parser.add_argument('--repeat', type=int, default=3)
+    args, _ = parser.parse_known_args()
+
+    logger.hr('Campaign startup', level=1)
+    for name, (setup, statement) in STEPS.items():
+        costs = measure(setup, statement.format(map=args.map), repeat=args.repeat)
+        logger.attr(name, f'{min(costs) * 1000:.0f}ms (best of {args.repeat})')
@@ -0,0 +1,153 @@
+"""
+Replay map files under ./campaign, and check path finding of `MapGraph`
+against the old `CampaignMap.find_path_initial()`, which relaxes grids round by round.
+
+    python -m dev_tools.map_graph_replay
+    python -m dev_tools.map_graph_replay --folder campaign_main event_20211125_cn --rounds 50
+
+The old one stops once no new grids are reached, so it may leave costs that are not the lowest,
+usually when a route through ambush grids is found before the longer but cheaper one.
+`MapGraph` must reach the same grids, never cost more, and give routes that match its costs.
+Cases that cost less are counted but not errors.
+"""
+import argparse
+import random
+import time
+
+from module.campaign.map_index import MAP_INDEX
+from module.logger import logger
+
+
+def relax_path_initial(map_, location, has_ambush=True, has_enemy=True):
+    """
+    Same as the old `CampaignMap.find_path_initial()`, but returns results instead of setting grids.
+
+    Returns:
+        dict: Key: location, value: cost.
+        dict: Key: location, value: location of connection.
+    """
+    ambush_cost = 10 if has_ambush else 1
+    cost = {grid.location: 9999 for grid in map_}
+    connection = {grid.location: None for grid in map_}
+    start = map_[location]
+    cost[start.location] = 0
+    visited = {start}
+
+    while 1:
+        new = visited.copy()
+        for grid in visited:
+            for arr in map_.grid_connection[grid.location]:
+                arr = map_[arr]
+                if arr.is_land or arr.is_mechanism_block:
+                    continue
+                value = (ambush_cost if arr.may_ambush else 1) + cost[grid.location]
+                if value < cost[arr.location]:
+                    cost[arr.location] = value
+                    connection[arr.location] = grid.location
+                elif value == cost[arr.location]:
+                    if abs(arr.location[0] - grid.location[0]) == 1:
+                        connection[arr.location] = grid.location
+                if arr.is_sea or not has_enemy:
+                    new.add(arr)
+        if len(new) == len(visited):
+            break
+        visited = new
+
+    return cost, connection
+
+
+def check_routes(map_, location, has_ambush=True):
+    """
+    Returns:
+        list[tuple]: Grids whose connection doesn't match costs.
+    """
+    ambush_cost = 10 if has_ambush else 1
+    wrong = []
+    for grid in map_:
+        if grid.location == location or grid.cost >= 9999:
+            continue
+        prev = grid.connection
+        if prev is None or grid.location not in map_.grid_connection[prev]:
+            wrong.append(grid.location)
+            continue
+        if map_[prev].cost + (ambush_cost if grid.may_ambush else 1) != grid.cost:
+            wrong.append(grid.location)
+    return wrong
+
+
+def replay(info, rounds, rng):
+    """
+    Args:
+        info (MapInfo):
+
+    Returns:
+        dict: Statistics
+    """
+    stat = {'cases': 0, 'lower': 0, 'error': 0, 'graph': 0., 'relax': 0.}
+    name = info.module
+    try:
+        map_ = info.build()
+    except Exception as e:
+        logger.warning(f'Failed to build {name}: {e}')
+        return stat
+    config = info.config
+
+    for _ in range(rounds):
+        map_.reset()
+        map_.load_map_data()
+        map_.grid_connection_initial(
+            wall=config.get('MAP_HAS_WALL', False),
+            portal=config.get('MAP_HAS_PORTAL', False),
+        )
+        sea = map_.select(is_land=False)
+        if not sea:
+            return stat
+        for grid in map_.select(may_enemy=True):
+            grid.is_enemy = rng.random() < 0.4
+        start = rng.choice(sea.grids).location
+        has_ambush = rng.random() < 0.5
+
+        stat['cases'] += 1
+        t = time.perf_counter()
+        map_.find_path_initial(start, has_ambush=has_ambush)
+        stat['graph'] += time.perf_counter() - t
+        t = time.perf_counter()
+        cost, _ = relax_path_initial(map_, start, has_ambush=has_ambush)
+        stat['relax'] += time.perf_counter() - t
+
+        higher = [loca for loca, value in cost.items() if map_[loca].cost > value]
+        reach = [loca for loca, value in cost.items() if (map_[loca].cost < 9999) != (value < 9999)]
+        routes = check_routes(map_, start, has_ambush=has_ambush)
+        if higher or reach or routes:
+            stat['error'] += 1
+            logger.warning(f'{name}: from {start}, higher cost {higher}, '
+                           f'different reach {reach}, wrong routes {routes}')
+        elif any(map_[loca].cost < value for loca, value in cost.items()):
+            stat['lower'] += 1
+
+    return stat
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Alas map graph replay')
+    parser.add_argument('--folder', type=str, nargs='+', default=None, help='Folders under ./campaign')
+    parser.add_argument('--rounds', type=int, default=20, help='Random rounds of each map')
+    parser.add_argument('--seed', type=int, default=0)
+    args, _ = parser.parse_known_args()
+
+    folders = args.folder or MAP_INDEX.folders()
+    rng = random.Random(args.seed)
+    total = {'cases': 0, 'lower': 0, 'error': 0, 'graph': 0., 'relax': 0.}
+    for folder in folders:
+        for info in MAP_INDEX.maps(folder):
+            stat = replay(info, rounds=args.rounds, rng=rng)
+            for key, value in stat.items():
+                total[key] += value
+
+    logger.hr('Result', level=1)
+    logger.attr('Cases', total['cases'])
+    logger.attr('Lower cost', total['lower'])
+    logger.attr('Error', total['error'])
+    if total['cases']:
+        logger.attr('MapGraph', f'{total["graph"] / total["cases"] * 1000:.3f}ms per case')
+        logger.attr('Relax', f'{total["relax"] / total["cases"] * 1000:.3f}ms per case')
@@ -0,0 +1,424 @@
+"""
+Export bundled OCR models to ONNX, and compare the onnxruntime backend with mxnet.
+
+Export, requires mxnet and onnx (`pip install onnx`), it only needs to run once:
+    python -m dev_tools.ocr_onnx export
+This creates `model.onnx` and `model.json` in each folder of ./bin/cnocr_models
+The exporter of mxnet can't export RNN before mxnet 1.9, so networks are converted node by node from
+the symbol file here, mxnet is only used to load params and infer shapes, it works on the pinned mxnet==1.6.0
+If onnxruntime is installed, outputs of the exported model are checked against mxnet after export.
+
+Benchmark, requires both mxnet and onnxruntime:
+    python -m dev_tools.ocr_onnx benchmark --folder ./screenshots/ocr
+Crops are recorded by setting `Ocr.RECORD_FOLDER = './screenshots/ocr'` while running Alas,
+results recorded are used as ground truth.
+"""
+import argparse
+import ast
+import json
+import os
+import time
+
+import numpy as np
+
+from module.base.utils import load_image
+from module.logger import logger
+from module.ocr.onnx_ocr import ONNX_META_FILE, ONNX_MODEL_FILE, OnnxOcr
+
+# Same as module/ocr/models.py
+MODELS = {
+    'azur_lane': 15,
+    'cnocr': 39,
+    'jp': 125,
+    'tw': 63,
+}
+MODEL_FOLDER = './bin/cnocr_models'
+MODEL_PREFIX = 'cnocr-v1.2.0-densenet-lite-gru'
+# Output of the inference network, softmax of `pred_fc` in shape of (seq_len * batch, num_classes)
+OUTPUT_NODE = 'softmaxactivation0'
+# Image width to infer shapes and check outputs
+PROBE_WIDTHS = (280, 160)
+ONNX_OPSET = 11
+ONNX_IR_VERSION = 6
+
+
+def mxnet_model(lang):
+    from module.ocr.al_ocr import AlOcr
+    return AlOcr(model_name='densenet-lite-gru', model_epoch=MODELS[lang], root=os.path.join(MODEL_FOLDER, lang),
+                 name=lang)
+
+
+def onnx_model(lang):
+    return OnnxOcr(model_name='densenet-lite-gru', model_epoch=MODELS[lang], root=os.path.join(MODEL_FOLDER, lang),
+                   name=lang)
+
+
+class OnnxConverter:
+    """
+    Convert the inference part of a cnocr densenet-lite-gru symbol into an ONNX graph,
+    with dynamic batch size and image width.
+    Only operators used in the bundled models are supported.
+    """
+
+    def __init__(self, symbol_file, params_file, img_height):
+        """
+        Args:
+            symbol_file (str):
+            params_file (str):
+            img_height (int):
+        """
+        import mxnet as mx
+        with open(symbol_file, 'r', encoding='utf-8') as f:
+            self.nodes = json.load(f)['nodes']
+        self.symbol = mx.sym.load(symbol_file)
+        self.params = {}
+        for key, value in mx.nd.load(params_file).items():
+            self.params[key.split(':', 1)[-1]] = value.asnumpy().astype(np.float32)
+        self.img_height = img_height
+
+        self.onnx_nodes = []
+        self.initializers = {}
+        # Key: node name. Value: list of output shapes on each probe width
+        self._shapes = {}
+
+    def shapes(self, name):
+        """
+        Args:
+            name (str): Node name.
+
+        Returns:
+            list[tuple[int]]: Output shapes of node, with batch size 1 and 2 on each PROBE_WIDTHS.
+        """
+        if name not in self._shapes:
+            output = self.symbol.get_internals()[f'{name}_output']
+            shapes = []
+            for batch in [1, 2]:
+                for width in PROBE_WIDTHS:
+                    _, out_shapes, _ = output.infer_shape(data=(batch, 1, self.img_height, width))
+                    shapes.append(tuple(out_shapes[0]))
+            self._shapes[name] = shapes
+        return self._shapes[name]
+
+    def reshape_target(self, name, input_name):
+        """
+        Returns:
+            list[int]: Shape for ONNX Reshape, static dims as they are,
+                dynamic dims copied from input as 0, and the remaining one as -1.
+        """
+        shapes = np.array(self.shapes(name))
+        in_shapes = self.shapes(input_name)
+        target = []
+        for index in range(shapes.shape[1]):
+            dims = shapes[:, index]
+            if np.all(dims == dims[0]):
+                target.append(int(dims[0]))
+            elif all(len(s) > index and s[index] == d for s, d in zip(in_shapes, dims)):
+                target.append(0)
+            else:
+                target.append(-1)
+        if target.count(-1) > 1:
+            raise ValueError(f'Reshape {name} has more than one unknown dim: {target}')
+        return target
+
+    def param(self, name):
+        if name not in self.initializers:
+            self.initializers[name] = self.params[name]
+        return name
+
+    def const(self, name, value):
+        self.initializers[name] = np.array(value, dtype=np.int64)
+        return name
+
+    def add(self, op_type, inputs, outputs, **kwargs):
+        from onnx import helper
+        self.onnx_nodes.append(helper.make_node(op_type, inputs, outputs, name=outputs[0], **kwargs))
+
+    def convert_node(self, node):
+        """
+        Args:
+            node (dict): Node in symbol file.
+        """
+        op = node['op']
+        name = node['name']
+        attrs = node.get('attrs', {})
+        inputs = [self.nodes[i[0]]['name'] for i in node['inputs']]
+
+        def attr(key, default=None):
+            # Attributes are stored in string, such as '(3, 3)', 'True', 'gru'
+            if key not in attrs:
+                return default
+            try:
+                return ast.literal_eval(attrs[key])
+            except (ValueError, SyntaxError):
+                return attrs[key]
+
+        if op == 'Convolution':
+            kernel = list(attr('kernel'))
+            pad = list(attr('pad', (0,) * len(kernel)))
+            self.add('Conv', [inputs[0]] + [self.param(i) for i in inputs[1:]], [name],
+                     kernel_shape=kernel, pads=pad + pad,
+                     strides=list(attr('stride', (1,) * len(kernel))),
+                     dilations=list(attr('dilate', (1,) * len(kernel))),
+                     group=attr('num_group', 1))
+        elif op == 'BatchNorm':
+            gamma, beta, mean, var = inputs[1:5]
+            if attr('fix_gamma', True):
+                self.initializers[gamma] = np.ones_like(self.params[gamma])
+            self.add('BatchNormalization', [inputs[0]] + [self.param(i) for i in [gamma, beta, mean, var]], [name],
+                     epsilon=attr('eps', 1e-3))
+        elif op == 'Activation':
+            act_type = {'relu': 'Relu', 'sigmoid': 'Sigmoid', 'tanh': 'Tanh'}[attrs['act_type']]
+            self.add(act_type, inputs, [name])
+        elif op == 'Pooling':
+            if attr('global_pool', False) or attrs.get('pooling_convention', 'valid') != 'valid':
+                raise ValueError(f'Unsupported pooling: {name}')
+            kernel = list(attr('kernel'))
+            pad = list(attr('pad', (0,) * len(kernel)))
+            pool_type = {'max': 'MaxPool', 'avg': 'AveragePool'}[attrs.get('pool_type', 'max')]
+            kwargs = {'count_include_pad': 1} if pool_type == 'AveragePool' else {}
+            self.add(pool_type, inputs, [name], kernel_shape=kernel, pads=pad + pad,
+                     strides=list(attr('stride', (1,) * len(kernel))), **kwargs)
+        elif op == 'Concat':
+            self.add('Concat', inputs, [name], axis=attr('dim', 1))
+        elif op == 'Reshape':
+            target = self.reshape_target(name, inputs[0])
+            self.add('Reshape', [inputs[0], self.const(f'{name}_shape', target)], [name])
+        elif op == 'expand_dims':
+            self.add('Unsqueeze', inputs, [name], axes=[attr('axis')])
+        elif op == 'squeeze':
+            self.add('Squeeze', inputs, [name], axes=[attr('axis')])
+        elif op == 'Dropout':
+            self.add('Identity', inputs, [name])
+        elif op == 'transpose':
+            self.add('Transpose', inputs, [name], perm=list(attr('axes')))
+        elif op == 'RNN':
+            self.convert_gru(node, inputs[0], attr)
+        elif op == 'FullyConnected':
+            self.add('Gemm', [inputs[0]] + [self.param(i) for i in inputs[1:]], [name], transB=1)
+        elif op == 'SoftmaxActivation':
+            self.add('Softmax', inputs, [name], axis=1)
+        else:
+            raise ValueError(f'Unsupported operator: {op} ({name})')
+
+    def convert_gru(self, node, data, attr):
+        """
+        MXNet fused RNN, GRU mode, 1 layer.
+        Params are flattened and concatenated in the symbol,
+        weights of forward and reversed direction, then biases of them.
+        """
+        name = node['name']
+        if attr('mode') != 'gru' or attr('num_layers', 1) != 1:
+            raise ValueError(f'Unsupported RNN: {name}')
+        concat = self.nodes[node['inputs'][1][0]]
+        names = [self.nodes[self.nodes[i[0]]['inputs'][0][0]]['name'] for i in concat['inputs']]
+        directions = 2 if attr('bidirectional', False) else 1
+        weights, biases = names[:2 * directions], names[2 * directions:]
+
+        def reorder(array):
+            # Gates in mxnet are [reset, update, new], ONNX uses [update, reset, hidden]
+            r, z, n = np.split(self.params[array], 3)
+            return np.concatenate([z, r, n])
+
+        w = np.stack([reorder(weights[d * 2]) for d in range(directions)])
+        r = np.stack([reorder(weights[d * 2 + 1]) for d in range(directions)])
+        b = np.stack([np.concatenate([reorder(biases[d * 2]), reorder(biases[d * 2 + 1])])
+                      for d in range(directions)])
+        for suffix, array in zip(['W', 'R', 'B'], [w, r, b]):
+            self.initializers[f'{name}_{suffix}'] = array.astype(np.float32)
+
+        # MXNet computes `r * (W_hn * h + b_hn)`, same as linear_before_reset=1
+        self.add('GRU', [data, f'{name}_W', f'{name}_R', f'{name}_B'], [f'{name}_y'],
+                 hidden_size=attr('state_size'), linear_before_reset=1,
+                 direction='bidirectional' if directions == 2 else 'forward')
+        # (seq_len, directions, batch, hidden) -> (seq_len, batch, directions * hidden)
+        self.add('Transpose', [f'{name}_y'], [f'{name}_t'], perm=[0, 2, 1, 3])
+        self.add('Reshape', [f'{name}_t', self.const(f'{name}_shape', [0, 0, -1])], [name])
+
+    def convert(self, output=OUTPUT_NODE):
+        """
+        Returns:
+            onnx.ModelProto:
+        """
+        from onnx import TensorProto, checker, helper, numpy_helper
+        index = [node['name'] for node in self.nodes].index(output)
+        # Nodes required by output, nodes in symbol file are in topological order
+        required = {index}
+        for i in range(index, -1, -1):
+            if i in required:
+                inputs = self.nodes[i]['inputs']
+                if self.nodes[i]['op'] == 'RNN':
+                    # Params and initial states are handled in convert_gru()
+                    inputs = inputs[:1]
+                required.update(j[0] for j in inputs)
+        for i in sorted(required):
+            node = self.nodes[i]
+            if node['op'] != 'null':
+                self.convert_node(node)
+
+        num_classes = self.shapes(output)[0][-1]
+        graph = helper.make_graph(
+            self.onnx_nodes,
+            'cnocr',
+            inputs=[helper.make_tensor_value_info('data', TensorProto.FLOAT, ['batch', 1, self.img_height, 'width'])],
+            outputs=[helper.make_tensor_value_info(output, TensorProto.FLOAT, ['seq_len_batch', num_classes])],
+            initializer=[numpy_helper.from_array(v, name=k) for k, v in self.initializers.items()],
+        )
+        model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', ONNX_OPSET)])
+        model.ir_version = ONNX_IR_VERSION
+        checker.check_model(model)
+        return model
+
+    @property
+    def seq_len_cmpr_ratio(self):
+        return PROBE_WIDTHS[0] // self.shapes(OUTPUT_NODE)[0][0]
+
+    def mxnet_predict(self, batch):
+        """
+        Args:
+            batch (np.ndarray): Shape (batch, 1, height, width)
+
+        Returns:
+            np.ndarray: Output of the mxnet network.
+        """
+        import mxnet as mx
+        output = self.symbol.get_internals()[f'{OUTPUT_NODE}_output']
+        module = mx.mod.Module(output, data_names=['data'], label_names=None, context=mx.cpu())
+        module.bind(data_shapes=[('data', batch.shape)], for_training=False)
+        arg_names = set(output.list_arguments())
+        aux_names = set(output.list_auxiliary_states())
+        module.set_params({k: mx.nd.array(v) for k, v in self.params.items() if k in arg_names},
+                          {k: mx.nd.array(v) for k, v in self.params.items() if k in aux_names})
+        module.forward(mx.io.DataBatch([mx.nd.array(batch)]), is_train=False)
+        return module.get_outputs()[0].asnumpy()
+
+
+def check_export(converter, onnx_file):
+    """
+    Compare outputs of the exported model and mxnet, on random images.
+
+    Returns:
+        bool: If outputs are the same.
+    """
+    try:
+        import onnxruntime
+    except ImportError:
+        logger.warning('onnxruntime not installed, skip checking exported model')
+        return True
+    session = onnxruntime.InferenceSession(onnx_file, providers=['CPUExecutionProvider'])
+    random = np.random.RandomState(0)
+    same = True
+    for batch_size, width in [(1, PROBE_WIDTHS[0]), (3, PROBE_WIDTHS[1]), (2, 64)]:
+        batch = random.rand(batch_size, 1, converter.img_height, width).astype(np.float32)
+        expected = converter.mxnet_predict(batch)
+        result = session.run(None, {'data': batch})[0]
+        diff = np.max(np.abs(expected - result))
+        argmax = np.mean(np.argmax(expected, axis=-1) == np.argmax(result, axis=-1))
+        logger.attr(f'Check {batch.shape}', f'max diff {diff:.2e}, argmax same {argmax:.2%}')
+        if diff > 1e-4:
+            same = False
+    return same
+
+
+def export(lang):
+    """
+    Export the inference network of a mxnet model into ONNX.
+    """
+    from cnocr.hyperparams.cn_hyperparams import CnHyperparams
+    logger.hr(f'Export {lang}', level=2)
+    folder = os.path.join(MODEL_FOLDER, lang)
+    converter = OnnxConverter(
+        symbol_file=os.path.join(folder, f'{MODEL_PREFIX}-symbol.json'),
+        params_file=os.path.join(folder, f'{MODEL_PREFIX}-{MODELS[lang]:04d}.params'),
+        img_height=CnHyperparams().img_height,
+    )
+    model = converter.convert()
+    import onnx
+    onnx_file = os.path.join(folder, ONNX_MODEL_FILE)
+    onnx.save(model, onnx_file)
+    if not check_export(converter, onnx_file):
+        os.remove(onnx_file)
+        logger.critical(f'Outputs of exported model are different from mxnet, removed: {onnx_file}')
+        return False
+
+    meta = {
+        'img_height': converter.img_height,
+        'seq_len_cmpr_ratio': converter.seq_len_cmpr_ratio,
+    }
+    with open(os.path.join(folder, ONNX_META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    logger.info(f'Exported: {onnx_file}')
+    return True
+
+
+def load_records(folder):
+    """
+    Args:
+        folder (str): Folder of a model, like ./screenshots/ocr/azur_lane
+
+    Returns:
+        list[tuple[np.ndarray, str, str]]: (image, alphabet, result)
+    """
+    records = []
+    with open(os.path.join(folder, 'labels.jsonl'), 'r', encoding='utf-8') as f:
+        for line in f.readlines():
+            row = json.loads(line)
+            image = load_image(os.path.join(folder, row['file']))
+            records.append((image, row['alphabet'], row['result']))
+    return records
+
+
+def run(model, records):
+    """
+    Run OCR image by image, like `Ocr.ocr()` does.
+
+    Returns:
+        list[str], float: Results, average cost in seconds.
+    """
+    # Warm up, and load model
+    model.set_cand_alphabet(None)
+    model.ocr_for_single_lines([records[0][0]])
+
+    results = []
+    start = time.perf_counter()
+    for image, alphabet, _ in records:
+        model.set_cand_alphabet(alphabet)
+        results.append(''.join(model.ocr_for_single_lines([image])[0]))
+    cost = (time.perf_counter() - start) / len(records)
+    return results, cost
+
+
+def benchmark(folder):
+    for lang in MODELS:
+        lang_folder = os.path.join(folder, lang)
+        if not os.path.exists(os.path.join(lang_folder, 'labels.jsonl')):
+            continue
+        logger.hr(f'Benchmark {lang}', level=2)
+        records = load_records(lang_folder)
+        truth = [result for _, _, result in records]
+        mxnet_results, mxnet_cost = run(mxnet_model(lang), records)
+        onnx_results, onnx_cost = run(onnx_model(lang), records)
+
+        def accuracy(results):
+            return np.mean([a == b for a, b in zip(results, truth)])
+
+        logger.attr('Crops', len(records))
+        logger.attr('MXNet', f'{mxnet_cost * 1000:.2f}ms, accuracy {accuracy(mxnet_results):.2%}')
+        logger.attr('ONNX', f'{onnx_cost * 1000:.2f}ms, accuracy {accuracy(onnx_results):.2%}')
+        different = [(image, a, b) for (image, _, _), a, b in zip(records, mxnet_results, onnx_results) if a != b]
+        logger.attr('Different outputs', len(different))
+        for _, a, b in different[:10]:
+            logger.info(f'MXNet: {a}, ONNX: {b}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Alas OCR ONNX tools')
+    parser.add_argument('action', choices=['export', 'benchmark'])
+    parser.add_argument('--lang', type=str, nargs='+', default=list(MODELS.keys()), help='Models to export')
+    parser.add_argument('--folder', type=str, default='./screenshots/ocr', help='Folder of recorded crops')
+    args, _ = parser.parse_known_args()
+
+    if args.action == 'export':
+        for lang in args.lang:
+            export(lang)
+    else:
+        benchmark(args.folder)
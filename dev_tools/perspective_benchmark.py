@@ -0,0 +1,124 @@
+"""
+Compare perspective solvers on recorded map screenshots.
+
+    python -m dev_tools.perspective_benchmark --folder ./screenshots/map
+    python -m dev_tools.perspective_benchmark --folder ./screenshots/map --config event_20210819_cn.a1
+
+Screenshots are 1280x720 images of campaign maps, taken with the camera in map.
+Each screenshot is detected by every solver, results of the 'brute' solver are used as ground truth.
+"""
+import argparse
+import importlib
+import os
+import time
+
+import numpy as np
+
+from module.base.utils import load_image
+from module.config.config import AzurLaneConfig
+from module.exception import MapDetectionError
+from module.logger import logger
+from module.map_detection.perspective import Perspective
+
+SOLVERS = ['brute', 'least_squares']
+
+
+class TimedPerspective(Perspective):
+    solve_cost = 0.
+
+    def solve_perspective(self):
+        start = time.perf_counter()
+        super().solve_perspective()
+        self.solve_cost = time.perf_counter() - start
+
+
+def load_config(name=None):
+    """
+    Args:
+        name (str): Map config in ./campaign, such as `event_20210819_cn.a1`. None for default config.
+
+    Returns:
+        AzurLaneConfig:
+    """
+    config = AzurLaneConfig('template')
+    if name:
+        module = importlib.import_module(f'campaign.{name}')
+        config = config.merge(module.Config())
+    return config
+
+
+def detect(config, image, solver):
+    """
+    Returns:
+        dict: Result, or None if detection failed.
+    """
+    config.PERSPECTIVE_SOLVER = solver
+    perspective = TimedPerspective(config)
+    start = time.perf_counter()
+    try:
+        perspective.load(image)
+    except MapDetectionError as e:
+        logger.warning(f'{solver}: {e}')
+        return None
+    cost = time.perf_counter() - start
+    return {
+        'cost': cost,
+        'solve_cost': perspective.solve_cost,
+        'vanish_point': np.array(perspective.vanish_point),
+        'distant_point': np.array(perspective.distant_point),
+        'grids': {loca: np.array(points) for loca, points in perspective.generate()},
+    }
+
+
+def benchmark(folder, config):
+    files = [os.path.join(folder, file) for file in sorted(os.listdir(folder))
+             if file.lower().endswith(('.png', '.jpg'))]
+    costs = {solver: [] for solver in SOLVERS}
+    solve_costs = {solver: [] for solver in SOLVERS}
+    vanish_diff, distant_diff, grid_diff = [], [], []
+    mismatch = []
+    for file in files:
+        logger.hr(os.path.basename(file), level=2)
+        image = load_image(file)
+        results = {solver: detect(config, image, solver) for solver in SOLVERS}
+        truth, result = results['brute'], results['least_squares']
+        for solver in SOLVERS:
+            if results[solver] is not None:
+                costs[solver].append(results[solver]['cost'])
+                solve_costs[solver].append(results[solver]['solve_cost'])
+        if truth is None or result is None:
+            if truth is not result:
+                mismatch.append(file)
+            continue
+
+        vanish_diff.append(np.linalg.norm(truth['vanish_point'] - result['vanish_point']))
+        distant_diff.append(np.abs(truth['distant_point'][0] - result['distant_point'][0]))
+        if truth['grids'].keys() != result['grids'].keys():
+            mismatch.append(file)
+            continue
+        grid_diff.append(max([np.max(np.abs(points - result['grids'][loca]))
+                              for loca, points in truth['grids'].items()]))
+
+    logger.hr('Result', level=1)
+    logger.attr('Screenshots', len(files))
+    for solver in SOLVERS:
+        if costs[solver]:
+            logger.attr(solver, f'{np.mean(costs[solver]) * 1000:.1f}ms per frame, '
+                                f'median {np.median(costs[solver]) * 1000:.1f}ms, '
+                                f'solver {np.mean(solve_costs[solver]) * 1000:.2f}ms')
+    if grid_diff:
+        logger.attr('Vanish point diff', f'mean {np.mean(vanish_diff):.2f}px, max {np.max(vanish_diff):.2f}px')
+        logger.attr('Distant point diff', f'mean {np.mean(distant_diff):.2f}px, max {np.max(distant_diff):.2f}px')
+        logger.attr('Grid corner diff', f'mean {np.mean(grid_diff):.2f}px, max {np.max(grid_diff):.2f}px')
+    logger.attr('Different grids', len(mismatch))
+    for file in mismatch:
+        logger.info(file)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Alas perspective solver benchmark')
+    parser.add_argument('--folder', type=str, default='./screenshots/map', help='Folder of map screenshots')
+    parser.add_argument('--config', type=str, default='', help='Map config, such as event_20210819_cn.a1')
+    args, _ = parser.parse_known_args()
+
+    benchmark(args.folder, load_config(args.config))
@@ -0,0 +1,141 @@
+"""
+Replay map files under ./campaign, and check roadblocks found by `CampaignMap.find_roadblocks()`
+against a brute force search, which tries all combinations of enemies from the smallest ones.
+
+    python -m dev_tools.roadblock_replay
+    python -m dev_tools.roadblock_replay --folder campaign_main event_20211125_cn --rounds 50
+
+In each round, enemies and boss are placed randomly on the grids they may appear,
+and fleet starts from a random spawn point.
+Maps are built from `MAP_INDEX`, without importing map files.
+"""
+import argparse
+import itertools
+import random
+import time
+
+from module.campaign.map_index import MAP_INDEX
+from module.logger import logger
+from module.map.map_grids import SelectedGrids
+
+
+def brute_roadblocks(map_, start, location, limit):
+    """
+    Same as the old `Fleet.brute_find_roadblocks()`, but with combinations instead of products.
+
+    Returns:
+        SelectedGrids: Or None if not found within limit.
+    """
+    target = map_[location]
+    enemies = map_.select(is_enemy=True)
+    for repeat in range(1, min(enemies.count, limit) + 1):
+        for select in itertools.combinations(enemies, repeat):
+            for block in select:
+                block.is_enemy = False
+            map_.find_path_initial(start)
+            for block in select:
+                block.is_enemy = True
+            if target.is_accessible:
+                return SelectedGrids(list(select))
+    return None
+
+
+def is_cleared_by(map_, start, location, roadblocks):
+    """
+    Returns:
+        bool: If destination is accessible after clearing roadblocks.
+    """
+    for block in roadblocks:
+        block.is_enemy = False
+    map_.find_path_initial(start)
+    for block in roadblocks:
+        block.is_enemy = True
+    return map_[location].is_accessible
+
+
+def replay(info, rounds, limit, rng):
+    """
+    Args:
+        info (MapInfo):
+
+    Returns:
+        dict: Statistics
+    """
+    stat = {'cases': 0, 'different': 0, 'invalid': 0, 'solver': 0., 'brute': 0.}
+    name = info.module
+    try:
+        map_ = info.build()
+    except Exception as e:
+        logger.warning(f'Failed to build {name}: {e}')
+        return stat
+    config = info.config
+
+    for _ in range(rounds):
+        map_.reset()
+        map_.load_map_data()
+        map_.grid_connection_initial(
+            wall=config.get('MAP_HAS_WALL', False),
+            portal=config.get('MAP_HAS_PORTAL', False),
+        )
+        spawn = map_.select(is_spawn_point=True)
+        boss = map_.select(may_boss=True)
+        if not spawn or not boss:
+            return stat
+        start = rng.choice(spawn.grids)
+        target = rng.choice(boss.grids)
+        target.is_boss = True
+        for grid in map_.select(may_enemy=True):
+            if grid is not start and grid is not target and rng.random() < 0.6:
+                grid.is_enemy = True
+
+        map_.find_path_initial(start.location)
+        if target.is_accessible:
+            continue
+
+        stat['cases'] += 1
+        t = time.perf_counter()
+        result = map_.find_roadblocks(start.location, target.location)
+        stat['solver'] += time.perf_counter() - t
+        t = time.perf_counter()
+        expected = brute_roadblocks(map_, start.location, target.location, limit=limit)
+        stat['brute'] += time.perf_counter() - t
+
+        if result is not None and not is_cleared_by(map_, start.location, target.location, result):
+            stat['invalid'] += 1
+            logger.warning(f'{name}: {start} -> {target}, roadblocks {result} are invalid')
+        if expected is None:
+            # Not found within limit, solver should need more
+            if result is not None and result.count <= limit:
+                stat['different'] += 1
+                logger.warning(f'{name}: {start} -> {target}, solver {result}, brute found nothing')
+        elif result is None or result.count != expected.count:
+            stat['different'] += 1
+            logger.warning(f'{name}: {start} -> {target}, solver {result}, brute {expected}')
+
+    return stat
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Alas roadblock solver replay')
+    parser.add_argument('--folder', type=str, nargs='+', default=None, help='Folders under ./campaign')
+    parser.add_argument('--rounds', type=int, default=20, help='Random rounds of each map')
+    parser.add_argument('--limit', type=int, default=4, help='Max enemies in brute force search')
+    parser.add_argument('--seed', type=int, default=0)
+    args, _ = parser.parse_known_args()
+
+    folders = args.folder or MAP_INDEX.folders()
+    rng = random.Random(args.seed)
+    total = {'cases': 0, 'different': 0, 'invalid': 0, 'solver': 0., 'brute': 0.}
+    for folder in folders:
+        for info in MAP_INDEX.maps(folder):
+            stat = replay(info, rounds=args.rounds, limit=args.limit, rng=rng)
+            for key, value in stat.items():
+                total[key] += value
+
+    logger.hr('Result', level=1)
+    logger.attr('Cases', total['cases'])
+    logger.attr('Different', total['different'])
+    logger.attr('Invalid', total['invalid'])
+    if total['cases']:
+        logger.attr('Solver', f'{total["solver"] / total["cases"] * 1000:.3f}ms per case')
+        logger.attr('Brute', f'{total["brute"] / total["cases"] * 1000:.3f}ms per case')
@@ -0,0 +1,45 @@
+"""
+Build asset pack and shared assets ahead of time.
+
+    python -m dev_tools.shared_asset
+    python -m dev_tools.shared_asset --force
+
+Alas instances build missing assets on first use,
+run this after assets changed so instances attach to them instead of building their own.
+"""
+import argparse
+import os
+
+from module.base.asset_pack import ASSET_PACK
+from module.base.resource import release_assets
+from module.logger import logger
+
+
+def populate_shared_assets(force=False):
+    """
+    Args:
+        force (bool): Rebuild asset pack even if it's up to date.
+    """
+    logger.hr('Populate shared assets', level=1)
+    if force or ASSET_PACK.is_outdated():
+        ASSET_PACK.build()
+
+    from module.map_detection.utils_assets import ASSETS
+    for attr in ['ui_mask', 'ui_mask_os', 'ui_mask_stroke', 'tile_center_image', 'tile_corner_image']:
+        getattr(ASSETS, attr)
+
+    from module.os.globe_detection import GLOBE_MAP, GlobeDetection
+    if os.path.exists(GLOBE_MAP):
+        from module.config.config import AzurLaneConfig
+        GlobeDetection(AzurLaneConfig('template')).load_globe_map()
+
+    release_assets()
+    ASSET_PACK.release()
+    logger.info('Populate shared assets finished')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--force', action='store_true', help='Rebuild asset pack even if it is up to date')
+    args = parser.parse_args()
+    populate_shared_assets(force=args.force)
@@ -0,0 +1,334 @@
+"""
+Precompiled asset pack.
+
+Buttons and templates are decoded from png/gif files, cropped and binarized at runtime,
+and all of them are thrown away by `release_resources()` between tasks.
+The asset pack stores the final images in a single raw blob with a json index,
+so loading an asset is a slice on a memory-mapped file,
+and the pages are shared among all Alas instances on the same machine.
+Blob file is named by its hash and the index records the name and size of its blob,
+a new blob is written first and the index is replaced last,
+so readers always get an index with the blob it was built with.
+
+Build it after assets changed:
+    python -m module.base.asset_pack
+
+If the pack doesn't exist or an asset file was modified after building,
+assets are decoded from files as usual.
+"""
+import hashlib
+import json
+import mmap
+import os
+import re
+
+import numpy as np
+
+from module.base.decorator import cached_property
+from module.base.resource import del_cached_property
+from module.logger import logger
+
+ASSET_PACK_FOLDER = './bin/asset_pack'
+ASSET_PACK_BLOB = 'asset_pack.{digest}.bin'
+ASSET_PACK_INDEX = 'asset_pack.json'
+
+
+def file_stat(file):
+    """
+    Args:
+        file (str):
+
+    Returns:
+        list[int]: [size, mtime_ns], or None if file not exists.
+    """
+    try:
+        stat = os.stat(file)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class AssetPack:
+    def __init__(self, folder=ASSET_PACK_FOLDER):
+        self.folder = folder
+        self.enabled = True
+
+    def blob_file(self, digest):
+        """
+        Args:
+            digest (str):
+
+        Returns:
+            str: Such as `./bin/asset_pack/asset_pack.3f2a9c81d0e4.bin`
+        """
+        return os.path.join(self.folder, ASSET_PACK_BLOB.format(digest=digest))
+
+    @property
+    def index_file(self):
+        return os.path.join(self.folder, ASSET_PACK_INDEX)
+
+    @staticmethod
+    def button_key(file, area):
+        """
+        Args:
+            file (str):
+            area (tuple):
+
+        Returns:
+            str: Such as `./assets/cn/ui/MAIN_CHECK.png:(1180, 10, 1260, 40)`
+        """
+        return f'{file}:{tuple(area)}'
+
+    @staticmethod
+    def template_key(file):
+        return file
+
+    @cached_property
+    def manifest(self):
+        """
+        Returns:
+            dict: {
+                'digest': str, hash of the blob file,
+                'size': int, size of the blob file,
+                'assets': dict, see `index`,
+            }
+            or None if not exists.
+        """
+        if not self.enabled:
+            return None
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f'Failed to load asset pack index: {e}')
+            return None
+        if not isinstance(manifest, dict) or 'digest' not in manifest:
+            # Pack from older version
+            return None
+        return manifest
+
+    @cached_property
+    def index(self):
+        """
+        Returns:
+            dict: Key: asset key, value: {
+                'file': str,
+                'stat': [size, mtime_ns],
+                'image': [[offset, shape], ...],
+                'binary': [[offset, shape], ...] or None,
+            }
+        """
+        if self.blob is None:
+            return {}
+        return self.manifest['assets']
+
+    @cached_property
+    def blob(self):
+        """
+        Returns:
+            mmap.mmap: Read-only map of the blob file that the index was built with,
+                or None if not exists.
+        """
+        manifest = self.manifest
+        if manifest is None:
+            return None
+        try:
+            with open(self.blob_file(manifest['digest']), 'rb') as f:
+                blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # ValueError: cannot mmap an empty file
+            return None
+        if len(blob) != manifest['size']:
+            logger.warning('Asset pack blob does not match its index')
+            blob.close()
+            return None
+        return blob
+
+    def release(self):
+        blob = self.__dict__.get('blob', None)
+        del_cached_property(self, 'manifest')
+        del_cached_property(self, 'index')
+        del_cached_property(self, 'blob')
+        if blob is not None:
+            try:
+                blob.close()
+            except BufferError:
+                # Slices are still referenced, let GC close it
+                pass
+
+    def remove_outdated(self, blob_file):
+        """
+        Remove blob files other than the current one.
+
+        Args:
+            blob_file (str): Current blob file.
+        """
+        regex = re.compile(r'^asset_pack(\.[0-9a-f]+)?\.bin$')
+        for file in os.listdir(self.folder):
+            if not regex.match(file):
+                continue
+            file = os.path.join(self.folder, file)
+            if os.path.normpath(file) == os.path.normpath(blob_file):
+                continue
+            try:
+                os.remove(file)
+            except OSError:
+                # Still mapped by other processes on Windows
+                pass
+
+    def _slice(self, record):
+        offset, shape = record
+        count = int(np.prod(shape))
+        return np.frombuffer(self.blob, dtype=np.uint8, count=count, offset=offset).reshape(shape)
+
+    def get(self, key, file, genre='image'):
+        """
+        Args:
+            key (str): Key from `button_key()` or `template_key()`.
+            file (str): Asset file, to check if pack is outdated.
+            genre (str): 'image' or 'binary'.
+
+        Returns:
+            list[np.ndarray]: Read-only images, or None if not in pack.
+                A list of one image for png files, a list of frames for gif files.
+        """
+        row = self.index.get(key, None)
+        if row is None:
+            return None
+        if row['stat'] != file_stat(file) or row[genre] is None:
+            return None
+        return [self._slice(record) for record in row[genre]]
+
+    def is_outdated(self):
+        """
+        Returns:
+            bool: If pack not exists or any asset file was modified after building.
+        """
+        if not self.index:
+            return True
+        stats = {}
+        for row in self.index.values():
+            file = row.get('file', None)
+            if file is None:
+                # Pack from older version
+                return True
+            if file not in stats:
+                stats[file] = file_stat(file)
+            if row['stat'] != stats[file]:
+                return True
+        return False
+
+    @staticmethod
+    def _build_binary(func, obj, attr):
+        """
+        Returns:
+            np.ndarray, list[np.ndarray]: Binary images, or None if asset can't be binarized,
+                such as templates in grayscale.
+        """
+        import cv2
+        try:
+            func()
+        except cv2.error:
+            return None
+        return getattr(obj, attr)
+
+    def build(self):
+        """
+        Decode all buttons and templates of all servers, and write them into pack.
+        """
+        import importlib
+        from module.base.button import Button
+        from module.base.resource import Resource
+        from module.base.template import Template
+        from module.config.server import VALID_SERVER
+
+        logger.hr('Asset pack build', level=1)
+        # Don't load from the old pack
+        self.enabled = False
+        self.release()
+
+        for root, _, files in os.walk('./module'):
+            if 'assets.py' in files:
+                name = os.path.join(root, 'assets').replace('\\', '/').strip('./').replace('/', '.')
+                importlib.import_module(name)
+
+        os.makedirs(self.folder, exist_ok=True)
+        index = {}
+        offset = 0
+        md5 = hashlib.md5()
+        blob_tmp = os.path.join(self.folder, f'{ASSET_PACK_BLOB.format(digest=os.getpid())}.tmp')
+        with open(blob_tmp, 'wb') as f:
+            def write(images):
+                nonlocal offset
+                records = []
+                for image in images:
+                    image = np.ascontiguousarray(image, dtype=np.uint8)
+                    data = image.tobytes()
+                    f.write(data)
+                    md5.update(data)
+                    records.append([offset, list(image.shape)])
+                    offset += image.nbytes
+                return records
+
+            for obj in list(Resource.instances.values()):
+                for server in VALID_SERVER:
+                    file = obj.parse_property(obj.raw_file, server)
+                    stat = file_stat(file)
+                    if stat is None:
+                        continue
+                    if isinstance(obj, Button):
+                        area = obj.parse_property(obj.raw_area, server)
+                        key = self.button_key(file, area)
+                        if key in index:
+                            continue
+                        button = Button(area=area, color=(), button=area, file=file)
+                        button.ensure_template()
+                        image = button.image
+                        binary = self._build_binary(button.ensure_binary_template, button, 'image_binary')
+                    elif type(obj) is Template:
+                        key = self.template_key(file)
+                        if key in index:
+                            continue
+                        template = Template(file=file)
+                        image = template.image
+                        binary = self._build_binary(lambda: template.image_binary, template, '_image_binary')
+                    else:
+                        continue
+                    if not isinstance(image, list):
+                        image = [image]
+                    if binary is not None and not isinstance(binary, list):
+                        binary = [binary]
+                    index[key] = {
+                        'file': file,
+                        'stat': stat,
+                        'image': write(image),
+                        'binary': write(binary) if binary is not None else None,
+                    }
+
+            f.flush()
+            os.fsync(f.fileno())
+
+        # Blob goes first, the index that refers to it goes last.
+        # Processes still mapping the old blob keep using the old index.
+        digest = md5.hexdigest()[:12]
+        blob_file = self.blob_file(digest)
+        os.replace(blob_tmp, blob_file)
+        index_tmp = f'{self.index_file}.{os.getpid()}.tmp'
+        with open(index_tmp, 'w', encoding='utf-8') as f:
+            json.dump({'digest': digest, 'size': offset, 'assets': index}, f)
+        os.replace(index_tmp, self.index_file)
+        self.remove_outdated(blob_file)
+
+        logger.info(f'Asset pack built: {len(index)} assets, {offset / 1048576:.1f} MB')
+        self.enabled = True
+        self.release()
+        for obj in Resource.instances.values():
+            obj.resource_release()
+
+
+ASSET_PACK = AssetPack()
+
+if __name__ == '__main__':
+    ASSET_PACK.build()
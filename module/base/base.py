@@ -1,4 +1,4 @@
-from module.base.button import Button
+from module.base.button import Button, ButtonSet
 from module.base.decorator import cached_property
 from module.base.timer import Timer
 from module.base.utils import *
@@ -90,17 +90,103 @@ class ModuleBase:
         elif offset:
             if isinstance(offset, bool):
                 offset = self.config.BUTTON_OFFSET
-            appear = button.match(self.device.image, offset=offset,
-                                  threshold=self.config.BUTTON_MATCH_SIMILARITY if threshold is None else threshold)
+            if threshold is None:
+                threshold = self.config.BUTTON_MATCH_SIMILARITY
+            appear = self.match_cached(button, offset=offset, threshold=threshold)
         else:
-            appear = button.appear_on(self.device.image,
-                                      threshold=self.config.COLOR_SIMILAR_THRESHOLD if threshold is None else threshold)
+            if threshold is None:
+                threshold = self.config.COLOR_SIMILAR_THRESHOLD
+            appear = self.appear_on_cached(button, threshold=threshold)
 
         if appear and interval:
             self.interval_timer[button.name].reset()
 
         return appear
 
+    def appear_any(self, buttons, offset=0, threshold=None, first=False):
+        """
+        Check many buttons on current screenshot in one pass.
+        Unlike `appear()`, this doesn't support interval.
+
+        Args:
+            buttons (ButtonSet, list[Button]):
+            offset (bool, int, tuple):
+            threshold (int, float): 0 to 1 if use offset, bigger means more similar,
+                0 to 255 if not use offset, smaller means more similar
+            first (bool): True to stop at the first appeared button.
+
+        Returns:
+            list[Button]: Buttons appeared, in the given order.
+        """
+        if not isinstance(buttons, ButtonSet):
+            buttons = ButtonSet(buttons)
+        for button in buttons:
+            self.device.stuck_record_add(button)
+
+        if offset:
+            if isinstance(offset, bool):
+                offset = self.config.BUTTON_OFFSET
+            if threshold is None:
+                threshold = self.config.BUTTON_MATCH_SIMILARITY
+            result = buttons.match(self.device.image, offset=offset, threshold=threshold, first=first)
+        else:
+            if threshold is None:
+                threshold = self.config.COLOR_SIMILAR_THRESHOLD
+            result = buttons.appear_on(self.device.image, threshold=threshold)
+
+        appear = [button for button, hit in zip(buttons, result) if hit]
+        if first:
+            appear = appear[:1]
+        return appear
+
+    def match_cached(self, button, offset, threshold):
+        """
+        `Button.match()`, but reuse the previous result if search area didn't change since then.
+
+        Args:
+            button (Button):
+            offset (int, tuple):
+            threshold (float):
+
+        Returns:
+            bool:
+        """
+        if not isinstance(button, Button):
+            return button.match(self.device.image, offset=offset, threshold=threshold)
+
+        key = ('match', button.name, button.file, button.area, offset, threshold)
+        cached = self.device.frame_cache_get(key, area=button.match_area(offset))
+        if cached is not None:
+            appear, button._button_offset = cached
+            return appear
+
+        appear = button.match(self.device.image, offset=offset, threshold=threshold)
+        self.device.frame_cache_set(key, (appear, button._button_offset))
+        return appear
+
+    def appear_on_cached(self, button, threshold):
+        """
+        `Button.appear_on()`, but reuse the previous result if button area didn't change since then.
+
+        Args:
+            button (Button):
+            threshold (int):
+
+        Returns:
+            bool:
+        """
+        if not isinstance(button, Button):
+            return button.appear_on(self.device.image, threshold=threshold)
+
+        key = ('appear_on', button.name, button.area, button.color, threshold)
+        cached = self.device.frame_cache_get(key, area=button.area)
+        if cached is not None:
+            return cached
+
+        appear = button.appear_on(self.device.image, threshold=threshold)
+        self.device.frame_cache_set(key, appear)
+        return appear
+
     def appear_then_click(self, button, screenshot=False, genre='items', offset=0, interval=0, threshold=None):
         button = self.ensure_button(button)
         appear = self.appear(button, offset=offset, interval=interval, threshold=threshold)
@@ -117,6 +203,7 @@ class ModuleBase:
             if skip_first_screenshot:
                 skip_first_screenshot = False
             else:
+                self.device.screenshot_backoff()
                 self.device.screenshot()
             if self.appear(button, offset=offset):
                 break
@@ -127,6 +214,7 @@ class ModuleBase:
 
     def wait_until_disappear(self, button, offset=0):
         while 1:
+            self.device.screenshot_backoff()
             self.device.screenshot()
             if not self.appear(button, offset=offset):
                 break
@@ -138,6 +226,7 @@ class ModuleBase:
             if skip_first_screenshot:
                 skip_first_screenshot = False
             else:
+                self.device.screenshot_backoff()
                 self.device.screenshot()
 
             if button._match_init:
@@ -4,6 +4,7 @@ import traceback
 import imageio
 from PIL import ImageDraw
 
+from module.base.asset_pack import ASSET_PACK
 from module.base.decorator import cached_property
 from module.base.resource import Resource
 from module.base.utils import *
@@ -149,7 +150,10 @@ class Button(Resource):
         If needs to call self.match, call this first.
         """
         if not self._match_init:
-            if self.is_gif:
+            images = ASSET_PACK.get(ASSET_PACK.button_key(self.file, self.area), file=self.file)
+            if images is not None:
+                self.image = images if self.is_gif else images[0]
+            elif self.is_gif:
                 self.image = []
                 for image in imageio.mimread(self.file):
                     image = image[:, :, :3].copy() if len(image.shape) == 3 else image
@@ -165,7 +169,10 @@ class Button(Resource):
         If needs to call self.match, call this first.
         """
         if not self._match_binary_init:
-            if self.is_gif:
+            images = ASSET_PACK.get(ASSET_PACK.button_key(self.file, self.area), file=self.file, genre='binary')
+            if images is not None:
+                self.image_binary = images if self.is_gif else images[0]
+            elif self.is_gif:
                 self.image_binary = []
                 for image in self.image:
                     image_gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
@@ -183,6 +190,33 @@ class Button(Resource):
         self._match_init = False
         self._match_binary_init = False
 
+    @staticmethod
+    def parse_offset(offset):
+        """
+        Args:
+            offset (int, tuple): (x, y) or (x1, y1, x2, y2), or y offset in int.
+
+        Returns:
+            np.ndarray: (x1, y1, x2, y2) to add to area.
+        """
+        if isinstance(offset, tuple):
+            if len(offset) == 2:
+                return np.array((-offset[0], -offset[1], offset[0], offset[1]))
+            else:
+                return np.array(offset)
+        else:
+            return np.array((-3, -offset, 3, offset))
+
+    def match_area(self, offset=30):
+        """
+        Args:
+            offset (int, tuple): Detection area offset.
+
+        Returns:
+            tuple[int]: Area to search when calling `match()`.
+        """
+        return tuple(self.parse_offset(offset) + self.area)
+
     def match(self, image, offset=30, threshold=0.85):
         """Detects button by template matching. To Some button, its location may not be static.
 
@@ -196,13 +230,7 @@ class Button(Resource):
         """
         self.ensure_template()
 
-        if isinstance(offset, tuple):
-            if len(offset) == 2:
-                offset = np.array((-offset[0], -offset[1], offset[0], offset[1]))
-            else:
-                offset = np.array(offset)
-        else:
-            offset = np.array((-3, -offset, 3, offset))
+        offset = self.parse_offset(offset)
         image = crop(image, offset + self.area)
 
         if self.is_gif:
@@ -234,13 +262,7 @@ class Button(Resource):
         self.ensure_template()
         self.ensure_binary_template()
 
-        if isinstance(offset, tuple):
-            if len(offset) == 2:
-                offset = np.array((-offset[0], -offset[1], offset[0], offset[1]))
-            else:
-                offset = np.array(offset)
-        else:
-            offset = np.array((-3, -offset, 3, offset))
+        offset = self.parse_offset(offset)
         image = crop(image, offset + self.area)
 
         if self.is_gif:
@@ -341,6 +363,136 @@ class Button(Resource):
         return out
 
 
+class ButtonSet:
+    def __init__(self, buttons):
+        """
+        A precompiled group of buttons, to check many buttons on one screenshot in one pass.
+
+        Args:
+            buttons (list[Button]):
+
+        Examples:
+            POPUPS = ButtonSet([POPUP_CONFIRM, POPUP_CANCEL, GET_MISSION])
+            appear = POPUPS.match(image, offset=(30, 30))
+            # array([ True,  True, False])
+        """
+        self.buttons = list(buttons)
+
+    def __iter__(self):
+        return iter(self.buttons)
+
+    def __len__(self):
+        return len(self.buttons)
+
+    def __getitem__(self, item):
+        return self.buttons[item]
+
+    def __str__(self):
+        return f'ButtonSet({", ".join([str(button) for button in self.buttons])})'
+
+    __repr__ = __str__
+
+    @staticmethod
+    def _window(image, area):
+        """
+        Crop like `crop()`, but return a view instead of a copy when area is inside image.
+
+        Args:
+            image (np.ndarray):
+            area (tuple[int]):
+
+        Returns:
+            np.ndarray:
+        """
+        x1, y1, x2, y2 = map(int, map(round, area))
+        h, w = image.shape[:2]
+        if x1 >= 0 and y1 >= 0 and x2 <= w and y2 <= h:
+            return image[y1:y2, x1:x2]
+        else:
+            return crop(image, area)
+
+    def colors(self, image):
+        """
+        Args:
+            image (np.ndarray): Screenshot.
+
+        Returns:
+            np.ndarray: Average color of each button area, in shape of (N, 3).
+                The same as `get_color()` on each button.
+        """
+        h, w = image.shape[:2]
+        out = np.zeros((len(self.buttons), 3), dtype=float)
+        for index, button in enumerate(self.buttons):
+            x1, y1, x2, y2 = map(int, map(round, button.area))
+            total = (x2 - x1) * (y2 - y1)
+            cx1, cy1, cx2, cy2 = max(x1, 0), max(y1, 0), min(x2, w), min(y2, h)
+            if total <= 0 or cx2 <= cx1 or cy2 <= cy1:
+                continue
+            if (cx1, cy1, cx2, cy2) == (x1, y1, x2, y2):
+                out[index] = cv2.mean(image[y1:y2, x1:x2])[:3]
+            else:
+                # Outside area is filled with black in `crop()`
+                out[index] = np.array(cv2.sumElems(image[cy1:cy2, cx1:cx2])[:3]) * (1. / total)
+        return out
+
+    def appear_on(self, image, threshold=10):
+        """
+        `Button.appear_on()` on all buttons.
+
+        Args:
+            image (np.ndarray): Screenshot.
+            threshold (int): Default to 10.
+
+        Returns:
+            np.ndarray: Array of bool, if each button appears.
+        """
+        if not len(self.buttons):
+            return np.array([], dtype=bool)
+        colors = np.array([button.color for button in self.buttons]).astype(int)
+        diff = self.colors(image).astype(int) - colors
+        diff = np.max(np.maximum(diff, 0), axis=1) - np.min(np.minimum(diff, 0), axis=1)
+        return diff <= threshold
+
+    def match(self, image, offset=30, threshold=0.85, first=False):
+        """
+        `Button.match()` on all buttons.
+        Buttons with the same search area share one crop.
+
+        Args:
+            image (np.ndarray): Screenshot.
+            offset (int, tuple): Detection area offset.
+            threshold (float): 0-1. Similarity.
+            first (bool): True to stop at the first matched button, the rest are considered as not matched.
+
+        Returns:
+            np.ndarray: Array of bool, if each button matches.
+        """
+        offset = Button.parse_offset(offset)
+        result = np.zeros(len(self.buttons), dtype=bool)
+        windows = {}
+        for index, button in enumerate(self.buttons):
+            button.ensure_template()
+            area = tuple(offset + button.area)
+            window = windows.get(area)
+            if window is None:
+                window = self._window(image, area)
+                windows[area] = window
+
+            templates = button.image if button.is_gif else [button.image]
+            for template in templates:
+                res = cv2.matchTemplate(template, window, cv2.TM_CCOEFF_NORMED)
+                _, similarity, _, point = cv2.minMaxLoc(res)
+                button._button_offset = area_offset(button._button, offset[:2] + np.array(point))
+                if similarity > threshold:
+                    result[index] = True
+                    break
+
+            if first and result[index]:
+                break
+
+        return result
+
+
 class ButtonGrid:
     def __init__(self, origin, delta, button_shape, grid_shape, name=None):
         self.origin = np.array(origin)
@@ -117,6 +117,19 @@ def release_resources(next_task=''):
         for model in models:
             del_cached_property(OCR_MODEL, model)
 
+    release_assets(next_task=next_task)
+
+    from module.base.shared_asset import log_memory_usage
+    log_memory_usage()
+    from module.ocr.ocr import OCR_CACHE
+    OCR_CACHE.show()
+
+
+def release_assets(next_task=''):
+    """
+    Release images of buttons, templates and map detection.
+    Shared assets are mmap-ed files, releasing them only drops the references in current process.
+    """
     # Release assets cache
     # module.ui has about 80 assets and takes about 3MB
     # Alas has about 800 assets, but they are not all loaded.
@@ -144,5 +157,8 @@ def release_resources(next_task=''):
     for attr in attr_list:
         del_cached_property(ASSETS, attr)
 
+    from module.base.shared_asset import SHARED_ASSETS
+    SHARED_ASSETS.release()
+
     # Useless in most cases, but just call it
     # gc.collect()
@@ -0,0 +1,178 @@
+"""
+Read-only arrays shared among Alas instances.
+
+Each Alas instance runs in its own process and used to build its own copy of large images,
+such as masks of map detection and the OS globe map.
+Shared assets are built once, saved as .npy files, and loaded by memory-mapping,
+so all processes share the same physical pages.
+If an asset is missing or its source files changed, the first process that needs it builds it,
+others just attach to it.
+To build them ahead of time, after assets changed:
+    python -m dev_tools.shared_asset
+"""
+import hashlib
+import json
+import os
+import re
+
+import numpy as np
+
+from module.base.asset_pack import ASSET_PACK_FOLDER, file_stat
+from module.logger import logger
+
+SHARED_ASSET_FOLDER = os.path.join(ASSET_PACK_FOLDER, 'shared')
+
+
+class SharedAssets:
+    def __init__(self, folder=SHARED_ASSET_FOLDER):
+        self.folder = folder
+        # Key: asset name, value: np.ndarray
+        self.arrays = {}
+
+    def file(self, name, files=(), params=None):
+        """
+        Args:
+            name (str):
+            files (list[str]): Source files of this asset.
+            params: Json serializable parameters to build this asset.
+
+        Returns:
+            str: Such as `./bin/asset_pack/shared/os_globe_map.3f2a9c81d0e4.npy`
+        """
+        data = json.dumps([[file_stat(file) for file in files], params], default=str)
+        digest = hashlib.md5(data.encode('utf-8')).hexdigest()[:12]
+        return os.path.join(self.folder, f'{name}.{digest}.npy')
+
+    def get(self, name, builder, files=(), params=None):
+        """
+        Args:
+            name (str): Unique name of the asset.
+            builder (callable): Function that returns np.ndarray.
+            files (list[str]): Source files of this asset, asset rebuilds if they changed.
+            params: Json serializable parameters to build this asset, asset rebuilds if they changed.
+
+        Returns:
+            np.ndarray: Read-only array.
+        """
+        array = self.arrays.get(name, None)
+        if array is not None:
+            return array
+
+        file = self.file(name, files=files, params=params)
+        try:
+            array = np.load(file, mmap_mode='r')
+        except FileNotFoundError:
+            array = None
+        except (OSError, ValueError) as e:
+            logger.warning(f'Failed to load shared asset {file}: {e}')
+            array = None
+
+        if array is None:
+            array = np.ascontiguousarray(builder())
+            if self.save(name, file, array):
+                array = np.load(file, mmap_mode='r')
+
+        self.arrays[name] = array
+        return array
+
+    def save(self, name, file, array):
+        """
+        Args:
+            name (str):
+            file (str):
+            array (np.ndarray):
+
+        Returns:
+            bool: If success.
+        """
+        logger.info(f'Save shared asset: {file}')
+        tmp = f'{file}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            with open(tmp, 'wb') as f:
+                np.save(f, array)
+            os.replace(tmp, file)
+        except OSError as e:
+            # Another process is saving or mapping it, or folder is read-only
+            logger.warning(f'Failed to save shared asset {file}: {e}')
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return os.path.exists(file)
+
+        # Remove outdated versions
+        regex = re.compile(rf'^{re.escape(name)}\.[0-9a-f]+\.npy$')
+        for old in os.listdir(self.folder):
+            old = os.path.join(self.folder, old)
+            if regex.match(os.path.basename(old)) and os.path.normpath(old) != os.path.normpath(file):
+                try:
+                    os.remove(old)
+                except OSError:
+                    # Still mapped by other processes on Windows
+                    pass
+        return True
+
+    def release(self, name=None):
+        """
+        Drop references of shared assets in this process.
+
+        Args:
+            name (str): Release all if None.
+        """
+        if name is None:
+            self.arrays.clear()
+        else:
+            self.arrays.pop(name, None)
+
+
+SHARED_ASSETS = SharedAssets()
+
+
+def _smaps_rollup():
+    """
+    Returns:
+        dict: Key: field name in /proc/self/smaps_rollup, value: bytes.
+    """
+    result = {}
+    with open('/proc/self/smaps_rollup', 'r') as f:
+        for line in f.readlines():
+            res = re.match(r'^(\w+):\s+(\d+) kB', line)
+            if res:
+                result[res.group(1)] = int(res.group(2)) * 1024
+    return result
+
+
+def memory_usage():
+    """
+    Returns:
+        dict: {'shared': int, 'private': int} in bytes,
+            shared is the resident memory that can be shared with other processes, such as mmap-ed assets.
+            None if not supported on current platform.
+    """
+    try:
+        smaps = _smaps_rollup()
+        return {
+            'shared': smaps.get('Shared_Clean', 0) + smaps.get('Shared_Dirty', 0),
+            'private': smaps.get('Private_Clean', 0) + smaps.get('Private_Dirty', 0),
+        }
+    except OSError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_full_info()
+        return {
+            'shared': max(info.rss - info.uss, 0),
+            'private': info.uss,
+        }
+    except Exception:
+        pass
+    return None
+
+
+def log_memory_usage():
+    usage = memory_usage()
+    if usage is None:
+        return
+    logger.info(f'Memory usage: shared {usage["shared"] / 1048576:.1f}MB, '
+                f'private {usage["private"] / 1048576:.1f}MB')
@@ -2,6 +2,7 @@ import os
 
 import imageio
 
+from module.base.asset_pack import ASSET_PACK
 from module.base.button import Button
 from module.base.decorator import cached_property
 from module.base.resource import Resource
@@ -18,6 +19,7 @@ class Template(Resource):
         """
         self.raw_file = file
         self._image = None
+        self._image_binary = None
 
         self.resource_add(self.file)
 
@@ -38,7 +40,10 @@ class Template(Resource):
     @property
     def image(self):
         if self._image is None:
-            if self.is_gif:
+            images = self._load_pack()
+            if images is not None:
+                self._image = images if self.is_gif else images[0]
+            elif self.is_gif:
                 self._image = []
                 channel = 0
                 for image in imageio.mimread(self.file):
@@ -60,7 +65,10 @@ class Template(Resource):
     @property
     def image_binary(self):
         if self._image_binary is None:
-            if self.is_gif:
+            images = self._load_pack(genre='binary')
+            if images is not None:
+                self._image_binary = images if self.is_gif else images[0]
+            elif self.is_gif:
                 self._image_binary = []
                 for image in self.image:
                     image_gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
@@ -79,6 +87,20 @@ class Template(Resource):
     def resource_release(self):
         super().resource_release()
         self._image = None
+        self._image_binary = None
+
+    def _load_pack(self, genre='image'):
+        """
+        Args:
+            genre (str): 'image' or 'binary'.
+
+        Returns:
+            list[np.ndarray]: Images from asset pack, or None if not in pack.
+        """
+        # Templates with custom pre-process are not packed
+        if type(self).pre_process is not Template.pre_process:
+            return None
+        return ASSET_PACK.get(ASSET_PACK.template_key(self.file), file=self.file, genre=genre)
 
     def pre_process(self, image):
         """
@@ -0,0 +1,387 @@
+"""
+Index of map files under ./campaign, queried without importing them.
+
+Every map file builds a CampaignMap and all its grids at import, and imports the whole campaign module chain,
+so enumerating maps by importing takes seconds.
+The index records what map files declare in literals, parsed with `ast`:
+    MAP = CampaignMap('7-2'), assignments like `MAP.shape = 'H5'` and `MAP.spawn_data = [...]`,
+    calls like `MAP.ignore_prediction(D5, enemy_scale=1)`,
+    and literal attributes of `class Config`, including the ones inherited from other map files.
+Maps can be built from the index on first access, without running the map file.
+
+Build it, or it's built on first query:
+    python -m module.campaign.map_index
+
+Entries of map files modified after indexing are parsed again on query.
+"""
+import ast
+import json
+import os
+
+from module.base.asset_pack import ASSET_PACK_FOLDER, file_stat
+from module.base.decorator import cached_property
+from module.logger import logger
+
+CAMPAIGN_FOLDER = './campaign'
+MAP_INDEX_FILE = os.path.join(ASSET_PACK_FOLDER, 'map_index.json')
+# Increase this if the format of entries changed
+MAP_INDEX_VERSION = 2
+# Key: attribute in CampaignMap, value: mechanism name
+MECHANISMS = {
+    'wall_data': 'wall',
+    'portal_data': 'portal',
+    'land_based_data': 'land_based',
+    'maze_data': 'maze',
+    'fortress_data': 'fortress',
+    'bouncing_enemy_data': 'bouncing_enemy',
+}
+
+
+def _resolve_module(node, package):
+    """
+    Args:
+        node (ast.ImportFrom):
+        package (str): Package of the file, such as `campaign.event_20210819_cn`
+
+    Returns:
+        str: Absolute module name, such as `campaign.event_20210819_cn.d1`
+    """
+    if not node.level:
+        return node.module
+    parts = package.split('.')
+    if node.level > 1:
+        parts = parts[:-(node.level - 1)]
+    if node.module:
+        parts.append(node.module)
+    return '.'.join(parts)
+
+
+def _literal(node):
+    """
+    Returns:
+        str: repr of the literal, or None if not a literal.
+    """
+    try:
+        return repr(ast.literal_eval(node))
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        return None
+
+
+def parse_map_file(file, module):
+    """
+    Args:
+        file (str): Such as `./campaign/campaign_main/campaign_7_2.py`
+        module (str): Such as `campaign.campaign_main.campaign_7_2`
+
+    Returns:
+        dict: Entry of index. Values of literals are stored as repr strings, to keep tuples.
+    """
+    entry = {
+        'stat': file_stat(file),
+        'has_map': False,
+        'map_name': None,
+        'map_from': None,
+        'map': [],
+        'calls': [],
+        'config_base': None,
+        'config': {},
+        'has_campaign': False,
+    }
+    try:
+        with open(file, 'r', encoding='utf-8') as f:
+            tree = ast.parse(f.read(), filename=file)
+    except (OSError, SyntaxError, ValueError) as e:
+        logger.warning(f'Failed to parse map file {file}: {e}')
+        return entry
+
+    package = module.rsplit('.', 1)[0]
+    imported = {}
+    for node in tree.body:
+        if isinstance(node, ast.ImportFrom):
+            source = _resolve_module(node, package)
+            for alias in node.names:
+                if alias.name in ['MAP', 'Config']:
+                    imported[alias.asname or alias.name] = (source, alias.name)
+                    if alias.name == 'MAP' and (alias.asname or alias.name) == 'MAP':
+                        entry['has_map'] = True
+                        entry['map_from'] = source
+        elif isinstance(node, ast.Assign) and len(node.targets) == 1:
+            target, value = node.targets[0], node.value
+            if isinstance(target, ast.Name) and target.id == 'MAP':
+                # MAP = CampaignMap('7-2')
+                if isinstance(value, ast.Call):
+                    name = _literal(value.args[0]) if value.args else None
+                    entry['has_map'] = True
+                    entry['map_name'] = ast.literal_eval(name) if name is not None else None
+                    entry['map_from'] = None
+            elif isinstance(target, ast.Attribute) and isinstance(target.value, ast.Name) \
+                    and target.value.id == 'MAP':
+                # MAP.shape = 'H5'
+                literal = _literal(value)
+                if literal is not None:
+                    entry['map'].append([target.attr, literal])
+        elif isinstance(node, ast.Expr) and isinstance(node.value, ast.Call):
+            # MAP.ignore_prediction(D5, enemy_scale=1)
+            call = node.value
+            if isinstance(call.func, ast.Attribute) and isinstance(call.func.value, ast.Name) \
+                    and call.func.value.id == 'MAP':
+                # Grids from `MAP.flatten()` are named by their nodes
+                args = [repr(arg.id) if isinstance(arg, ast.Name) else _literal(arg) for arg in call.args]
+                kwargs = {kw.arg: _literal(kw.value) for kw in call.keywords}
+                if None not in args and None not in kwargs.values() and None not in kwargs:
+                    entry['calls'].append([call.func.attr, args, kwargs])
+        elif isinstance(node, ast.ClassDef):
+            if node.name == 'Config':
+                for base in node.bases:
+                    if isinstance(base, ast.Name) and imported.get(base.id, (None, None))[1] == 'Config':
+                        entry['config_base'] = imported[base.id][0]
+                for item in node.body:
+                    if isinstance(item, ast.Assign) and len(item.targets) == 1 \
+                            and isinstance(item.targets[0], ast.Name):
+                        literal = _literal(item.value)
+                        if literal is not None:
+                            entry['config'][item.targets[0].id] = literal
+            elif node.name == 'Campaign':
+                entry['has_campaign'] = True
+
+    return entry
+
+
+class MapInfo:
+    def __init__(self, index, module, entry):
+        """
+        Args:
+            index (MapIndex):
+            module (str): Such as `campaign.campaign_main.campaign_7_2`
+            entry (dict): Entry of index.
+        """
+        self.index = index
+        self.module = module
+        self.entry = entry
+        _, self.folder, self.name = module.split('.')
+
+    def __str__(self):
+        return f'MapInfo({self.folder}.{self.name})'
+
+    __repr__ = __str__
+
+    @cached_property
+    def map_chain(self):
+        """
+        Returns:
+            list[MapInfo]: Map files that build MAP, from where MAP is defined to this file.
+                MAP may be imported from another map file and modified.
+        """
+        chain = [self]
+        for _ in range(10):
+            module = chain[0].entry['map_from']
+            info = self.index.get_module(module) if module else None
+            if info is None:
+                break
+            chain.insert(0, info)
+        return chain
+
+    @cached_property
+    def attrs(self):
+        """
+        Returns:
+            dict: Key: attribute of CampaignMap, value: literal.
+        """
+        return {attr: ast.literal_eval(value) for info in self.map_chain for attr, value in info.entry['map']}
+
+    @property
+    def map_name(self):
+        return self.map_chain[0].entry['map_name']
+
+    @property
+    def has_map(self):
+        return self.entry['has_map']
+
+    @property
+    def shape(self):
+        """
+        Returns:
+            str: Such as 'H5', or None.
+        """
+        return self.attrs.get('shape', None)
+
+    @property
+    def spawn_data(self):
+        return self.attrs.get('spawn_data', [])
+
+    @property
+    def mechanisms(self):
+        """
+        Returns:
+            list[str]: Mechanisms that map data declares, such as ['wall', 'portal'].
+        """
+        return [name for attr, name in MECHANISMS.items() if self.attrs.get(attr)]
+
+    @cached_property
+    def config(self):
+        """
+        Returns:
+            dict: Literal attributes of `Config`, including inherited ones.
+        """
+        chain = []
+        info = self
+        for _ in range(10):
+            chain.append(info)
+            base = info.entry['config_base']
+            info = self.index.get_module(base) if base else None
+            if info is None:
+                break
+        config = {}
+        for info in reversed(chain):
+            for key, value in info.entry['config'].items():
+                config[key] = ast.literal_eval(value)
+        return config
+
+    def build(self):
+        """
+        Build CampaignMap from index, without running the map file.
+
+        Returns:
+            CampaignMap:
+        """
+        from module.map.map_base import CampaignMap
+        map_ = CampaignMap(self.map_name)
+        for info in self.map_chain:
+            for attr, value in info.entry['map']:
+                setattr(map_, attr, ast.literal_eval(value))
+            for func, args, kwargs in info.entry['calls']:
+                args = [ast.literal_eval(arg) for arg in args]
+                kwargs = {key: ast.literal_eval(value) for key, value in kwargs.items()}
+                getattr(map_, func)(*args, **kwargs)
+        return map_
+
+
+class MapIndex:
+    def __init__(self, folder=CAMPAIGN_FOLDER, file=MAP_INDEX_FILE):
+        self.folder = folder
+        self.file = file
+
+    def _scan(self):
+        """
+        Returns:
+            dict: Key: module name, value: file path. All map files under campaign folder.
+        """
+        files = {}
+        for folder in sorted(os.listdir(self.folder)):
+            path = os.path.join(self.folder, folder)
+            if not os.path.isdir(path) or folder.startswith(('.', '_')):
+                continue
+            for file in sorted(os.listdir(path)):
+                name, ext = os.path.splitext(file)
+                if ext == '.py' and not name.startswith('_'):
+                    files[f'campaign.{folder}.{name}'] = os.path.join(path, file)
+        return files
+
+    @cached_property
+    def index(self):
+        """
+        Returns:
+            dict: Key: module name, such as `campaign.campaign_main.campaign_7_2`, value: entry.
+        """
+        try:
+            with open(self.file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != MAP_INDEX_VERSION:
+                data = {}
+        except FileNotFoundError:
+            data = {}
+        except (OSError, ValueError) as e:
+            logger.warning(f'Failed to load map index: {e}')
+            data = {}
+        index = data.get('maps', {})
+
+        # Drop deleted files, parse new and modified files
+        files = self._scan()
+        modified = set(index) - set(files)
+        for module in modified:
+            del index[module]
+        for module, file in files.items():
+            entry = index.get(module, None)
+            if entry is None or entry['stat'] != file_stat(file):
+                index[module] = parse_map_file(file, module)
+                modified.add(module)
+        if modified:
+            logger.info(f'Map index updated: {len(modified)} files')
+            self.save(index)
+        return index
+
+    def save(self, index):
+        tmp = f'{self.file}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.file), exist_ok=True)
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'version': MAP_INDEX_VERSION, 'maps': index}, f)
+            os.replace(tmp, self.file)
+        except OSError as e:
+            logger.warning(f'Failed to save map index: {e}')
+
+    def folders(self):
+        """
+        Returns:
+            list[str]: Folders under ./campaign, such as ['campaign_main', 'event_20200227_cn', ...]
+        """
+        return sorted(set(module.split('.')[1] for module in self.index))
+
+    def maps(self, folder):
+        """
+        Args:
+            folder (str): Such as 'event_20210819_cn'
+
+        Returns:
+            list[MapInfo]: Map files that have a MAP and a Campaign.
+        """
+        maps = [self.get(folder, module.split('.')[2]) for module in self.index
+                if module.split('.')[1] == folder]
+        return [info for info in maps if info.has_map and info.entry['has_campaign']]
+
+    def get_module(self, module):
+        """
+        Args:
+            module (str): Such as `campaign.campaign_main.campaign_7_2`
+
+        Returns:
+            MapInfo: Or None if not exists.
+        """
+        entry = self.index.get(module, None)
+        if entry is None:
+            return None
+        return MapInfo(self, module, entry)
+
+    def get(self, folder, name):
+        """
+        Args:
+            folder (str): Such as 'campaign_main'
+            name (str): Such as 'campaign_7_2'
+
+        Returns:
+            MapInfo: Or None if not exists.
+        """
+        return self.get_module(f'campaign.{folder}.{name}')
+
+    def select(self, **kwargs):
+        """
+        Args:
+            **kwargs: Config attributes, such as MAP_HAS_PORTAL=True
+
+        Returns:
+            list[MapInfo]: Maps matching all config attributes.
+        """
+        maps = []
+        for folder in self.folders():
+            for info in self.maps(folder):
+                if all(info.config.get(key, None) == value for key, value in kwargs.items()):
+                    maps.append(info)
+        return maps
+
+
+MAP_INDEX = MapIndex()
+
+if __name__ == '__main__':
+    if os.path.exists(MAP_INDEX.file):
+        os.remove(MAP_INDEX.file)
+    logger.info(f'Map index built: {len(MAP_INDEX.index)} files')
@@ -62,6 +62,7 @@ class CampaignRun(UI):
             raise RequestHumanTakeover
 
         config = copy.deepcopy(self.config).merge(self.module.Config())
+        config.MAP_NAME = f'{folder}.{name}'
         device = self.device
         self.campaign = self.module.Campaign(config=config, device=device)
 
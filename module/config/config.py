@@ -1,14 +1,16 @@
 import copy
 import datetime
-import operator
 import threading
+import time
 
 import pywebio
 
-from module.base.filter import Filter
+from module.config.config_cache import CONFIG_CACHE
 from module.config.config_generated import GeneratedConfig
 from module.config.config_manual import ManualConfig, OutputConfig
 from module.config.config_updater import ConfigUpdater
+from module.config.journal import ConfigJournal
+from module.config.task_queue import TaskQueue
 from module.config.watcher import ConfigWatcher
 from module.config.utils import *
 from module.exception import RequestHumanTakeover, ScriptError
@@ -62,13 +64,15 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
 
     # Class property
     is_hoarding_task = True
+    # Number of config file writes avoided by write-behind
+    write_avoided = 0
 
     def __setattr__(self, key, value):
         if key in self.bound:
             path = self.bound[key]
             self.modified[path] = value
             if self.auto_update:
-                self.update()
+                self.write_behind()
         else:
             super().__setattr__(key, value)
 
@@ -88,11 +92,18 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
         # Force override variables
         # Key: Argument name in GeneratedConfig. Value: Modified value.
         self.overridden = {}
+        # Modifications not yet written into config file, see `write_behind()`.
+        self.journal = ConfigJournal(config_name)
+        # Time of the first modification in journal, None if journal is empty.
+        self.journal_start = None
+        # Modifications in journal
+        self.journaled = {}
         # Scheduler queue, will be updated in `get_next_task()`, list of Function objects
         # pending_task: Run time has been reached, but haven't been run due to task scheduling.
-        # waiting_task: Run time haven't been reached, wait needed.
+        # waiting_task: Run time haven't been reached, wait needed, see `waiting_task`.
         self.pending_task = []
-        self.waiting_task = []
+        # All tasks in a heap, updated on modifications of Scheduler.NextRun and Scheduler.Enable
+        self.task_queue = TaskQueue(self.SCHEDULER_PRIORITY)
         # Task to run and bind.
         # Task means the name of the function to run in AzurLaneAutoScript class.
         self.task: Function
@@ -103,6 +114,7 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
             self.task = name_to_function("template")
         else:
             self.load()
+            logger.attr("ConfigCache", CONFIG_CACHE.report())
             if task is None:
                 # Bind `Alas` by default which includes emulator settings.
                 task = name_to_function("Alas")
@@ -114,11 +126,13 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
             self.save()
 
     def load(self):
+        self.journal_check()
         self.data = self.read_file(self.config_name)
         self.config_override()
 
         for path, value in self.modified.items():
             deep_set(self.data, keys=path, value=value)
+        self.task_queue.load([Function(func) for func in self.data.values()])
 
     def bind(self, func):
         """
@@ -177,35 +191,19 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
         """
         Calculate tasks, set pending_task and waiting_task
         """
-        pending = []
-        waiting = []
-        error = []
         now = datetime.now()
         if AzurLaneConfig.is_hoarding_task:
             now -= self.hoarding
-        for func in self.data.values():
-            func = Function(func)
-            if not func.enable:
-                continue
-            if not isinstance(func.next_run, datetime):
-                error.append(func)
-            elif func.next_run < now:
-                pending.append(func)
-            else:
-                waiting.append(func)
-
-        f = Filter(regex=r"(.*)", attr=["command"])
-        f.load(self.SCHEDULER_PRIORITY)
-        if pending:
-            pending = f.apply(pending)
-        if waiting:
-            waiting = f.apply(waiting)
-            waiting = sorted(waiting, key=operator.attrgetter("next_run"))
-        if error:
-            pending = error + pending
+        self.pending_task = self.task_queue.get(now)
 
-        self.pending_task = pending
-        self.waiting_task = waiting
+    @property
+    def waiting_task(self):
+        """
+        Returns:
+            list[Function]: Tasks that run time haven't been reached, ordered by next_run and priority.
+                Sorted on every read, use `task_queue.first()` if only the first one is needed.
+        """
+        return self.task_queue.waiting()
 
     def get_next(self):
         """
@@ -223,9 +221,10 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
         else:
             AzurLaneConfig.is_hoarding_task = True
 
-        if self.waiting_task:
+        task = self.task_queue.first()
+        if task is not None:
             logger.info("No task pending")
-            task = copy.deepcopy(self.waiting_task[0])
+            task = copy.deepcopy(task)
             task.next_run = (task.next_run + self.hoarding).replace(microsecond=0)
             logger.attr("Task", task)
             return task
@@ -235,11 +234,13 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
             raise RequestHumanTakeover
 
     def save(self):
-        if not self.modified:
+        # Journal left by previous runs is replayed in `load()`, write it into config file as well
+        if not self.modified and not self.journal.exists():
             return False
 
         for path, value in self.modified.items():
             deep_set(self.data, keys=path, value=value)
+            self.task_queue.set(path, value)
 
         logger.info(
             f"Save config {filepath_config(self.config_name)}, {dict_to_kv(self.modified)}"
@@ -247,6 +248,9 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
         # Don't use self.modified = {}, that will create a new object.
         self.modified.clear()
         self.write_file(self.config_name, data=self.data)
+        self.journal.clear()
+        self.journal_start = None
+        self.journaled = {}
 
     def update(self):
         self.load()
@@ -254,6 +258,91 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
         self.bind(self.task)
         self.save()
 
+    def write_behind(self):
+        """
+        Save modifications.
+        Instead of rewriting config file every time, modifications are appended to journal and applied in memory,
+        config file is written when the first modification in journal is older than CONFIG_WRITE_BEHIND_INTERVAL,
+        or on `flush()` at the end of tasks.
+        """
+        if not self.CONFIG_WRITE_BEHIND:
+            self.update()
+            return
+        self.journal_check()
+        # Journal the ones new or changed since the last append
+        delta = {path: value for path, value in self.modified.items()
+                 if path not in self.journaled or self.journaled[path] != value}
+        if not delta:
+            return
+
+        self.journal.append(delta)
+        self.journaled.update(delta)
+        if self.journal_start is None:
+            self.journal_start = time.time()
+        if time.time() - self.journal_start > self.CONFIG_WRITE_BEHIND_INTERVAL:
+            self.update()
+            return
+
+        arg_of_path = {path: arg for arg, path in self.bound.items()}
+        for path, value in delta.items():
+            deep_set(self.data, keys=path, value=value)
+            self.task_queue.set(path, value)
+            arg = arg_of_path.get(path, None)
+            if arg is not None and arg not in self.overridden:
+                super().__setattr__(arg, value)
+        AzurLaneConfig.write_avoided += 1
+
+    def journal_check(self):
+        """
+        Journal is folded into config file when others write it, such as saving settings in GUI.
+        Modifications in journal are written already, drop them from `self.modified`,
+        otherwise they would override the later changes of others on the next save.
+        """
+        if self.journal_start is None or self.journal.exists():
+            return
+        for path, value in self.journaled.items():
+            if path in self.modified and self.modified[path] == value:
+                self.modified.pop(path)
+        self.journaled = {}
+        self.journal_start = None
+
+    def flush_due(self):
+        """
+        Write journal into config file if the first modification in it is older than CONFIG_WRITE_BEHIND_INTERVAL.
+        Called periodically, such as on screenshots and in waits,
+        so modifications don't stay in journal when no more modifications come.
+
+        Returns:
+            bool: If written.
+        """
+        if self.journal_start is None:
+            return False
+        if time.time() - self.journal_start <= self.CONFIG_WRITE_BEHIND_INTERVAL:
+            return False
+        return self.flush()
+
+    def flush_remain(self):
+        """
+        Returns:
+            float: Seconds until `flush_due()` writes config file, None if journal is empty.
+        """
+        if self.journal_start is None:
+            return None
+        return max(self.journal_start + self.CONFIG_WRITE_BEHIND_INTERVAL - time.time(), 0)
+
+    def flush(self):
+        """
+        Write modifications in journal into config file.
+
+        Returns:
+            bool: If written.
+        """
+        if self.journal_start is None and not self.modified:
+            return False
+        self.update()
+        logger.info(f"Config file writes avoided: {AzurLaneConfig.write_avoided}")
+        return True
+
     def config_override(self):
         now = datetime.now().replace(microsecond=0)
         limited = set()
@@ -268,6 +357,7 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
                 )
                 if isinstance(next_run, datetime) and next_run > limit:
                     deep_set(self.data, keys=f"{task}.Scheduler.NextRun", value=now)
+                    self.task_queue.set(f"{task}.Scheduler.NextRun", now)
 
         for task in ["Commission", "Research", "Reward"]:
             enable = deep_get(
@@ -350,7 +440,7 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
         """
         self.modified[keys] = value
         if self.auto_update:
-            self.update()
+            self.write_behind()
 
     def task_delay(self, success=None, server_update=None, target=None, minute=None, task=None):
         """
@@ -410,7 +500,7 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
             if task is None:
                 task = self.task.command
             self.modified[f'{task}.Scheduler.NextRun'] = run
-            self.update()
+            self.write_behind()
         else:
             raise ScriptError(
                 "Missing argument in delay_next_run, should set at least one"
@@ -510,7 +600,7 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
                 logger.info("Just less than 1 day to OpSi reset, delay 2.5 hours")
                 delay_tasks(tasks, minutes=150)
 
-        self.update()
+        self.write_behind()
 
     def task_call(self, task, force_call=True):
         """
@@ -540,7 +630,7 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
             )
             self.modified[f"{task}.Scheduler.Enable"] = True
             if self.auto_update:
-                self.update()
+                self.write_behind()
             return True
         else:
             logger.info(f"Task call: {task} (skipped because disabled by user)")
@@ -740,5 +830,5 @@ class MultiSetWrapper:
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         if not self.in_wrapper:
-            self.main.update()
+            self.main.write_behind()
             self.main.auto_update = True
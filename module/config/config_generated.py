@@ -21,9 +21,10 @@ class GeneratedConfig:
     Emulator_Serial = 'auto'
     Emulator_PackageName = 'auto'  # auto, com.bilibili.azurlane, com.YoStarEN.AzurLane, com.YoStarJP.AzurLane, com.hkmanjuu.azurlane.gp, com.bilibili.blhx.huawei, com.bilibili.blhx.mi, com.tencent.tmgp.bilibili.blhx, com.bilibili.blhx.baidu, com.bilibili.blhx.qihoo, com.bilibili.blhx.nearme.gamecenter, com.bilibili.blhx.vivo, com.bilibili.blhx.mz, com.bilibili.blhx.uc, com.bilibili.blhx.mzw, com.yiwu.blhx.yx15, com.bilibili.blhx.m4399, com.hkmanjuu.azurlane.gp.mc
     Emulator_ServerName = 'disabled'  # disabled, cn_android-0, cn_android-1, cn_android-2, cn_android-3, cn_android-4, cn_android-5, cn_android-6, cn_android-7, cn_android-8, cn_android-9, cn_android-10, cn_android-11, cn_android-12, cn_android-13, cn_android-14, cn_android-15, cn_android-16, cn_android-17, cn_android-18, cn_android-19, cn_android-20, cn_android-21, cn_ios-0, cn_ios-1, cn_ios-2, cn_ios-3, cn_ios-4, cn_ios-5, cn_ios-6, cn_ios-7, cn_ios-8, cn_ios-9, cn_ios-10, cn_channel-0, cn_channel-1, cn_channel-2, cn_channel-3, en-0, en-1, en-2, en-3, en-4
-    Emulator_ScreenshotMethod = 'ADB'  # ADB, ADB_nc, uiautomator2, aScreenCap, aScreenCap_nc
+    Emulator_ScreenshotMethod = 'ADB'  # ADB, ADB_nc, ADB_stream, uiautomator2, aScreenCap, aScreenCap_nc
     Emulator_ControlMethod = 'minitouch'  # ADB, uiautomator2, minitouch, Hermit
     Emulator_ScreenshotDedithering = False
+    Emulator_ScreenshotPipeline = False
     Emulator_AdbRestart = False
 
     # Group `RestartEmulator`
@@ -390,9 +391,11 @@ class GeneratedConfig:
     # Group `Benchmark`
     Benchmark_AdbScreenshot = True
     Benchmark_AdbncScreenshot = True
+    Benchmark_AdbStreamScreenshot = True
     Benchmark_Uiautomator2Screenshot = True
     Benchmark_AscreencapScreenshot = True
     Benchmark_AscreencapncScreenshot = True
+    Benchmark_ScreenshotPipeline = True
     Benchmark_AdbClick = True
     Benchmark_Uiautomator2Click = True
     Benchmark_MinitouchClick = True
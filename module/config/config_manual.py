@@ -60,10 +60,20 @@ class ManualConfig:
     LV32_TRIGGERED = False
     STOP_IF_REACH_LV32 = False
 
+    """
+    module.config
+    """
+    # Append modifications to ./config/{config_name}.journal and write config file in batch.
+    CONFIG_WRITE_BEHIND = True
+    # Write config file if modifications stayed in journal longer than this, in seconds.
+    CONFIG_WRITE_BEHIND_INTERVAL = 30
+
     """
     module.device
     """
     DEVICE_OVER_HTTP = False
+    # Run non-stream `adb_shell()` in a long-lived shell, instead of opening a new ADB transport every time.
+    DEVICE_SHELL_SESSION = True
     FORWARD_PORT_RANGE = (20000, 21000)
     REVERSE_SERVER_PORT = 7903
     ASCREENCAP_FILEPATH_LOCAL = './bin/ascreencap'
@@ -151,6 +161,13 @@ class ManualConfig:
     DETECTING_AREA = (123, 55, 1280, 720)
     SCREEN_CENTER = (SCREEN_SIZE[0] / 2, SCREEN_SIZE[1] / 2)
     DETECTION_BACKEND = 'homography'
+    # Name of current map, such as `campaign_main.campaign_7_2`, set when loading map files.
+    # Homography solutions are cached per map, empty to cache only the ones from HOMO_STORAGE.
+    MAP_NAME = ''
+    # Track camera from the previous detection and the swipe made since then,
+    # instead of detecting from scratch on every screenshot. Fallback to full detection if tracking failed.
+    # Disabled by default, game auto-pans camera in some maps, which tracking can't see.
+    DETECTION_TRACKING = False
     # In event_20200723_cn B3D3, Grid have 1.2x width, images on the grid still remain the same.
     GRID_IMAGE_A_MULTIPLY = 1.0
 
@@ -167,6 +184,8 @@ class ManualConfig:
     HOMO_CENTER_THRESHOLD = 0.8
     HOMO_CORNER_THRESHOLD = 0.8
     HOMO_RECTANGLE_THRESHOLD = 10
+    # Allowed error in pixel between the tracked tile and the actual one, swipes are not that accurate.
+    HOMO_TRACK_RADIUS = 15
 
     HOMO_EDGE_DETECT = True
     HOMO_EDGE_HOUGHLINES_THRESHOLD = 140
@@ -201,8 +220,18 @@ class ManualConfig:
     TRUST_EDGE_LINES = False  # True to use edge to crop inner, false to use inner to crop edge
     TRUST_EDGE_LINES_THRESHOLD = 5
     # Parameters for perspective calculating
+    # 'brute' to search vanish point and distant point in ranges below,
+    # 'least_squares' to solve them from detected lines, much faster, see dev_tools/perspective_benchmark.py
+    PERSPECTIVE_SOLVER = 'brute'
     VANISH_POINT_RANGE = ((540, 740), (-3000, -1000))
     DISTANCE_POINT_X_RANGE = ((-3200, -1600),)
+    # Parameters for least_squares solver, residual threshold of inliers
+    # Angle in radian between vertical lines and vanish point
+    VANISH_POINT_RANSAC_THRESHOLD = 0.01
+    # Distance to distant point relative to the distance between vanish point and distant point, in log scale
+    DISTANCE_POINT_RANSAC_THRESHOLD = 0.01
+    # Allowed increase of vanish point value per line when reusing the previous perspective, in log10 pixels.
+    PERSPECTIVE_TRACK_TOLERANCE = 0.3
     # Parameters for line cleansing
     COINCIDENT_POINT_ENCOURAGE_DISTANCE = 3
     ERROR_LINES_TOLERANCE = (-10, 10)
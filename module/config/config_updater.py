@@ -1,10 +1,15 @@
+import json
+import os
 import re
+import time
 from copy import deepcopy
 
 from cached_property import cached_property
 
 from deploy.utils import DEPLOY_TEMPLATE, poor_yaml_read, poor_yaml_write
 from module.base.timer import timer
+from module.config.config_cache import CONFIG_CACHE
+from module.config.journal import ConfigJournal
 from module.config.redirect_utils.shop_filter import bp_redirect
 from module.config.redirect_utils.utils import upload_redirect, api_redirect
 from module.config.server import to_server, to_package, VALID_PACKAGE, VALID_CHANNEL_PACKAGE, VALID_SERVER_LIST
@@ -479,6 +484,49 @@ class ConfigUpdater:
     def args(self):
         return read_file(filepath_args())
 
+    @cached_property
+    def args_version(self):
+        """
+        Returns:
+            str: Version of the loaded args.json, configs normalized with other versions are outdated.
+        """
+        _ = self.args
+        stat = os.stat(filepath_args())
+        return f'{stat.st_size}_{stat.st_mtime_ns}'
+
+    @cached_property
+    def config_update_special(self):
+        """
+        Returns:
+            set[str]: Paths that `config_update()` doesn't update on their own,
+                changing them needs a full update.
+        """
+        paths = {'Alas.Emulator.PackageName', 'Alas.DropRecord.AzurStatsID'}
+        for row in self.redirection:
+            for path in row[:2]:
+                if isinstance(path, tuple):
+                    paths.update(path)
+                else:
+                    paths.add(path)
+        return paths
+
+    def config_update_arg(self, old, new, keys, is_template=False):
+        """
+        Update an argument from old config to new config.
+
+        Args:
+            old (dict):
+            new (dict):
+            keys (str, list[str]):
+            is_template (bool):
+        """
+        data = deep_get(self.args, keys=keys, default={})
+        value = deep_get(old, keys=keys, default=data['value'])
+        if value is None or value == '' or data['type'] in ['lock'] or is_template:
+            value = data['value']
+        value = parse_value(value, data=data)
+        deep_set(new, keys=keys, value=value)
+
     def config_update(self, old, is_template=False):
         """
         Args:
@@ -490,16 +538,8 @@ class ConfigUpdater:
         """
         new = {}
 
-        def deep_load(keys):
-            data = deep_get(self.args, keys=keys, default={})
-            value = deep_get(old, keys=keys, default=data['value'])
-            if value is None or value == '' or data['type'] in ['lock'] or is_template:
-                value = data['value']
-            value = parse_value(value, data=data)
-            deep_set(new, keys=keys, value=value)
-
         for path, _ in deep_iter(self.args, depth=3):
-            deep_load(path)
+            self.config_update_arg(old, new, path, is_template=is_template)
 
         # AzurStatsID
         if is_template:
@@ -530,6 +570,50 @@ class ConfigUpdater:
 
         return new
 
+    def config_update_incremental(self, old, prev_old, prev_new, is_template=False):
+        """
+        Update config based on the previous one, if only values of some arguments changed.
+
+        Args:
+            old (dict): Raw config.
+            prev_old (dict): Raw config of the previous update.
+            prev_new (dict): Normalized config of the previous update, will be modified.
+            is_template (bool):
+
+        Returns:
+            dict: Normalized config, or None if full update needed.
+        """
+        changed = []
+        if old.keys() != prev_old.keys():
+            return None
+        for task, task_data in old.items():
+            prev_task = prev_old[task]
+            if task_data == prev_task:
+                continue
+            if not isinstance(task_data, dict) or not isinstance(prev_task, dict) \
+                    or task_data.keys() != prev_task.keys():
+                return None
+            for group, group_data in task_data.items():
+                prev_group = prev_task[group]
+                if group_data == prev_group:
+                    continue
+                if not isinstance(group_data, dict) or not isinstance(prev_group, dict) \
+                        or group_data.keys() != prev_group.keys():
+                    return None
+                for arg, value in group_data.items():
+                    prev_value = prev_group[arg]
+                    if value != prev_value or type(value) is not type(prev_value):
+                        changed.append(f'{task}.{group}.{arg}')
+
+        for path in changed:
+            if path in self.config_update_special or path.endswith('.Campaign.Event'):
+                return None
+        for path in changed:
+            # Unknown arguments are dropped in `config_update()`
+            if deep_get(self.args, keys=path, default=None) is not None:
+                self.config_update_arg(old, prev_new, path, is_template=is_template)
+        return prev_new
+
     def config_redirect(self, old, new):
         """
         Convert old settings to the new.
@@ -578,9 +662,11 @@ class ConfigUpdater:
 
         return new
 
+    @timer
     def read_file(self, config_name, is_template=False):
         """
         Read and update config file.
+        Unchanged config files are loaded from CONFIG_CACHE, see ConfigCache.
 
         Args:
             config_name (str): ./config/{file}.json
@@ -589,19 +675,45 @@ class ConfigUpdater:
         Returns:
             dict:
         """
-        old = read_file(filepath_config(config_name))
-        return self.config_update(old, is_template=is_template)
+        start = time.time()
+        journal = ConfigJournal(config_name)
+        content = read_file_bytes(filepath_config(config_name))
+        journal_content = journal.read_bytes()
+        key = CONFIG_CACHE.key(content, journal_content, self.args_version, is_template)
+        new = CONFIG_CACHE.get(config_name, key)
+        if new is not None:
+            CONFIG_CACHE.add_record('hit', time.time() - start)
+            return new
+
+        old = json.loads(content.decode('utf-8')) if content else {}
+        # Modifications that haven't been written into config file
+        journal.replay(old, content=journal_content)
+        prev_old, prev_new = CONFIG_CACHE.previous(config_name, self.args_version, is_template)
+        new = None
+        if prev_old is not None:
+            new = self.config_update_incremental(old, prev_old, prev_new, is_template=is_template)
+        if new is not None:
+            method = 'incremental'
+        else:
+            method = 'full'
+            new = self.config_update(old, is_template=is_template)
+        CONFIG_CACHE.set(config_name, key, self.args_version, is_template, raw=old, data=new)
+        CONFIG_CACHE.add_record(method, time.time() - start)
+        # Cached copy is pickled, so `new` can be modified by caller
+        return new
 
     @staticmethod
     def write_file(config_name, data):
         """
         Write config file.
+        `data` should come from `read_file()`, journal replayed in it is removed.
 
         Args:
             config_name (str): ./config/{file}.json
             data (dict):
         """
         write_file(filepath_config(config_name), data)
+        ConfigJournal(config_name).fold()
 
     @timer
     def update_file(self, config_name, is_template=False):
@@ -633,7 +745,6 @@ if __name__ == '__main__':
     (old)    template.json ---------\========> template.json
     """
     # Ensure running in Alas root folder
-    import os
     os.chdir(os.path.join(os.path.dirname(__file__), '../../'))
 
     ConfigGenerator().generate()
@@ -0,0 +1,131 @@
+import json
+import os
+
+from filelock import FileLock
+
+from module.config.utils import deep_set, filepath_config, filepath_journal
+from module.logger import logger
+
+
+class ConfigJournal:
+    """
+    Append-only log of config modifications that haven't been written into ./config/{config_name}.json
+
+    Writing a config file means reading, updating and rewriting the whole file,
+    so modifications are appended here first and written into config file in batch.
+    Each line is a JSON object of modifications that are new or changed since the previous line,
+    later lines override earlier ones.
+    Journal is replayed when reading config file, so modifications survive crashes,
+    and removed after they are written into config file.
+
+    Anyone writing the config file, such as GUI, writes what it read, which has journal replayed,
+    so journal is folded into config file on every write, see `fold()`.
+    """
+    # Key: journal file. Value: content of journal at the last read in this process.
+    last_read = {}
+
+    def __init__(self, config_name):
+        """
+        Args:
+            config_name (str): ./config/{file}.json
+        """
+        self.file = filepath_journal(config_name)
+        # Journal is modified within the lock of config file, so it won't race with writers of config file
+        self.lock = FileLock(f'{filepath_config(config_name)}.lock')
+
+    def exists(self):
+        return os.path.exists(self.file)
+
+    def append(self, modified):
+        """
+        Args:
+            modified (dict): Key: Argument path in config file, value: Modified value.
+        """
+        line = json.dumps(modified, ensure_ascii=False, default=str)
+        with self.lock:
+            with open(self.file, mode='a', encoding='utf-8') as f:
+                f.write(line + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+    def read_bytes(self):
+        """
+        Returns:
+            bytes: Content of journal, b'' if not exists.
+        """
+        content = self._read_bytes()
+        ConfigJournal.last_read[self.file] = content
+        return content
+
+    def _read_bytes(self):
+        try:
+            with open(self.file, mode='rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return b''
+        except OSError as e:
+            logger.warning(f'Failed to read config journal {self.file}: {e}')
+            return b''
+
+    def read(self, content=None):
+        """
+        Args:
+            content (bytes): Content of journal, read from file if None.
+
+        Returns:
+            list[dict]: Modifications in order. Broken lines, such as the last line of a crash, are skipped.
+        """
+        if content is None:
+            content = self.read_bytes()
+
+        modified = []
+        for line in content.decode('utf-8', errors='ignore').splitlines():
+            try:
+                data = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(data, dict):
+                modified.append(data)
+        return modified
+
+    def replay(self, data, content=None):
+        """
+        Apply modifications in journal to the raw data of config file.
+
+        Args:
+            data (dict):
+            content (bytes): Content of journal, read from file if None.
+
+        Returns:
+            bool: If having any modifications.
+        """
+        modified = self.read(content)
+        for row in modified:
+            for path, value in row.items():
+                deep_set(data, keys=path, value=value)
+        return len(modified) > 0
+
+    def clear(self):
+        with self.lock:
+            self._remove()
+
+    def _remove(self):
+        try:
+            os.remove(self.file)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f'Failed to remove config journal {self.file}: {e}')
+
+    def fold(self):
+        """
+        Remove journal after config file is written.
+        Config file was read with journal replayed, so modifications in journal are in config file now.
+        Journal is kept if it was not read in this process, or appended after the last read.
+        """
+        content = ConfigJournal.last_read.pop(self.file, None)
+        if not content:
+            return
+        with self.lock:
+            if self._read_bytes() == content:
+                self._remove()
@@ -0,0 +1,162 @@
+import copy
+import heapq
+from datetime import datetime
+
+from module.base.filter import Filter
+
+
+class TaskQueue:
+    """
+    Scheduler tasks in a heap, ordered by (next_run, priority).
+
+    Tasks are loaded from config data once, and updated one by one
+    when `Scheduler.NextRun` or `Scheduler.Enable` is modified, such as in `task_delay()` and `task_call()`.
+    `get()` only pops entries on the heap top that are outdated or due, other entries stay in heap.
+    Outdated entries elsewhere are dropped when they are too many.
+    The results are the same as filtering all tasks by SCHEDULER_PRIORITY and sorting them.
+    """
+
+    def __init__(self, priority):
+        """
+        Args:
+            priority (str): SCHEDULER_PRIORITY
+        """
+        self.filter = Filter(regex=r"(.*)", attr=["command"])
+        self.filter.load(priority)
+        # Key: command. Value: index in SCHEDULER_PRIORITY, None if not in it.
+        self.priority = {}
+        # Key: command. Value: Function
+        self.tasks = {}
+        # Key: command. Value: the valid entry of this task in heap
+        self.entries = {}
+        # (next_run, priority, command)
+        self.heap = []
+        # Key: command. Value: entry popped from heap since its run time reached
+        self.due = {}
+
+    def get_priority(self, function):
+        """
+        Args:
+            function (Function):
+
+        Returns:
+            int: Index of the first filter matching this task, None if no filter matches.
+        """
+        command = function.command
+        if command not in self.priority:
+            self.priority[command] = None
+            for index, f in enumerate(self.filter.filter):
+                if self.filter.apply_filter_to_obj(obj=function, filter=f):
+                    self.priority[command] = index
+                    break
+        return self.priority[command]
+
+    def push(self, function):
+        """
+        Add or replace a task.
+
+        Args:
+            function (Function):
+        """
+        command = function.command
+        self.tasks[command] = function
+        priority = self.get_priority(function)
+        if function.enable and priority is not None and isinstance(function.next_run, datetime):
+            entry = (function.next_run, priority, command)
+            self.entries[command] = entry
+            heapq.heappush(self.heap, entry)
+        else:
+            self.entries.pop(command, None)
+
+        # Compact heap if too many outdated entries
+        if len(self.heap) > 2 * len(self.entries) + 16:
+            self.heap = [entry for entry in self.entries.values() if self.due.get(entry[2]) is not entry]
+            heapq.heapify(self.heap)
+
+    def load(self, functions):
+        """
+        Rebuild from all tasks in config.
+
+        Args:
+            functions (list[Function]):
+        """
+        self.tasks = {}
+        self.entries = {}
+        for function in functions:
+            self.tasks[function.command] = function
+            priority = self.get_priority(function)
+            if function.enable and priority is not None and isinstance(function.next_run, datetime):
+                self.entries[function.command] = (function.next_run, priority, function.command)
+        self.heap = list(self.entries.values())
+        heapq.heapify(self.heap)
+        self.due = {}
+
+    def set(self, path, value):
+        """
+        Apply a modification if it's about scheduler.
+
+        Args:
+            path (str): Such as `Commission.Scheduler.NextRun`
+            value:
+        """
+        task, _, arg = path.partition('.Scheduler.')
+        if arg not in ['NextRun', 'Enable'] or task not in self.tasks:
+            return
+        # Functions may be kept by callers, such as `AzurLaneConfig.task`, don't modify them
+        function = copy.copy(self.tasks[task])
+        if arg == 'NextRun':
+            function.next_run = value
+        else:
+            function.enable = value
+        self.push(function)
+
+    def get(self, now):
+        """
+        Args:
+            now (datetime.datetime):
+
+        Returns:
+            list[Function]: Pending tasks, run time reached, ordered by priority.
+                Tasks with invalid next_run come first.
+        """
+        error = [f for f in self.tasks.values() if f.enable and not isinstance(f.next_run, datetime)]
+        for command, entry in list(self.due.items()):
+            if self.entries.get(command) is not entry:
+                del self.due[command]
+            elif not entry[0] < now:
+                # Time goes back, such as system time changed or task hoarding started
+                del self.due[command]
+                heapq.heappush(self.heap, entry)
+
+        heap = self.heap
+        while heap:
+            entry = heap[0]
+            if self.entries.get(entry[2]) is not entry:
+                heapq.heappop(heap)
+            elif entry[0] < now:
+                heapq.heappop(heap)
+                self.due[entry[2]] = entry
+            else:
+                break
+
+        pending = sorted(self.due.values(), key=lambda e: (e[1], e[2]))
+        return error + [self.tasks[command] for _, _, command in pending]
+
+    def first(self):
+        """
+        Returns:
+            Function: The first waiting task, None if no waiting tasks. Valid after `get()`.
+        """
+        heap = self.heap
+        while heap and self.entries.get(heap[0][2]) is not heap[0]:
+            heapq.heappop(heap)
+        return self.tasks[heap[0][2]] if heap else None
+
+    def waiting(self):
+        """
+        Returns:
+            list[Function]: Waiting tasks, ordered by next_run and priority. Valid after `get()`.
+        """
+        entries = sorted(entry for entry in self.heap if self.entries.get(entry[2]) is entry)
+        return [self.tasks[command] for _, _, command in entries]
+
@@ -54,6 +54,10 @@ def filepath_config(filename):
     return os.path.join('./config', f'{filename}.json')
 
 
+def filepath_journal(filename):
+    return os.path.join('./config', f'{filename}.journal')
+
+
 def filepath_code():
     return './module/config/config_generated.py'
 
@@ -96,6 +100,27 @@ def read_file(file):
             return {}
 
 
+def read_file_bytes(file):
+    """
+    Read raw content of a file.
+    Return b'' if file not exists.
+
+    Args:
+        file (str):
+
+    Returns:
+        bytes:
+    """
+    if not os.path.exists(file):
+        return b''
+
+    lock = FileLock(f"{file}.lock")
+    with lock:
+        print(f'read: {file}')
+        with open(file, mode='rb') as f:
+            return f.read()
+
+
 def write_file(file, data):
     """
     Write data into a file, supports both .yaml and .json format.
@@ -1,16 +1,107 @@
+import ctypes
+import ctypes.util
 import os
+import platform
+import select
+import struct
+import time
 from datetime import datetime
 
 from module.config.utils import filepath_config, DEFAULT_TIME
 from module.logger import logger
 
+# Flags from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+# struct inotify_event {int wd; uint32_t mask; uint32_t cookie; uint32_t len; char name[];}
+INOTIFY_EVENT = struct.Struct('iIII')
+
+
+class Inotify:
+    """
+    Wait for file changes in a folder with inotify, Linux only.
+    Config files are replaced by `atomic_write`, so the folder is watched instead of the file.
+    """
+
+    def __init__(self, folder):
+        """
+        Args:
+            folder (str):
+
+        Raises:
+            OSError: If inotify is not available.
+        """
+        if platform.system() != 'Linux':
+            raise OSError('inotify is only available on Linux')
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        wd = libc.inotify_add_watch(self.fd, os.fsencode(folder), IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f'inotify_add_watch failed on {folder}')
+
+    def wait(self, names, timeout):
+        """
+        Args:
+            names (set[str]): File names to wait.
+            timeout (float): Seconds.
+
+        Returns:
+            bool: True if any file changed, False if timeout.
+        """
+        end = time.time() + timeout
+        while 1:
+            remain = end - time.time()
+            if remain <= 0:
+                return False
+            readable, _, _ = select.select([self.fd], [], [], remain)
+            if not readable:
+                return False
+            try:
+                data = os.read(self.fd, 4096)
+            except BlockingIOError:
+                continue
+            offset = 0
+            while offset + INOTIFY_EVENT.size <= len(data):
+                _, _, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                offset += INOTIFY_EVENT.size
+                name = data[offset:offset + length].rstrip(b'\0').decode('utf-8', errors='ignore')
+                offset += length
+                if name in names:
+                    return True
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
 
 class ConfigWatcher:
     config_name = 'alas'
     start_mtime = DEFAULT_TIME
+    # Interval to check file modify time, if inotify is not available
+    WATCH_POLL_INTERVAL = 5
+    inotify = None
 
     def start_watching(self) -> None:
         self.start_mtime = self.get_mtime()
+        self.stop_watching()
+        try:
+            self.inotify = Inotify(os.path.dirname(filepath_config(self.config_name)))
+        except OSError as e:
+            logger.info(f'Config watcher uses polling, inotify unavailable: {e}')
+            self.inotify = None
+
+    def stop_watching(self) -> None:
+        if self.inotify is not None:
+            self.inotify.close()
+            self.inotify = None
 
     def get_mtime(self) -> datetime:
         """
@@ -31,3 +122,30 @@ class ConfigWatcher:
             return True
         else:
             return False
+
+    def wait_change(self, timeout) -> bool:
+        """
+        Block until config file modified or timeout.
+        Wake up on file change instantly if inotify is available, otherwise check modify time periodically.
+
+        Args:
+            timeout (float): Seconds.
+
+        Returns:
+            bool: Whether the file has been modified and configs should reload
+        """
+        if self.inotify is not None:
+            name = os.path.basename(filepath_config(self.config_name))
+            if self.inotify.wait({name}, timeout=timeout):
+                logger.info(f'Config "{self.config_name}" changed')
+                return True
+            return False
+
+        end = time.time() + timeout
+        while 1:
+            remain = end - time.time()
+            if remain <= 0:
+                return False
+            time.sleep(min(remain, self.WATCH_POLL_INTERVAL))
+            if self.should_reload():
+                return True
@@ -10,6 +10,7 @@ from module.campaign.campaign_ui import CampaignUI
 from module.daemon.daemon_base import DaemonBase
 from module.exception import RequestHumanTakeover
 from module.logger import logger
+from module.ui.page import Page
 
 
 def float2str(n, decimal=3):
@@ -63,6 +64,29 @@ class Benchmark(DaemonBase, CampaignUI):
         logger.info(f'Time cost {float2str(average)} ({self.TEST_BEST} best results out of {self.TEST_TOTAL} tests)')
         return average
 
+    def benchmark_loop(self):
+        """
+        A loop of screenshot and page recognition, like the loops in `ui_get_current_page()`.
+        """
+        image = self.device.screenshot()
+        for page in Page.all_pages.values():
+            if page.check_button is not None:
+                page.check_button.match(image, offset=(30, 30))
+
+    def benchmark_pipeline(self):
+        """
+        Returns:
+            list: Rows of results, loops with and without screenshot pipeline.
+        """
+        backup = self.config.Emulator_ScreenshotPipeline
+        data = []
+        for name, pipeline in [('Sequential', False), ('Pipeline', True)]:
+            self.config.override(Emulator_ScreenshotPipeline=pipeline)
+            data.append([name, self.benchmark_test(self.benchmark_loop)])
+        self.config.override(Emulator_ScreenshotPipeline=backup)
+        self.device.screenshot_pipeline_stop()
+        return data
+
     @staticmethod
     def evaluate_screenshot(cost):
         if not isinstance(cost, (float, int)):
@@ -130,12 +154,16 @@ class Benchmark(DaemonBase, CampaignUI):
         self.device.uninstall_minicap()
         self.ui_goto_campaign()
         self.campaign_set_chapter('7-2')
+        # Screenshot methods are tested directly
+        self.device.screenshot_pipeline_stop()
 
         data = []
         if self.config.Benchmark_AdbScreenshot:
             data.append(['ADB', self.benchmark_test(self.device.screenshot_adb)])
         if self.config.Benchmark_AdbncScreenshot:
             data.append(['ADB_nc', self.benchmark_test(self.device.screenshot_adb_nc)])
+        if self.config.Benchmark_AdbStreamScreenshot:
+            data.append(['ADB_stream', self.benchmark_test(self.device.screenshot_adb_stream)])
         if self.config.Benchmark_Uiautomator2Screenshot:
             data.append(['uiautomator2', self.benchmark_test(self.device.screenshot_uiautomator2)])
         if self.config.Benchmark_AscreencapScreenshot:
@@ -160,6 +188,10 @@ class Benchmark(DaemonBase, CampaignUI):
             data.append(['Hermit', self.benchmark_test(self.device.click_hermit, x, y)])
         control = data
 
+        loop = []
+        if self.config.Benchmark_ScreenshotPipeline:
+            loop = self.benchmark_pipeline()
+
         def compare(res):
             res = res[1]
             if not isinstance(res, (int, float)):
@@ -176,6 +208,11 @@ class Benchmark(DaemonBase, CampaignUI):
             self.show(test='Control', data=control, evaluate_func=self.evaluate_click)
             fastest = sorted(control, key=lambda item: compare(item))[0]
             logger.info(f'Recommend control method: {fastest[0]} ({float2str(fastest[1])})')
+        if loop:
+            self.show(test='Screenshot Loop', data=loop, evaluate_func=self.evaluate_screenshot)
+            for name, cost in loop:
+                if isinstance(cost, (int, float)) and cost > 0:
+                    logger.attr(f'{name} loop frequency', f'{1 / cost:.2f}/s')
 
 
 if __name__ == '__main__':
@@ -18,7 +18,8 @@ from module.device.connection_attr import ConnectionAttr
 from module.device.method.utils import (RETRY_DELAY, RETRY_TRIES, remove_shell_warning,
                                         handle_adb_error, PackageNotInstalled,
                                         recv_all, del_cached_property, possible_reasons,
-                                        random_port, get_serial_pair)
+                                        random_port, get_serial_pair, ImageRing)
+from module.device.method.shell_session import SHELL_SESSIONS
 from module.exception import RequestHumanTakeover, EmulatorNotRunningError
 from module.logger import logger
 from module.map.map_grids import SelectedGrids
@@ -161,12 +162,41 @@ class Connection(ConnectionAttr):
             else:
                 # socket
                 return result
+        elif self.config.DEVICE_SHELL_SESSION:
+            result = self.adb_shell_session(cmd, timeout=timeout)
+            if rstrip:
+                result = result.rstrip()
+            result = remove_shell_warning(result)
+            # str
+            return result
         else:
             result = self.adb.shell(cmd, stream=stream, timeout=timeout, rstrip=rstrip)
             result = remove_shell_warning(result)
             # str
             return result
 
+    def adb_shell_session(self, cmd, timeout=10):
+        """
+        Run command in the shell session of current serial, which costs one round trip.
+        If session is broken, such as emulator restarted, run it in a new shell instead.
+        Timeouts are raised, commands that time out won't do better in a new shell.
+
+        Args:
+            cmd (list, str):
+            timeout (int):
+
+        Returns:
+            str: Output without rstrip.
+        """
+        session = SHELL_SESSIONS.get(self.adb)
+        try:
+            return session.execute(cmd, timeout=timeout)
+        except AdbTimeout:
+            raise
+        except (AdbError, OSError) as e:
+            logger.warning(f'Shell session failed: {e}, retry in a new shell')
+            return self.adb.shell(cmd, timeout=timeout, rstrip=False)
+
     @Config.when(DEVICE_OVER_HTTP=True)
     def adb_shell(self, cmd, stream=False, recvall=True, timeout=10, rstrip=True):
         """
@@ -450,6 +480,7 @@ class Connection(ConnectionAttr):
         if msg:
             logger.info(msg)
 
+        SHELL_SESSIONS.close(serial)
         del_cached_property(self, 'hermit_session')
         del_cached_property(self, 'minitouch_builder')
         del_cached_property(self, 'reverse_server')
@@ -522,6 +553,21 @@ class Connection(ConnectionAttr):
             f'restart_atx() is skipped, you may need to restart ATX manually'
         )
 
+    @cached_property
+    def image_ring(self):
+        """
+        Preallocated buffers for screenshots.
+
+        If Error_SaveError, the last Error_ScreenshotLength screenshots are kept in `screenshot_deque`,
+        a buffer can't be reused until its screenshot drops out of the deque.
+        So the ring holds 2 more buffers, for the frame in screenshot pipeline and the one being decoded.
+        Buffers of the deque are shared, not copied, they cost no more memory.
+        """
+        size = 3
+        if self.config.Error_SaveError:
+            size = max(int(self.config.Error_ScreenshotLength) + 2, size)
+        return ImageRing(size=size)
+
     @staticmethod
     def sleep(second):
         """
@@ -12,6 +12,10 @@ class Control(Hermit, Uiautomator2, Minitouch):
         # Will be overridden in Device
         pass
 
+    def handle_control_done(self):
+        # Will be overridden in Device
+        pass
+
     def click(self, button, control_check=True):
         """Method to click a button.
 
@@ -35,6 +39,7 @@ class Control(Hermit, Uiautomator2, Minitouch):
             self.click_hermit(x, y)
         else:
             self.click_adb(x, y)
+        self.handle_control_done()
 
     def multi_click(self, button, n, interval=(0.1, 0.2)):
         self.handle_control_check(button)
@@ -68,6 +73,7 @@ class Control(Hermit, Uiautomator2, Minitouch):
             self.long_click_uiautomator2(x, y, duration)
         else:
             self.swipe_adb((x, y), (x, y), duration)
+        self.handle_control_done()
 
     def swipe(self, p1, p2, duration=(0.1, 0.2), name='SWIPE', distance_check=True):
         self.handle_control_check(name)
@@ -96,6 +102,7 @@ class Control(Hermit, Uiautomator2, Minitouch):
             self.swipe_uiautomator2(p1, p2, duration=duration)
         else:
             self.swipe_adb(p1, p2, duration=duration)
+        self.handle_control_done()
 
     def swipe_vector(self, vector, box=(123, 159, 1175, 628), random_range=(0, 0, 0, 0), padding=15,
                      duration=(0.1, 0.2), whitelist_area=None, blacklist_area=None, name='SWIPE', distance_check=True):
@@ -144,3 +151,4 @@ class Control(Hermit, Uiautomator2, Minitouch):
                            f'falling back to ADB swipe may cause unexpected behaviour')
             self.swipe_adb(p1, p2, duration=ensure_time(swipe_duration * 2))
             self.click(Button(area=(), color=(), button=area_offset(point_random, p2), name=name))
+        self.handle_control_done()
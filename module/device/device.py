@@ -1,4 +1,5 @@
 import sys
+import time
 from collections import deque
 from datetime import datetime
 
@@ -59,6 +60,8 @@ class Device(Screenshot, Control, AppControl, EmulatorManager):
             np.ndarray:
         """
         self.stuck_record_check()
+        # Write config modifications in journal, if they stayed too long
+        self.config.flush_due()
         super().screenshot()
         if self.handle_night_commission():
             super().screenshot()
@@ -98,10 +101,16 @@ class Device(Screenshot, Control, AppControl, EmulatorManager):
             raise GameNotRunningError('Game died')
 
     def handle_control_check(self, button):
+        # Screen is going to change, stop backing off
+        self.screen_static_count = 0
         self.stuck_record_clear()
         self.click_record_add(button)
         self.click_record_check()
 
+    def handle_control_done(self):
+        # Screen is going to change, drop screenshots captured before
+        self.screenshot_valid_after = time.time()
+
     def click_record_add(self, button):
         self.click_record.append(str(button))
 
@@ -146,6 +155,7 @@ class Device(Screenshot, Control, AppControl, EmulatorManager):
             logger.critical('Please enable Alas.Error.HandleError or manually login to AzurLane')
             raise RequestHumanTakeover
         super().app_start()
+        self.handle_control_done()
         self.stuck_record_clear()
         self.click_record_clear()
 
@@ -155,5 +165,6 @@ class Device(Screenshot, Control, AppControl, EmulatorManager):
             logger.critical('Please enable Alas.Error.HandleError or manually login to AzurLane')
             raise RequestHumanTakeover
         super().app_stop()
+        self.handle_control_done()
         self.stuck_record_clear()
         self.click_record_clear()
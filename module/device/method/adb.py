@@ -63,10 +63,11 @@ def retry(func):
     return retry_wrapper
 
 
-def load_screencap(data):
+def load_screencap(data, ring=None):
     """
     Args:
-        data: Raw data from `screencap`
+        data (bytes, memoryview): Raw data from `screencap`
+        ring (ImageRing): Decode into a preallocated image if given.
 
     Returns:
         np.ndarray:
@@ -79,7 +80,10 @@ def load_screencap(data):
     image = np.frombuffer(data, dtype=np.uint8)
     shape = image.shape[0]
     image = image[shape - width * height * channel:].reshape(height, width, channel)
-    image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+    if ring is None:
+        image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+    else:
+        image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR, dst=ring.get((height, width, 3)))
     return image
 
 
@@ -107,7 +111,8 @@ class Adb(Connection):
         image = cv2.imdecode(image, cv2.IMREAD_COLOR)
         if image is None:
             raise OSError('Empty image')
-        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        # imdecode() already allocated a new image, convert in place
+        cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=image)
         return image
 
     def __process_screenshot(self, screenshot):
@@ -140,7 +145,7 @@ class Adb(Connection):
         if len(data) < 500:
             logger.warning(f'Unexpected screenshot: {data}')
 
-        return load_screencap(data)
+        return load_screencap(data, ring=self.image_ring)
 
     @retry
     def screenshot_adb_nc(self):
@@ -148,7 +153,7 @@ class Adb(Connection):
         if len(data) < 500:
             logger.warning(f'Unexpected screenshot: {data}')
 
-        return load_screencap(data)
+        return load_screencap(data, ring=self.image_ring)
 
     @retry
     def click_adb(self, x, y):
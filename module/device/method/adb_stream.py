@@ -0,0 +1,187 @@
+import socket
+from functools import wraps
+
+import numpy as np
+from adbutils.errors import AdbError
+
+from module.device.connection import Connection
+from module.device.method.adb import load_screencap
+from module.device.method.utils import (RETRY_DELAY, RETRY_TRIES,
+                                        handle_adb_error)
+from module.exception import RequestHumanTakeover
+from module.logger import logger
+
+
+class AdbStreamError(Exception):
+    pass
+
+
+def retry(func):
+    @wraps(func)
+    def retry_wrapper(self, *args, **kwargs):
+        """
+        Args:
+            self (AdbStream):
+        """
+        init = None
+        for _ in range(RETRY_TRIES):
+            try:
+                if callable(init):
+                    self.sleep(RETRY_DELAY)
+                    init()
+                return func(self, *args, **kwargs)
+            # Can't handle
+            except RequestHumanTakeover:
+                break
+            # When adb server was killed
+            except ConnectionResetError as e:
+                logger.error(e)
+
+                def init():
+                    self.adb_stream_release()
+                    self.adb_reconnect()
+            # Stream closed or corrupted, re-create it
+            except AdbStreamError as e:
+                logger.error(e)
+
+                def init():
+                    self.adb_stream_release()
+            # AdbError
+            except AdbError as e:
+                if handle_adb_error(e):
+                    def init():
+                        self.adb_stream_release()
+                        self.adb_reconnect()
+                else:
+                    break
+            # Unknown, probably a trucked image
+            except Exception as e:
+                logger.exception(e)
+
+                def init():
+                    self.adb_stream_release()
+
+        logger.critical(f'Retry {func.__name__}() failed')
+        raise RequestHumanTakeover
+
+    return retry_wrapper
+
+
+class ScreencapStream:
+    """
+    A long-lived `screencap` session running on one ADB socket.
+
+    The device side is a shell loop that waits for a line from stdin and writes one raw screencap frame per line,
+    so each screenshot costs one round trip instead of a new shell process and a new ADB transport.
+    Frames are received into a preallocated buffer.
+
+        $ while read -r _; do screencap 2>/dev/null; done
+    """
+    COMMAND = 'while read -r _; do screencap 2>/dev/null; done'
+
+    def __init__(self, conn, frame_size, timeout=10):
+        """
+        Args:
+            conn (socket.socket): Socket from `exec:` service.
+            frame_size (int): Bytes of each frame, including header.
+            timeout (int, float):
+        """
+        self.conn = conn
+        self.conn.settimeout(timeout)
+        self.frame_size = frame_size
+        self.buffer = bytearray(frame_size)
+        self.view = memoryview(self.buffer)
+
+    def receive(self):
+        """
+        Request a new frame and receive it into buffer.
+
+        Returns:
+            memoryview: Raw data of a frame, valid until next call.
+
+        Raises:
+            AdbStreamError: If stream closed or timeout.
+        """
+        try:
+            self.conn.sendall(b'\n')
+            received = 0
+            while received < self.frame_size:
+                size = self.conn.recv_into(self.view[received:], self.frame_size - received)
+                if not size:
+                    raise AdbStreamError(f'Screencap stream closed, received {received}/{self.frame_size} bytes')
+                received += size
+        except socket.timeout:
+            raise AdbStreamError('Screencap stream read timeout')
+        except (BrokenPipeError, ConnectionAbortedError) as e:
+            raise AdbStreamError(f'Screencap stream broken: {e}')
+
+        return self.view
+
+    def close(self):
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+
+
+class AdbStream(Connection):
+    _adb_stream: ScreencapStream = None
+
+    def adb_exec(self, cmd):
+        """
+        Equivalent to `adb -s <serial> exec-out <cmd>`, but returns the socket.
+        Unlike `adb shell`, `exec:` service doesn't allocate a pty, so stdin and stdout are raw binary.
+
+        Args:
+            cmd (str):
+
+        Returns:
+            socket.socket:
+        """
+        c = self.adb_client._connect()
+        try:
+            c.send_command(f'host:transport:{self.serial}')
+            c.check_okay()
+            c.send_command(f'exec:{cmd}')
+            c.check_okay()
+        except:
+            c.close()
+            raise
+        return c.conn
+
+    def adb_stream_init(self):
+        logger.hr('ADB stream init')
+        self.adb_stream_release()
+
+        # Header of raw screencap is 12 bytes before Android 12 and 16 bytes after,
+        # so just measure it once.
+        frame_size = self.adb_shell('screencap 2>/dev/null | wc -c')
+        try:
+            frame_size = int(frame_size)
+        except ValueError:
+            raise AdbStreamError(f'Unexpected screencap size: {frame_size}')
+        if frame_size < 500:
+            raise AdbStreamError(f'Unexpected screencap size: {frame_size}')
+
+        logger.info(f'Screencap frame size: {frame_size}')
+        conn = self.adb_exec(ScreencapStream.COMMAND)
+        self._adb_stream = ScreencapStream(conn, frame_size=frame_size)
+
+    def adb_stream_release(self):
+        if self._adb_stream is not None:
+            logger.info('Release ADB stream')
+            self._adb_stream.close()
+            self._adb_stream = None
+
+    @retry
+    def screenshot_adb_stream(self):
+        if self._adb_stream is None:
+            self.adb_stream_init()
+
+        data = self._adb_stream.receive()
+        header = np.frombuffer(data[0:12], dtype=np.uint32)
+        width, height, _ = header  # Usually to be 1280, 720, 1
+        if width * height * 4 > len(data):
+            raise AdbStreamError(f'Unexpected screencap header: {header}')
+
+        return load_screencap(data, ring=self.image_ring)
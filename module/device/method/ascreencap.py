@@ -115,7 +115,7 @@ class AScreenCap(Connection):
                 if len(byte_array) < 500:
                     logger.warning(f'Unexpected screenshot: {byte_array}')
                 raise AscreencapError(text)
-        return byte_array[self.__bytepointer:]
+        return memoryview(byte_array)[self.__bytepointer:]
 
     def __load_screenshot(self, screenshot, method):
         if method == 0:
@@ -149,9 +149,9 @@ class AScreenCap(Connection):
         # Equivalent to cv2.imdecode()
         shape = image.shape[0]
         image = image[shape - width * height * channel:].reshape(height, width, channel)
-        image = cv2.flip(image, 0)
 
-        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        # Image is upside down, flip and convert color in one pass, into a preallocated image
+        image = cv2.cvtColor(image[::-1], cv2.COLOR_BGR2RGB, dst=self.image_ring.get((height, width, channel)))
         return image
 
     def __process_screenshot(self, screenshot):
@@ -0,0 +1,152 @@
+import socket
+import subprocess
+import threading
+import uuid
+
+from adbutils import AdbTimeout
+from adbutils.errors import AdbError
+
+from module.logger import logger
+
+
+class ShellSession:
+    """
+    A long-lived `sh` on device, running commands one by one.
+
+    `adb shell <cmd>` opens a new ADB transport for every command, which costs more than small queries themselves,
+    like `input tap`, `getprop` and `dumpsys window windows`.
+    Here commands are written to the stdin of a shell opened once,
+    and output of each command is framed by a random sentinel echoed after it.
+
+    Commands run in a subshell with stdin from /dev/null,
+    so they can't change the state of session or consume the following commands.
+    On any error the session is closed, and opened again on the next command.
+    """
+
+    def __init__(self, adb):
+        """
+        Args:
+            adb (AdbDevice):
+        """
+        self.adb = adb
+        self.stream = None
+        self.lock = threading.Lock()
+
+    @property
+    def serial(self):
+        return self.adb.serial
+
+    def open(self):
+        if self.stream is None:
+            logger.info(f'Shell session open: {self.serial}')
+            self.stream = self.adb.shell('sh', stream=True)
+
+    def close(self):
+        if self.stream is not None:
+            logger.info(f'Shell session close: {self.serial}')
+            try:
+                self.stream.close()
+            except OSError:
+                pass
+            self.stream = None
+
+    def execute(self, cmd, timeout=10):
+        """
+        Args:
+            cmd (list, str):
+            timeout (int, float):
+
+        Returns:
+            str: Output of command, the same as `AdbDevice.shell(cmd, rstrip=False)`
+
+        Raises:
+            AdbTimeout: If no output in timeout.
+            AdbError: If session closed.
+        """
+        if isinstance(cmd, (list, tuple)):
+            cmd = subprocess.list2cmdline(list(map(str, cmd)))
+        sentinel = f'__ALAS_SHELL_{uuid.uuid4().hex}__'.encode()
+        script = f'(\n{cmd}\n) </dev/null; echo {sentinel.decode()}\n'.encode('utf-8')
+
+        with self.lock:
+            try:
+                self.open()
+                conn = self.stream.conn
+                conn.settimeout(timeout)
+                conn.sendall(script)
+                buffer = b''
+                while 1:
+                    chunk = conn.recv(4096)
+                    if not chunk:
+                        raise AdbError('closed')
+                    buffer += chunk
+                    # Sentinel may follow output without a line break
+                    index = buffer.find(sentinel, max(len(buffer) - len(chunk) - len(sentinel), 0))
+                    if index >= 0:
+                        return buffer[:index].decode('utf-8', errors='ignore')
+            except socket.timeout:
+                # Unknown state, output of this command may come later
+                self.close()
+                raise AdbTimeout('adb read timeout')
+            except (OSError, AdbError):
+                self.close()
+                raise
+
+
+class ShellSessionPool:
+    """
+    Shell sessions of each serial and each thread.
+
+    A session runs one command at a time, sharing it among threads would serialize them,
+    such as the screenshot pipeline waiting for a slow `dumpsys` from the main thread.
+    Sessions of finished threads are closed when a new session opens.
+    """
+
+    def __init__(self):
+        # Key: (serial, thread ident). Value: (ShellSession, threading.Thread)
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def get(self, adb):
+        """
+        Args:
+            adb (AdbDevice):
+
+        Returns:
+            ShellSession: Session of the current thread.
+        """
+        thread = threading.current_thread()
+        key = (adb.serial, thread.ident)
+        row = self.sessions.get(key)
+        if row is not None and row[1] is thread:
+            return row[0]
+
+        with self.lock:
+            dead = [k for k, (_, t) in self.sessions.items() if not t.is_alive()]
+            removed = [self.sessions.pop(k)[0] for k in dead]
+            session = ShellSession(adb)
+            self.sessions[key] = (session, thread)
+        # Thread ident may be reused by a new thread, close old sessions as well
+        if row is not None and row[0] not in removed:
+            removed.append(row[0])
+        for old in removed:
+            with old.lock:
+                old.close()
+        return session
+
+    def close(self, serial):
+        """
+        Close sessions of all threads.
+
+        Args:
+            serial (str):
+        """
+        with self.lock:
+            keys = [key for key in self.sessions if key[0] == serial]
+            removed = [self.sessions.pop(key)[0] for key in keys]
+        for session in removed:
+            with session.lock:
+                session.close()
+
+
+SHELL_SESSIONS = ShellSessionPool()
@@ -1,8 +1,10 @@
 import random
 import re
 import socket
+import sys
 import time
 
+import numpy as np
 import uiautomator2 as u2
 from adbutils import AdbTimeout, _AdbStreamConnection
 from lxml import etree
@@ -70,6 +72,50 @@ def recv_all(stream, chunk_size=4096, recv_interval=0.000) -> bytes:
         raise AdbTimeout('adb read timeout')
 
 
+class ImageRing:
+    """
+    A ring of preallocated images.
+    Screenshot methods decode frames into them with `dst=`, instead of allocating new arrays on every screenshot.
+
+    Images returned by screenshot methods are often kept, such as the ones in `screenshot_deque`,
+    drop records and crops of them. A buffer that is still referenced anywhere else will not be overwritten,
+    it's dropped from the ring and a new one is allocated.
+    So the ring should be larger than the number of images kept, see `Connection.image_ring`.
+    """
+
+    def __init__(self, size=3):
+        """
+        Args:
+            size (int): Number of buffers.
+        """
+        self.size = size
+        self.buffers = [None] * size
+        self.index = 0
+        # Number of buffers allocated
+        self.allocated = 0
+
+    def get(self, shape, dtype=np.uint8):
+        """
+        Args:
+            shape (tuple[int]):
+            dtype:
+
+        Returns:
+            np.ndarray: An uninitialized buffer.
+        """
+        self.index = (self.index + 1) % self.size
+        buffer = self.buffers[self.index]
+        # 3 references: `self.buffers`, local variable `buffer` and the argument of getrefcount()
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype or sys.getrefcount(buffer) > 3:
+            buffer = np.empty(shape, dtype=dtype)
+            self.buffers[self.index] = buffer
+            self.allocated += 1
+        return buffer
+
+    def release(self):
+        self.buffers = [None] * self.size
+
+
 def possible_reasons(*args):
     """
     Show possible reasons
@@ -0,0 +1,126 @@
+import threading
+import time
+
+from module.logger import logger
+
+
+class ScreenshotPipeline:
+    """
+    Capture screenshots in a background thread, so capturing the next frame overlaps with recognizing the current one.
+
+    The thread keeps a double buffer, the last completed frame is kept while the next one is being captured.
+    `get()` returns the freshest completed frame that was captured after a given time,
+    so callers never see frames taken before their last click.
+
+    The thread stops itself if no frames are requested for a while, such as waiting for the next task,
+    and starts again on the next request.
+    """
+    # Stop capturing if no frames requested in this interval, in seconds
+    IDLE_TIMEOUT = 3
+
+    def __init__(self, capture, interval):
+        """
+        Args:
+            capture (callable): Screenshot method, returns np.ndarray.
+            interval (Timer): Minimum interval between the start of 2 captures.
+        """
+        self.capture = capture
+        self.interval = interval
+        self.condition = threading.Condition()
+        self.thread = None
+        # Last completed frame, its ID and the time it started capturing
+        self.frame = None
+        self.frame_id = 0
+        self.frame_time = 0.
+        # ID of the last frame returned by get()
+        self.consumed_id = 0
+        self.request_time = 0.
+        self.error = None
+        self.stopped = False
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self):
+        with self.condition:
+            if self.running:
+                return
+            logger.info('Screenshot pipeline start')
+            self.stopped = False
+            self.error = None
+            self.request_time = time.time()
+            self.thread = threading.Thread(target=self._loop, name='ScreenshotPipeline', daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """
+        Stop the thread and drop the frames, wait until the current capture finished.
+        """
+        with self.condition:
+            thread = self.thread
+            if thread is None:
+                return
+            logger.info('Screenshot pipeline stop')
+            self.stopped = True
+            self.condition.notify_all()
+        if thread is not threading.current_thread():
+            thread.join()
+        with self.condition:
+            self.thread = None
+            self.frame = None
+
+    def _loop(self):
+        while 1:
+            with self.condition:
+                if self.stopped:
+                    return
+                if time.time() - self.request_time > self.IDLE_TIMEOUT:
+                    logger.info('Screenshot pipeline idle, stop')
+                    # Frame is outdated when requested next time
+                    self.thread = None
+                    self.frame = None
+                    return
+
+            self.interval.wait()
+            self.interval.reset()
+            start = time.time()
+            try:
+                image = self.capture()
+            except Exception as e:
+                # Including RequestHumanTakeover from retries of screenshot methods, raise it in get()
+                with self.condition:
+                    self.error = e
+                    self.thread = None
+                    self.condition.notify_all()
+                return
+
+            with self.condition:
+                if self.stopped:
+                    return
+                self.frame = image
+                self.frame_id += 1
+                self.frame_time = start
+                self.condition.notify_all()
+
+    def get(self, after=0.):
+        """
+        Args:
+            after (float): Timestamp. Frames should start capturing after it.
+
+        Returns:
+            np.ndarray: The freshest frame, never returns the same frame twice.
+        """
+        with self.condition:
+            self.request_time = time.time()
+            while 1:
+                if self.error is not None:
+                    error, self.error = self.error, None
+                    raise error
+                if self.frame is not None and self.frame_id > self.consumed_id and self.frame_time >= after:
+                    self.consumed_id = self.frame_id
+                    return self.frame
+                if not self.running:
+                    # Start or restart after idle, condition is re-entrant
+                    self.start()
+                self.condition.wait(timeout=1)
@@ -11,14 +11,16 @@ from module.base.decorator import cached_property
 from module.base.timer import Timer, timer
 from module.base.utils import get_color, image_size, limit_in, save_image
 from module.device.method.adb import Adb
+from module.device.method.adb_stream import AdbStream
 from module.device.method.ascreencap import AScreenCap
 from module.device.method.uiautomator_2 import Uiautomator2
 from module.device.method.wsa import WSA
+from module.device.pipeline import ScreenshotPipeline
 from module.exception import RequestHumanTakeover, ScriptError
 from module.logger import logger
 
 
-class Screenshot(Adb, WSA, Uiautomator2, AScreenCap):
+class Screenshot(Adb, AdbStream, WSA, Uiautomator2, AScreenCap):
     _screen_size_checked = False
     _screen_black_checked = False
     _minicap_uninstalled = False
@@ -26,11 +28,42 @@ class Screenshot(Adb, WSA, Uiautomator2, AScreenCap):
     _last_save_time = {}
     image: np.ndarray
 
+    # Frame change detection.
+    # Screenshots are downsampled 8 times and compared in tiles of 80x80 pixels,
+    # each tile is compared with itself at the last time it changed, so slow fading accumulates.
+    # A tile is considered changed if any channel of any downsampled pixel differs more than the threshold.
+    SCREEN_TILE = 80
+    SCREEN_DOWNSAMPLE = 8
+    SCREEN_CHANGE_THRESHOLD = 3
+    # Wait longer between screenshots in idle waits if screen stays static for a few frames,
+    # such as loading screens and auto battles. See `screenshot_backoff()`.
+    SCREEN_STATIC_COUNT = 5
+    SCREEN_STATIC_BACKOFF = 0.3
+    # Frame ID increases on every screenshot
+    frame_id = 0
+    # If current screenshot is the same as the previous one
+    screen_unchanged = False
+    # Number of continuous unchanged screenshots
+    screen_static_count = 0
+    # np.ndarray: bool array in shape of (9, 16), if a tile changed in current screenshot
+    screen_changed_tiles = None
+    _frame_image = None
+    # np.ndarray: Downsampled screenshot, each tile is the one at the last time it changed
+    _frame_reference = None
+    # np.ndarray: int array in shape of (9, 16), the last frame ID each tile changed
+    _frame_tile_changed_at = None
+    _frame_cache = None
+    frame_cache_hit = 0
+    frame_cache_miss = 0
+    # Screenshots should start capturing after this timestamp, updated after every control.
+    screenshot_valid_after = 0.
+
     @cached_property
     def screenshot_methods(self):
         return {
             'ADB': self.screenshot_adb,
             'ADB_nc': self.screenshot_adb_nc,
+            'ADB_stream': self.screenshot_adb_stream,
             'uiautomator2': self.screenshot_uiautomator2,
             'aScreenCap': self.screenshot_ascreencap,
             'aScreenCap_nc': self.screenshot_ascreencap_nc,
@@ -42,15 +75,18 @@ class Screenshot(Adb, WSA, Uiautomator2, AScreenCap):
         Returns:
             np.ndarray:
         """
-        self._screenshot_interval.wait()
-        self._screenshot_interval.reset()
+        # Interval between captures is handled in pipeline
+        pipeline = self.config.Emulator_ScreenshotPipeline
+        if not pipeline:
+            self._screenshot_interval.wait()
+            self._screenshot_interval.reset()
 
         for _ in range(2):
-            method = self.screenshot_methods.get(
-                self.config.Emulator_ScreenshotMethod,
-                self.screenshot_adb
-            )
-            self.image = method()
+            if pipeline:
+                self.image = self.screenshot_pipeline.get(after=self.screenshot_valid_after)
+            else:
+                self.screenshot_pipeline_stop()
+                self.image = self.screenshot_capture()
 
             if self.config.Emulator_ScreenshotDedithering:
                 # This will take 40-60ms
@@ -65,8 +101,161 @@ class Screenshot(Adb, WSA, Uiautomator2, AScreenCap):
             else:
                 continue
 
+        self.frame_update()
         return self.image
 
+    def screenshot_backoff(self):
+        """
+        Sleep a while if screen stays static for a few frames.
+        Call this before taking screenshots in explicit idle waits only,
+        general screenshot loops are not slowed down.
+        """
+        if self.screen_static_count >= self.SCREEN_STATIC_COUNT:
+            self.sleep(self.SCREEN_STATIC_BACKOFF)
+
+    def screenshot_capture(self):
+        """
+        Take a screenshot using the current screenshot method.
+
+        Returns:
+            np.ndarray:
+        """
+        method = self.screenshot_methods.get(
+            self.config.Emulator_ScreenshotMethod,
+            self.screenshot_adb
+        )
+        return method()
+
+    @cached_property
+    def screenshot_pipeline(self):
+        return ScreenshotPipeline(capture=self.screenshot_capture, interval=self._screenshot_interval)
+
+    def screenshot_pipeline_stop(self):
+        if 'screenshot_pipeline' in self.__dict__:
+            self.screenshot_pipeline.stop()
+
+    def frame_update(self):
+        """
+        Compare current screenshot with the reference, update changed tiles.
+        Takes about 1-2ms.
+        """
+        self.frame_id += 1
+        self._frame_image = self.image
+        width, height = image_size(self.image)
+        size = (width // self.SCREEN_DOWNSAMPLE, height // self.SCREEN_DOWNSAMPLE)
+        thumbnail = cv2.resize(self.image, size, interpolation=cv2.INTER_AREA)
+        reference = self._frame_reference
+
+        tile = self.SCREEN_TILE // self.SCREEN_DOWNSAMPLE
+        shape = (size[1] // tile, size[0] // tile)
+        if reference is None or reference.shape != thumbnail.shape or self._frame_tile_changed_at is None \
+                or self._frame_tile_changed_at.shape != shape:
+            self.screen_changed_tiles = np.ones(shape, dtype=bool)
+            self._frame_reference = thumbnail
+        else:
+            diff = cv2.absdiff(thumbnail, reference)
+            if diff.ndim == 3:
+                diff = np.max(diff, axis=2)
+            diff = diff[:shape[0] * tile, :shape[1] * tile].reshape(shape[0], tile, shape[1], tile)
+            self.screen_changed_tiles = np.max(diff, axis=(1, 3)) > self.SCREEN_CHANGE_THRESHOLD
+            # Unchanged tiles keep the old reference, so changes below threshold in each frame are not missed
+            changed = self.screen_changed_tiles
+            self._frame_tiles(reference, tile, shape)[changed] = self._frame_tiles(thumbnail, tile, shape)[changed]
+
+        if self._frame_tile_changed_at is None or self._frame_tile_changed_at.shape != shape:
+            self._frame_tile_changed_at = np.zeros(shape, dtype=np.int64)
+        self._frame_tile_changed_at[self.screen_changed_tiles] = self.frame_id
+
+        self.screen_unchanged = not np.any(self.screen_changed_tiles)
+        if self.screen_unchanged:
+            self.screen_static_count += 1
+        else:
+            self.screen_static_count = 0
+        if self._frame_cache is None or len(self._frame_cache) > 1000:
+            self._frame_cache = {}
+
+    @staticmethod
+    def _frame_tiles(image, tile, shape):
+        """
+        Args:
+            image (np.ndarray): Downsampled screenshot.
+            tile (int): Tile size on image.
+            shape (tuple[int]): Number of tiles, (rows, columns).
+
+        Returns:
+            np.ndarray: A view of image in shape of (rows, columns, tile, tile, ...)
+        """
+        view = image[:shape[0] * tile, :shape[1] * tile]
+        return view.reshape(shape[0], tile, shape[1], tile, *image.shape[2:]).swapaxes(1, 2)
+
+    @property
+    def screen_changed_areas(self):
+        """
+        Returns:
+            list[tuple[int]]: Areas of tiles changed in current screenshot.
+        """
+        if self.screen_changed_tiles is None:
+            return []
+        t = self.SCREEN_TILE
+        ys, xs = np.where(self.screen_changed_tiles)
+        return [(x * t, y * t, x * t + t, y * t + t) for y, x in zip(ys.tolist(), xs.tolist())]
+
+    def screen_changed_since(self, area, frame_id):
+        """
+        Args:
+            area (tuple[int]):
+            frame_id (int):
+
+        Returns:
+            bool: If any pixels in area changed after the given frame.
+        """
+        if self._frame_tile_changed_at is None or self.image is not self._frame_image:
+            return True
+        t = self.SCREEN_TILE
+        x1, y1, x2, y2 = [int(v) for v in area]
+        height, width = self._frame_tile_changed_at.shape
+        x1, y1 = max(x1 // t, 0), max(y1 // t, 0)
+        x2, y2 = min((x2 - 1) // t + 1, width), min((y2 - 1) // t + 1, height)
+        if x1 >= x2 or y1 >= y2:
+            return True
+        return bool(np.max(self._frame_tile_changed_at[y1:y2, x1:x2]) > frame_id)
+
+    def frame_cache_get(self, key, area):
+        """
+        Get a recognition result on an area, if the area didn't change since the result was calculated.
+
+        Args:
+            key: Hashable.
+            area (tuple[int]): Area that result depends on.
+
+        Returns:
+            Cached result, or None if not cached or expired.
+        """
+        try:
+            cached = self._frame_cache.get(key, None)
+        except (AttributeError, TypeError):
+            # Not initialized or key is unhashable
+            cached = None
+        if cached is not None:
+            frame_id, result = cached
+            if not self.screen_changed_since(area, frame_id):
+                self.frame_cache_hit += 1
+                return result
+        self.frame_cache_miss += 1
+        return None
+
+    def frame_cache_set(self, key, result):
+        """
+        Args:
+            key: Hashable.
+            result: Anything but None.
+        """
+        if self.image is self._frame_image:
+            try:
+                self._frame_cache[key] = (self.frame_id, result)
+            except TypeError:
+                pass
+
     def _handle_orientated_image(self, image):
         """
         Args:
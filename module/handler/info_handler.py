@@ -34,11 +34,12 @@ class InfoHandler(ModuleBase):
     """
 
     def info_bar_count(self):
-        if self.appear(INFO_BAR_3):
+        appear = self.appear_any([INFO_BAR_3, INFO_BAR_2, INFO_BAR_1], first=True)
+        if INFO_BAR_3 in appear:
             return 3
-        elif self.appear(INFO_BAR_2):
+        elif INFO_BAR_2 in appear:
             return 2
-        elif self.appear(INFO_BAR_1):
+        elif INFO_BAR_1 in appear:
             return 1
         else:
             return 0
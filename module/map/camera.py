@@ -49,6 +49,7 @@ class Camera(MapOperation):
             else:
                 whitelist, blacklist = None, None
 
+            self.view.detector_track(vector)
             vector = distance * vector
             vector = -vector
             self.device.swipe_vector(vector, name=name, box=box, whitelist_area=whitelist, blacklist_area=blacklist)
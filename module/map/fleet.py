@@ -1,5 +1,3 @@
-import itertools
-
 import numpy as np
 
 from module.base.timer import Timer
@@ -973,30 +971,19 @@ class Fleet(Camera, AmbushHandler):
             backup = None
 
         if grid.is_accessible:
-            if backup is not None:
-                self.fleet_current_index = backup
-                self.find_path_initial()
-            return SelectedGrids([])
-
-        enemies = self.map.select(is_enemy=True)
-        logger.info(f'Potential enemy roadblocks: {enemies}')
-        for repeat in range(1, enemies.count + 1):
-            for select in itertools.product(enemies, repeat=repeat):
-                for block in select:
-                    block.is_enemy = False
-                self.find_path_initial()
-                for block in select:
-                    block.is_enemy = True
-
-                if grid.is_accessible:
-                    select = SelectedGrids(list(select))
-                    logger.info(f'Enemy roadblock: {select}')
-                    if backup is not None:
-                        self.fleet_current_index = backup
-                        self.find_path_initial()
-                    return select
-
-        logger.warning('Enemy roadblock try exhausted.')
+            select = SelectedGrids([])
+        else:
+            logger.info(f'Potential enemy roadblocks: {self.map.select(is_enemy=True)}')
+            select = self.map.find_roadblocks(self.fleet_current, grid.location)
+            if select is None:
+                logger.warning('Enemy roadblock try exhausted.')
+            else:
+                logger.info(f'Enemy roadblock: {select}')
+
+        if backup is not None:
+            self.fleet_current_index = backup
+            self.find_path_initial()
+        return select
 
     def catch_camera_repositioning(self, destination):
         """
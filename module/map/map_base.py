@@ -1,8 +1,11 @@
+import collections
 import copy
 
 from module.base.utils import location2node, node2location
 from module.logger import logger
-from module.map.map_grids import SelectedGrids
+from module.map.map_graph import MapGraph
+from module.map.map_grids import GridIndex, SelectedGrids
+from module.map.map_store import GridStore
 from module.map.utils import *
 from module.map_detection.grid_info import GridInfo
 
@@ -34,6 +37,9 @@ class CampaignMap:
         self.poor_map_data = False
         self.camera_sight = (-3, -1, 3, 2)
         self.grid_connection = {}
+        self.graph = None
+        self._grid_store = None
+        self._grid_index = None
 
     def __iter__(self):
         return iter(self.grids.values())
@@ -297,6 +303,7 @@ class CampaignMap:
                 self[start].is_portal = False
                 self[start].portal_link = None
 
+        self.graph = MapGraph(self, self.grid_connection)
         return True
 
     def show(self):
@@ -317,6 +324,10 @@ class CampaignMap:
         offset = np.array(camera) - np.array(grids.center_loca)
         # grids.show()
 
+        store = self.grid_store
+        if all(cls.merge is GridInfo.merge for cls in store.classes):
+            return self._update_vectorized(grids, offset, mode=mode)
+
         failed_count = 0
         for grid in grids.grids.values():
             loca = tuple(offset + grid.location)
@@ -339,6 +350,40 @@ class CampaignMap:
             logger.warning('Too many wrong prediction')
             return False
 
+    def _update_vectorized(self, grids, offset, mode='normal'):
+        """
+        Same as `update()`, but merging all grids in batch with `GridStore.merge()`.
+
+        Args:
+            grids:
+            offset (np.ndarray):
+            mode (str): Scan mode, such as 'normal', 'carrier', 'movable'
+        """
+        store = self.grid_store
+        ox, oy = offset.tolist()
+        info, positions = [], []
+        for grid in grids.grids.values():
+            x, y = grid.location
+            loca = (x + ox, y + oy)
+            if loca in self.grids:
+                if self.ignore_prediction_match(globe=loca, local=grid):
+                    continue
+                info.append(grid)
+                positions.append(self.grids[loca].grid_position)
+        positions = np.array(positions, dtype=int)
+        data = store.gather(info)
+
+        success = store.merge(positions, data, mode=mode, dry_run=True)
+        for index in np.flatnonzero(~success):
+            logger.warning(f"Wrong Prediction. {store.grids[positions[index]]} = '{info[index].str}'")
+
+        if np.sum(~success) < 2:
+            store.merge(positions, data, mode=mode)
+            return True
+        else:
+            logger.warning('Too many wrong prediction')
+            return False
+
     def reset(self):
         for grid in self:
             grid.reset()
@@ -516,36 +561,9 @@ class CampaignMap:
             has_enemy (bool): False if only sea and land are considered
         """
         location = location_ensure(location)
-        ambush_cost = 10 if has_ambush else 1
-        for grid in self:
-            grid.cost = 9999
-            grid.connection = None
-        start = self[location]
-        start.cost = 0
-        visited = [start]
-        visited = set(visited)
-
-        while 1:
-            new = visited.copy()
-            for grid in visited:
-                for arr in self.grid_connection[grid.location]:
-                    arr = self[arr]
-                    if arr.is_land or arr.is_mechanism_block:
-                        continue
-                    cost = ambush_cost if arr.may_ambush else 1
-                    cost += grid.cost
-
-                    if cost < arr.cost:
-                        arr.cost = cost
-                        arr.connection = grid.location
-                    elif cost == arr.cost:
-                        if abs(arr.location[0] - grid.location[0]) == 1:
-                            arr.connection = grid.location
-                    if arr.is_sea or not has_enemy:
-                        new.add(arr)
-            if len(new) == len(visited):
-                break
-            visited = new
+        if self.graph is None:
+            self.graph = MapGraph(self, self.grid_connection)
+        self.graph.find_path_initial(location, has_ambush=has_ambush, has_enemy=has_enemy)
 
         # self.show_cost()
         # self.show_connection()
@@ -557,14 +575,64 @@ class CampaignMap:
             current (tuple): Current location.
             has_ambush (bool): MAP_HAS_AMBUSH
         """
+        if self.graph is None:
+            self.graph = MapGraph(self, self.grid_connection)
         location_dict = sorted(location_dict.items(), key=lambda kv: (int(kv[1] == current),))
         for fleet, location in location_dict:
             if location == ():
                 continue
-            self.find_path_initial(location, has_ambush=has_ambush)
-            attr = f'cost_{fleet}'
-            for grid in self:
-                grid.__setattr__(attr, grid.cost)
+            self.graph.find_path_initial(location, has_ambush=has_ambush)
+            self.graph.set_cost(f'cost_{fleet}')
+
+    def find_roadblocks(self, start, location):
+        """
+        Find the least enemies to clear, so that a grid becomes accessible.
+        This is a 0-1 BFS on the same graph as `find_path_initial()`,
+        passing through sea costs 0 and passing through an enemy costs 1.
+
+        Args:
+            start (tuple): Fleet location.
+            location (tuple): Destination.
+
+        Returns:
+            SelectedGrids: Enemies to clear, from start to destination. Empty if already accessible.
+                None if not accessible even if all enemies cleared.
+        """
+        start = location_ensure(start)
+        location = location_ensure(location)
+
+        def passable(grid):
+            # Same as `is_sea` after setting is_enemy=False
+            return not (grid.is_land or grid.is_siren or grid.is_fortress or grid.is_boss)
+
+        dist = {start: 0}
+        parent = {start: None}
+        queue = collections.deque([start])
+        while queue:
+            loca = queue.popleft()
+            for arr in self.grid_connection[loca]:
+                if arr in dist:
+                    continue
+                grid = self[arr]
+                if grid.is_land or grid.is_mechanism_block:
+                    continue
+                if arr == location:
+                    # Destination is accessible once reached, no need to pass through
+                    route = []
+                    while loca is not None:
+                        route.append(loca)
+                        loca = parent[loca]
+                    return SelectedGrids([self[loca] for loca in route[::-1] if self[loca].is_enemy and loca != start])
+                if grid.is_sea:
+                    dist[arr] = dist[loca]
+                    parent[arr] = loca
+                    queue.appendleft(arr)
+                elif grid.is_enemy and passable(grid):
+                    dist[arr] = dist[loca] + 1
+                    parent[arr] = loca
+                    queue.append(arr)
+
+        return None
 
     def _find_path(self, location):
         """
@@ -764,6 +832,27 @@ class CampaignMap:
                     logger.info('Predict %s to be enemy' % location2node(upper.location))
                     upper.__setattr__('is_enemy', True)
 
+    @property
+    def grid_store(self):
+        """
+        Returns:
+            GridStore: Status of grids, re-created if grids changed.
+        """
+        if self._grid_store is None or self._grid_store.is_outdated(self.grids):
+            self._grid_store = GridStore(self.grids)
+        return self._grid_store
+
+    @property
+    def grid_index(self):
+        """
+        Returns:
+            GridIndex: Attribute indexes of grids, re-created if grids changed.
+        """
+        store = self.grid_store
+        if self._grid_index is None or self._grid_index.is_outdated(self.grids) or self._grid_index.store is not store:
+            self._grid_index = GridIndex(self.grids, store=store)
+        return self._grid_index
+
     def select(self, **kwargs):
         """
         Args:
@@ -772,16 +861,15 @@ class CampaignMap:
         Returns:
             SelectedGrids:
         """
-        result = []
-        for grid in self:
-            flag = True
-            for k, v in kwargs.items():
-                if grid.__getattribute__(k) != v:
-                    flag = False
-            if flag:
-                result.append(grid)
-
-        return SelectedGrids(result)
+        index = self.grid_index
+        mask, kwargs = index.select(kwargs, strict=False)
+        result = index.to_grids(mask)
+        if kwargs:
+            result = [grid for grid in result
+                      if not any(grid.__getattribute__(k) != v for k, v in kwargs.items())]
+            mask = index.to_mask(result)
+
+        return SelectedGrids(result, index=index, mask=mask)
 
     def to_selected(self, grids):
         """
@@ -0,0 +1,162 @@
+import heapq
+
+import numpy as np
+
+# Cost of inaccessible grids, same as GridInfo.cost
+COST_INF = 9999
+
+
+class MapGraph:
+    """
+    Array representation of a CampaignMap, for path finding.
+
+    Grids are indexed in the order of `CampaignMap.grids`.
+    Results of path finding are stored in arrays,
+    and copied to attributes `cost`, `connection`, `cost_{fleet}` of grids once solved,
+    so grids and their copies keep the results they were solved with.
+    """
+
+    def __init__(self, grids, grid_connection):
+        """
+        Args:
+            grids (list[GridInfo]):
+            grid_connection (dict): Key: location, value: set of locations.
+        """
+        self.grids = list(grids)
+        self.locations = [grid.location for grid in self.grids]
+        self.index = {location: index for index, location in enumerate(self.locations)}
+        count = len(self.grids)
+
+        # Neighbour index arrays, shape (n, max_degree), padded with -1
+        # Connections are directed, portals link one way
+        incoming = {location: [] for location in self.locations}
+        for location in self.locations:
+            for arr in sorted(grid_connection.get(location, ())):
+                incoming[arr].append(location)
+        self.neighbour = self._index_array([sorted(grid_connection.get(loca, ())) for loca in self.locations])
+        self.incoming = self._index_array([incoming[loca] for loca in self.locations])
+        # Horizontal links are preferred in routes
+        x = np.array([location[0] for location in self.locations])
+        self.incoming_horizontal = (self.incoming >= 0) & (np.abs(x[np.maximum(self.incoming, 0)] - x[:, None]) == 1)
+
+        # Key: attribute name, value: np.ndarray
+        self.values = {
+            'cost': np.full(count, COST_INF, dtype=np.int32),
+            'connection': np.full(count, -1, dtype=np.int32),
+        }
+
+    def _index_array(self, rows):
+        """
+        Args:
+            rows (list[list[tuple]]): Locations
+
+        Returns:
+            np.ndarray: Indexes, shape (n, max_length), padded with -1
+        """
+        length = max([len(row) for row in rows] + [1])
+        array = np.full((len(rows), length), -1, dtype=np.int32)
+        for index, row in enumerate(rows):
+            for slot, location in enumerate(row):
+                array[index, slot] = self.index[location]
+        return array
+
+    def masks(self, has_enemy=True):
+        """
+        Bitmasks of current grid status.
+
+        Args:
+            has_enemy (bool): False if only sea and land are considered
+
+        Returns:
+            np.ndarray: blocked, grids can't be reached.
+            np.ndarray: sea, grids can be passed through.
+            np.ndarray: ambush, grids may have ambush.
+        """
+        blocked = np.array([grid.is_land or grid.is_mechanism_block for grid in self.grids])
+        if has_enemy:
+            sea = np.array([grid.is_sea for grid in self.grids])
+        else:
+            sea = np.ones(len(self.grids), dtype=bool)
+        ambush = np.array([grid.may_ambush for grid in self.grids])
+        return blocked, sea, ambush
+
+    def dijkstra(self, source, ambush_cost=1, has_enemy=True):
+        """
+        Heap based Dijkstra, on the same graph as the old `CampaignMap.find_path_initial()`.
+        Entering a grid costs `ambush_cost` if it may have ambush, else 1.
+        Blocked grids are never reached, non-sea grids are reached but not passed through.
+
+        Args:
+            source (int): Index of start grid.
+            ambush_cost (int):
+            has_enemy (bool):
+
+        Returns:
+            np.ndarray: Cost of each grid, COST_INF if inaccessible.
+            np.ndarray: Index of the previous grid in route, -1 for none.
+        """
+        blocked, sea, ambush = self.masks(has_enemy=has_enemy)
+        weight = np.where(ambush, ambush_cost, 1)
+        neighbour = self.neighbour.tolist()
+        weight_list = weight.tolist()
+        blocked_list = blocked.tolist()
+        sea_list = sea.tolist()
+
+        cost = [COST_INF] * len(self.grids)
+        cost[source] = 0
+        heap = [(0, source)]
+        while heap:
+            current, index = heapq.heappop(heap)
+            if current > cost[index]:
+                continue
+            if index != source and not sea_list[index]:
+                continue
+            for arr in neighbour[index]:
+                if arr < 0 or blocked_list[arr]:
+                    continue
+                new = current + weight_list[arr]
+                if new < cost[arr]:
+                    cost[arr] = new
+                    heapq.heappush(heap, (new, arr))
+        cost = np.array(cost, dtype=np.int32)
+
+        # Predecessors, grids that the route comes from, horizontal ones first
+        expanded = sea & (cost < COST_INF)
+        expanded[source] = True
+        prev = np.maximum(self.incoming, 0)
+        candidate = (self.incoming >= 0) & expanded[prev] & (cost[prev] + weight[:, None] == cost[:, None])
+        candidate[source] = False
+        priority = candidate * (1 + self.incoming_horizontal)
+        slot = np.argmax(priority, axis=1)
+        row = np.arange(len(slot))
+        predecessor = np.where(priority[row, slot] > 0, self.incoming[row, slot], -1)
+        return cost, predecessor.astype(np.int32)
+
+    def find_path_initial(self, location, has_ambush=True, has_enemy=True):
+        """
+        Set `cost` and `connection` of all grids.
+
+        Args:
+            location (tuple): Start location.
+            has_ambush (bool): MAP_HAS_AMBUSH
+            has_enemy (bool): False if only sea and land are considered
+        """
+        cost, predecessor = self.dijkstra(
+            self.index[location], ambush_cost=10 if has_ambush else 1, has_enemy=has_enemy)
+        self.values['cost'] = cost
+        self.values['connection'] = predecessor
+
+        locations = self.locations
+        for grid, value, index in zip(self.grids, cost.tolist(), predecessor.tolist()):
+            grid.cost = value
+            grid.connection = locations[index] if index >= 0 else None
+
+    def set_cost(self, attr):
+        """
+        Copy cost of the last `find_path_initial()` to an attribute of all grids.
+
+        Args:
+            attr (str): Such as `cost_1`, `cost_2`
+        """
+        for grid, value in zip(self.grids, self.values['cost'].tolist()):
+            grid.__setattr__(attr, value)
@@ -1,11 +1,196 @@
+import collections
 import operator
-import typing as t
+
+from module.logger import logger
+from module.map.map_store import GridStatus
+
+
+class GridIndex:
+    """
+    Bitset indexes of grid attributes, to make `select()` a set intersection.
+
+    An attribute is indexed the first time it's selected, then kept updated by `GridStatus`.
+    Attributes in GridStore are matched on its columns directly.
+    Other attributes, like `is_sea` and `is_accessible`, are not tracked and still checked grid by grid.
+    """
+
+    def __init__(self, grids, store=None):
+        """
+        Args:
+            grids (dict): Key: location, value: GridInfo
+            store (GridStore): Status store of the same grids.
+        """
+        self.source = grids
+        self.store = store
+        self.grids = list(grids.values())
+        self.count = len(self.grids)
+        self.full = (1 << self.count) - 1
+        # Key: attribute name, value: dict or None if not indexable.
+        # In dict, key: (type(value), value), value: int, bitset of grids.
+        self.indexes = {}
+        # Key: attribute name, value: times used.
+        self.hit = collections.Counter()
+        self.miss = collections.Counter()
+
+        for position, grid in enumerate(self.grids):
+            grid.grid_index = self
+            grid.grid_position = position
+
+    def is_outdated(self, grids):
+        """
+        Args:
+            grids (dict): Key: location, value: GridInfo
+
+        Returns:
+            bool: If grids changed since this index created.
+        """
+        return grids is not self.source or len(grids) != self.count
+
+    def _create(self, attr):
+        """
+        Returns:
+            dict: Or None if not indexable.
+        """
+        if not self.grids:
+            return None
+        for cls in type(self.grids[0]).__mro__:
+            if attr in cls.__dict__:
+                if not isinstance(cls.__dict__[attr], GridStatus):
+                    # Writes are not tracked
+                    return None
+                break
+        else:
+            return None
+        table = {}
+        try:
+            for position, grid in enumerate(self.grids):
+                value = grid.__getattribute__(attr)
+                key = (type(value), value)
+                table[key] = table.get(key, 0) | (1 << position)
+        except (AttributeError, TypeError):
+            # Missing or unhashable values
+            return None
+        return table
+
+    def update(self, grid, attr, old, new):
+        """
+        Move grid from the bitset of old value to new value. Called before the attribute is set.
+
+        Args:
+            grid (GridInfo):
+            attr (str):
+            old: Current value.
+            new: Value to set.
+        """
+        table = self.indexes.get(attr)
+        if table is None:
+            return
+        position = grid.grid_position
+        if self.grids[position] is not grid:
+            # Copies of grids share the same index, but they are not in it.
+            return
+        bit = 1 << position
+        try:
+            old, new = (type(old), old), (type(new), new)
+            if old == new:
+                return
+            remain = table[old] & ~bit
+            if remain:
+                table[old] = remain
+            else:
+                del table[old]
+            table[new] = table.get(new, 0) | bit
+        except (KeyError, TypeError, ValueError):
+            # Unhashable or uncomparable values, stop indexing it
+            self.indexes[attr] = None
+
+    def select(self, kwargs, mask=None, strict=True):
+        """
+        Args:
+            kwargs (dict): Attributes of Grid.
+            mask (int): Bitset of grids to select from, None for all.
+            strict (bool): True to match types of values, like `SelectedGrids.select()`.
+                False to match values only, like `CampaignMap.select()`.
+
+        Returns:
+            int: Bitset of grids matching all indexed attributes.
+            dict: Attributes that are not indexed, should be checked grid by grid.
+        """
+        mask = self.full if mask is None else mask
+        rest = {}
+        store = self.store
+        for attr, value in kwargs.items():
+            if store is not None and attr in store.columns:
+                self.hit[attr] += 1
+                mask &= store.match(attr, value, strict=strict)
+                continue
+            if attr not in self.indexes:
+                self.indexes[attr] = self._create(attr)
+            table = self.indexes[attr]
+            if table is None:
+                self.miss[attr] += 1
+                rest[attr] = value
+                continue
+            if strict:
+                try:
+                    bits = table.get((type(value), value), 0)
+                except TypeError:
+                    self.miss[attr] += 1
+                    rest[attr] = value
+                    continue
+            else:
+                bits = 0
+                for (_, v), b in table.items():
+                    if not v != value:
+                        bits |= b
+            self.hit[attr] += 1
+            mask &= bits
+        return mask, rest
+
+    def to_grids(self, mask):
+        """
+        Args:
+            mask (int): Bitset of grids.
+
+        Returns:
+            list[GridInfo]: In the order of map.
+        """
+        grids = []
+        while mask:
+            low = mask & -mask
+            grids.append(self.grids[low.bit_length() - 1])
+            mask ^= low
+        return grids
+
+    def to_mask(self, grids):
+        """
+        Args:
+            grids (list[GridInfo]): Grids of this index.
+
+        Returns:
+            int: Bitset of grids.
+        """
+        mask = 0
+        for grid in grids:
+            mask |= 1 << grid.grid_position
+        return mask
+
+    def show(self):
+        for attr in sorted(set(self.hit) | set(self.miss)):
+            logger.attr(attr, f'hit {self.hit[attr]}, miss {self.miss[attr]}')
 
 
 class SelectedGrids:
-    def __init__(self, grids):
+    def __init__(self, grids, index=None, mask=None):
+        """
+        Args:
+            grids (list[GridInfo]):
+            index (GridIndex): Index of map, if grids are selected from it.
+            mask (int): Bitset of grids in index.
+        """
         self.grids = grids
-        self.indexes: t.Dict[tuple, SelectedGrids] = {}
+        self.index = index
+        self.mask = mask
 
     def __iter__(self):
         return iter(self.grids)
@@ -80,24 +265,15 @@ class SelectedGrids:
                     flag = False
             return flag
 
-        return SelectedGrids([grid for grid in self.grids if matched(grid)])
+        if self.index is not None:
+            mask, kwargs = self.index.select(kwargs, mask=self.mask, strict=True)
+            grids = self.index.to_grids(mask)
+            if kwargs:
+                grids = [grid for grid in grids if matched(grid)]
+                mask = self.index.to_mask(grids)
+            return SelectedGrids(grids, index=self.index, mask=mask)
 
-    def create_index(self, *attrs):
-        indexes = {}
-        # index_keys = [(grid.__getattribute__(attr) for attr in attrs) for grid in self.grids]
-        for grid in self.grids:
-            k = tuple(grid.__getattribute__(attr) for attr in attrs)
-            try:
-                indexes[k].append(grid)
-            except KeyError:
-                indexes[k] = [grid]
-
-        indexes = {k: SelectedGrids(v) for k, v in indexes.items()}
-        self.indexes = indexes
-        return indexes
-
-    def indexed_select(self, *values):
-        return self.indexes.get(values, SelectedGrids([]))
+        return SelectedGrids([grid for grid in self.grids if matched(grid)])
 
     def filter(self, func):
         """
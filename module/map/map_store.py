@@ -0,0 +1,289 @@
+import numpy as np
+
+# Status of GridInfo in GridStore. Key: attribute name, value: dtype
+STORE_FIELDS = {
+    'is_land': bool,
+    'is_spawn_point': bool,
+    'is_submarine_spawn_point': bool,
+    'may_enemy': bool,
+    'may_boss': bool,
+    'may_mystery': bool,
+    'may_ammo': bool,
+    'may_siren': bool,
+    'may_ambush': bool,
+    'is_enemy': bool,
+    'is_boss': bool,
+    'is_mystery': bool,
+    'is_ammo': bool,
+    'is_fleet': bool,
+    'is_current_fleet': bool,
+    'is_submarine': bool,
+    'is_siren': bool,
+    'is_portal': bool,
+    'is_maze': bool,
+    'enemy_scale': np.int8,
+    'enemy_genre': object,
+    'is_cleared': bool,
+    'is_caught_by_siren': bool,
+    'is_carrier': bool,
+    'is_movable': bool,
+    'is_mechanism_trigger': bool,
+    'is_mechanism_block': bool,
+    'is_fortress': bool,
+    'is_flare': bool,
+    'is_missile_attack': bool,
+    'may_bouncing_enemy': bool,
+}
+# Attributes of info grids that `GridStore.merge()` reads
+MERGE_INFO = {
+    'is_submarine': bool,
+    'is_caught_by_siren': bool,
+    'is_fleet': bool,
+    'is_current_fleet': bool,
+    'is_boss': bool,
+    'is_siren': bool,
+    'is_enemy': bool,
+    'is_mystery': bool,
+    'is_ammo': bool,
+    'is_missile_attack': bool,
+    'enemy_scale': np.int8,
+    'enemy_genre': object,
+}
+
+# Status of map grids that `GridStore.merge()` reads
+MERGE_STATUS = [
+    'is_land', 'is_enemy', 'is_siren', 'is_fortress', 'is_boss', 'is_movable', 'is_carrier',
+    'is_submarine_spawn_point', 'may_enemy', 'may_boss', 'may_siren', 'may_mystery', 'may_ammo', 'enemy_scale',
+    'enemy_genre',
+]
+
+
+class GridStatus:
+    """
+    Descriptor of grid attributes in STORE_FIELDS, mirrors writes into GridStore and GridIndex of the grid.
+
+    It defines `__set__` only, values are kept in the instance `__dict__` and read as plain attributes.
+    Defaults are copied into instances by `GridInfo.__init__()`.
+    Writing other attributes of grids costs nothing more.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __set__(self, instance, value):
+        name = self.name
+        store = instance.grid_store
+        if store is not None:
+            store.update(instance, name, value)
+        index = instance.grid_index
+        if index is not None:
+            index.update(instance, name, instance.__dict__[name], value)
+        instance.__dict__[name] = value
+
+
+def install_grid_status(cls):
+    """
+    Replace class attributes in STORE_FIELDS with GridStatus, and collect their defaults.
+
+    Args:
+        cls: Subclass of GridInfo.
+    """
+    default = dict(getattr(cls, 'status_default', {}))
+    for name in STORE_FIELDS:
+        value = cls.__dict__.get(name, None)
+        if name in cls.__dict__ and not isinstance(value, GridStatus):
+            default[name] = value
+            setattr(cls, name, GridStatus(name))
+    cls.status_default = default
+
+
+class GridStore:
+    """
+    Structured array of grid status in a map, for operations on all grids at once.
+
+    Grids keep their status as attributes, which are fast to read one by one,
+    `GridStatus` mirrors writes into the array.
+    Batch operations like `merge()` write both the array and the changed grids.
+    """
+
+    def __init__(self, grids):
+        """
+        Args:
+            grids (dict): Key: location, value: GridInfo
+        """
+        self.source = grids
+        self.grids = list(grids.values())
+        self.count = len(self.grids)
+        self.classes = set(type(grid) for grid in self.grids)
+        self.data = np.zeros(self.count, dtype=list(STORE_FIELDS.items()))
+        # Key: attribute name, value: view of a column in data
+        self.columns = {name: self.data[name] for name in STORE_FIELDS}
+
+        for position, grid in enumerate(self.grids):
+            for name, column in self.columns.items():
+                column[position] = grid.__getattribute__(name)
+            grid.grid_store = self
+            grid.grid_position = position
+
+    def is_outdated(self, grids):
+        """
+        Args:
+            grids (dict): Key: location, value: GridInfo
+
+        Returns:
+            bool: If grids changed since this store created.
+        """
+        return grids is not self.source or len(grids) != self.count
+
+    def update(self, grid, name, value):
+        """
+        Args:
+            grid (GridInfo):
+            name (str): Attribute name.
+            value: Value to set.
+        """
+        position = grid.grid_position
+        if self.grids[position] is not grid:
+            # Copies of grids share the same store, but they are not in it.
+            return
+        self.columns[name][position] = value
+
+    def match(self, name, value, strict=True):
+        """
+        Args:
+            name (str): Attribute name.
+            value: Value to match.
+            strict (bool): True to match types of values, like `SelectedGrids.select()`.
+
+        Returns:
+            int: Bitset of matched grids.
+        """
+        dtype = STORE_FIELDS[name]
+        if strict and dtype is bool and type(value) is not bool:
+            return 0
+        if strict and dtype is not bool and dtype is not object and type(value) is not int:
+            return 0
+        column = self.columns[name]
+        if dtype is object:
+            if strict:
+                matched = np.array([type(v) is type(value) and not v != value for v in column], dtype=bool)
+            else:
+                matched = np.array([not v != value for v in column], dtype=bool)
+        else:
+            matched = column == value
+        # `bitorder` of np.packbits() needs numpy>=1.17, pack in reversed order and drop the padding instead
+        padding = -len(matched) % 8
+        return int.from_bytes(np.packbits(matched[::-1]).tobytes(), 'big') >> padding
+
+    def gather(self, grids):
+        """
+        Args:
+            grids (list[GridInfo]): Grids of another map or view.
+
+        Returns:
+            dict: Key: attribute name in MERGE_INFO, value: np.ndarray.
+        """
+        info = {}
+        for name, dtype in MERGE_INFO.items():
+            if dtype is object:
+                column = np.empty(len(grids), dtype=object)
+                column[:] = [grid.__getattribute__(name) for grid in grids]
+            else:
+                column = np.array([grid.__getattribute__(name) for grid in grids], dtype=dtype)
+            info[name] = column
+        return info
+
+    def merge(self, positions, info, mode='normal', dry_run=False):
+        """
+        Vectorized `GridInfo.merge()`, merging a batch of detected grids.
+
+        Args:
+            positions (np.ndarray): Positions of grids to merge into.
+            info (dict): Detected status, see `gather()`.
+            mode (str): Scan mode, such as 'normal', 'carrier', 'movable'
+            dry_run (bool): True to check without writing.
+
+        Returns:
+            np.ndarray: Bool array, if each merge succeeded.
+        """
+        c = {name: self.columns[name][positions] for name in MERGE_STATUS}
+        land = c['is_land']
+        sea = ~(land | c['is_enemy'] | c['is_siren'] | c['is_fortress'] | c['is_boss'])
+        not_land = ~land
+        movable = (mode == 'movable') | c['is_movable']
+
+        # Each grid goes to the first branch its info matches
+        caught_failed = info['is_caught_by_siren'] & ~sea
+        remain = ~caught_failed
+        branch = {}
+        for name in ['is_fleet', 'is_boss', 'is_siren', 'is_enemy', 'is_mystery', 'is_ammo', 'is_missile_attack']:
+            branch[name] = remain & info[name]
+            remain = remain & ~info[name]
+
+        enemy_normal = not_land & (c['may_enemy'] | c['is_carrier'] | (mode == 'decoy'))
+        enemy_carrier = (mode == 'carrier') & not_land & sea & ~c['may_enemy']
+        enemy_movable = movable & not_land
+        success = ~caught_failed & ~(
+                (branch['is_fleet'] & ~sea)
+                | (branch['is_boss'] & ~(not_land & c['may_boss']))
+                | (branch['is_siren'] & ~(not_land & (c['may_siren'] | movable)))
+                | (branch['is_enemy'] & ~(c['is_fortress'] | enemy_normal | enemy_carrier | enemy_movable))
+                | (branch['is_mystery'] & ~c['may_mystery'])
+                | (branch['is_ammo'] & ~c['may_ammo'])
+        )
+        if dry_run:
+            return success
+
+        def write(name, mask, value):
+            if not np.any(mask):
+                return
+            targets = positions[mask]
+            if isinstance(value, np.ndarray):
+                value = value[mask]
+                self.columns[name][targets] = value
+                value = value.tolist()
+            else:
+                self.columns[name][targets] = value
+                value = [value] * len(targets)
+            for position, v in zip(targets.tolist(), value):
+                self.grids[position].__dict__[name] = v
+
+        write('is_submarine', info['is_submarine'] & c['is_submarine_spawn_point'], True)
+        caught = info['is_caught_by_siren'] & sea
+        write('is_fleet', caught, True)
+        write('is_caught_by_siren', caught, True)
+
+        fleet = branch['is_fleet'] & sea
+        write('is_fleet', fleet, True)
+        write('is_current_fleet', fleet & info['is_current_fleet'], True)
+
+        write('is_boss', branch['is_boss'] & not_land & c['may_boss'], True)
+
+        siren = branch['is_siren'] & not_land & (c['may_siren'] | movable)
+        write('is_siren', siren, True)
+        write('enemy_scale', siren, 0)
+        write('enemy_genre', siren, info['enemy_genre'])
+
+        enemy = branch['is_enemy'] & ~c['is_fortress']
+        normal = enemy & enemy_normal
+        carrier = enemy & ~enemy_normal & enemy_carrier
+        other = enemy & ~enemy_normal & ~enemy_carrier & enemy_movable
+        write('is_enemy', normal | carrier | other, True)
+        write('is_carrier', carrier, True)
+        # Normal enemies keep known scale, but allow 3 overwrites 2
+        scale = np.where((info['enemy_scale'] != 0) & (c['enemy_scale'] == 0), info['enemy_scale'], c['enemy_scale'])
+        scale = np.where((info['enemy_scale'] == 3) & (scale == 2), 3, scale)
+        write('enemy_scale', normal, scale)
+        write('enemy_scale', (carrier | other) & (info['enemy_scale'] != 0), info['enemy_scale'])
+        # Unknown genre doesn't overwrite known genre
+        genre = np.array([bool(g) for g in info['enemy_genre']], dtype=bool)
+        known = np.array([bool(g) for g in c['enemy_genre']], dtype=bool)
+        genre &= ~((info['enemy_genre'] == 'Enemy') & known)
+        write('enemy_genre', (normal | carrier | other) & genre, info['enemy_genre'])
+
+        write('is_mystery', branch['is_mystery'] & c['may_mystery'], info['is_mystery'])
+        write('is_ammo', branch['is_ammo'] & c['may_ammo'], info['is_ammo'])
+
+        write('is_siren', branch['is_missile_attack'] & c['may_siren'], True)
+        write('is_enemy', branch['is_missile_attack'] & ~c['may_siren'] & c['may_enemy'], True)
+        return success
@@ -1,6 +1,8 @@
 import numpy as np
 
 from module.config.config import AzurLaneConfig
+from module.logger import logger
+from module.map_detection.grid_predictor import GRID_HOMO_CACHE
 from module.map_detection.homography import Homography
 from module.map_detection.perspective import Perspective
 
@@ -26,6 +28,10 @@ class MapDetector:
         """
         self.config = config
         self.backend = None
+        # Camera movement in grids, set by `detector_track()` before swiping
+        self.track_vector = None
+        # Count of detections that tracked from the previous one or detected from scratch
+        self.detection_count = {'tracked': 0, 'full': 0}
         self.detector_set_backend()
 
     def detector_set_backend(self, name=''):
@@ -36,17 +42,42 @@ class MapDetector:
         if not name:
             name = self.config.DETECTION_BACKEND
 
+        GRID_HOMO_CACHE.clear()
         if name == 'homography':
             self.backend = Homography(config=self.config)
         else:
             self.backend = Perspective(config=self.config)
 
+    def detector_track(self, vector):
+        """
+        Tell detector that camera is going to move, so the next `load()` can track from the current detection.
+
+        Args:
+            vector (tuple, np.ndarray): Camera movement in grids, float.
+        """
+        self.track_vector = np.array(vector, dtype=float)
+
     def load(self, image):
         """
         Args:
             image: Shape (720, 1280, 3)
         """
-        self.backend.load(image)
+        # Track only right after a swipe.
+        # Camera may pan by itself without swiping, such as focusing on fleets and enemies,
+        # so other screenshots are detected from scratch.
+        track, self.track_vector = self.track_vector, None
+        if not self.config.DETECTION_TRACKING:
+            track = None
+
+        # Grid perspectives are from the previous detection, any backend
+        GRID_HOMO_CACHE.clear()
+        self.backend.tracked = False
+        self.backend.load(image, track=track)
+        if self.backend.tracked:
+            self.detection_count['tracked'] += 1
+        else:
+            self.detection_count['full'] += 1
+        logger.attr_align('detection_count', '{tracked} tracked, {full} full'.format(**self.detection_count))
 
         self.left_edge = bool(self.backend.left_edge)
         self.right_edge = bool(self.backend.right_edge)
@@ -18,12 +18,15 @@ class DetectionBackendExample:
     """
     Input
     """
-    def load(self, image):
+    def load(self, image, track=None):
         """
         Args:
             image (np.ndarray): Shape (720, 1280, 3)
+            track (np.ndarray): Camera movement in grids since the previous image.
+                None to detect from scratch.
         """
         self.image = image
+        self.tracked = False
         pass  # Do map detection here.
 
     """
@@ -36,6 +39,8 @@ class DetectionBackendExample:
     right_edge: bool
     lower_edge: bool
     upper_edge: bool
+    # True if result is tracked from the previous detection, instead of detecting from scratch.
+    tracked: bool
 
     # A method that yield grid location and corners.
     def generate(self):
@@ -1,4 +1,5 @@
 from module.base.utils import location2node
+from module.map.map_store import install_grid_status
 
 
 class GridInfo:
@@ -66,6 +67,11 @@ class GridInfo:
     is_flare = False
     is_missile_attack = False
     may_bouncing_enemy = False
+    # Status mirrored in the map, see `GridStore`
+    grid_store = None
+    # Attribute indexes of the map, see `GridIndex`
+    grid_index = None
+    grid_position = 0
     cost = 9999
     cost_1 = 9999
     cost_2 = 9999
@@ -74,6 +80,15 @@ class GridInfo:
 
     location = None
 
+    def __init__(self, *args, **kwargs):
+        # Status attributes are GridStatus descriptors, see `install_grid_status()`
+        self.__dict__.update(self.status_default)
+        super().__init__(*args, **kwargs)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        install_grid_status(cls)
+
     def decode(self, text):
         text = text.upper()
         dic = {
@@ -334,3 +349,6 @@ class GridInfo:
         l1 = self.location
         l2 = other.location
         return abs(l1[0] - l2[0]) + abs(l1[1] - l2[1])
+
+
+install_grid_status(GridInfo)
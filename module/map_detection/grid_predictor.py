@@ -1,3 +1,6 @@
+import collections
+import time
+
 from module.base.utils import *
 from module.config.config import AzurLaneConfig
 from module.exception import ScriptError
@@ -6,6 +9,22 @@ from module.map_detection.utils import *
 from module.map_detection.utils_assets import *
 from module.template.assets import *
 
+# Perspective data of grids solved by map detection backend, valid until the next `MapDetector.load()`.
+# Key: (HOMO_TILE, corner.tobytes()), value: (homo_data, homo_invt)
+GRID_HOMO_CACHE = {}
+
+
+def grid_homo_key(corner, tile):
+    """
+    Args:
+        corner (np.ndarray): shape (4, 2), [upper-left, upper-right, bottom-left, bottom-right]
+        tile (tuple): HOMO_TILE
+
+    Returns:
+        tuple:
+    """
+    return tuple(tile), np.asarray(corner).tobytes()
+
 
 class GridPredictor:
     def __init__(self, location, image, corner, config):
@@ -37,10 +56,14 @@ class GridPredictor:
                 self.template_enemy_genre[f'Siren_{name}'] = globals().get(f'TEMPLATE_SIREN_{name}')
 
         self.area = corner2area(self.corner)
-        self.homo_data = cv2.getPerspectiveTransform(
-            src=self.corner.astype(np.float32),
-            dst=area2corner((0, 0, *self.config.HOMO_TILE)).astype(np.float32))
-        self.homo_invt = cv2.invert(self.homo_data)[1]
+        homo = GRID_HOMO_CACHE.get(grid_homo_key(self.corner, self.config.HOMO_TILE), None)
+        if homo is not None:
+            self.homo_data, self.homo_invt = homo
+        else:
+            self.homo_data = cv2.getPerspectiveTransform(
+                src=self.corner.astype(np.float32),
+                dst=area2corner((0, 0, *self.config.HOMO_TILE)).astype(np.float32))
+            self.homo_invt = cv2.invert(self.homo_data)[1]
 
     def screen2grid(self, points):
         """
@@ -322,3 +345,257 @@ class GridPredictor:
         res = cv2.matchTemplate(piece_2, piece_1, cv2.TM_CCOEFF_NORMED)
         _, similarity, _, point = cv2.minMaxLoc(res)
         return similarity > threshold
+
+
+class GridPredictorBatch:
+    """
+    Predict all grids in view at once.
+
+    Crops of the same relative area from all grids are stacked vertically into one tall image,
+    so color similarity, HSV masks and template matching run in one OpenCV call instead of one call per grid.
+    All of them are pixel-wise operations, and a template match on a window only depends on pixels in that window,
+    so results are the same as GridPredictor.predict().
+
+    Prediction methods overridden in subclasses, such as those in event campaigns, are called grid by grid.
+    """
+
+    def __init__(self, grids):
+        """
+        Args:
+            grids (list[GridPredictor]): Grids of the same class, can be empty.
+        """
+        self.grids = grids
+        self.cls = type(grids[0]) if grids else GridPredictor
+        self.config = grids[0].config if grids else None
+        self._stacks = {}
+        self.timer = collections.defaultdict(float)
+
+    def is_overridden(self, name):
+        return getattr(self.cls, name) is not getattr(GridPredictor, name)
+
+    def stack(self, area, shape):
+        """
+        Args:
+            area (tuple): Relative area, see GridPredictor.relative_crop()
+            shape (tuple): (width, height)
+
+        Returns:
+            np.ndarray: Crops of all grids, shape (N * height, width, channel)
+        """
+        key = (area, shape)
+        if key not in self._stacks:
+            start = time.time()
+            self._stacks[key] = np.concatenate([grid.relative_crop(area, shape=shape) for grid in self.grids])
+            self.timer['crop'] += time.time() - start
+        return self._stacks[key]
+
+    def split(self, image):
+        """
+        Args:
+            image (np.ndarray): Tall image, shape (N * height, ...)
+
+        Returns:
+            np.ndarray: Shape (N, height, ...)
+        """
+        return image.reshape(len(self.grids), -1, *image.shape[1:])
+
+    def color_similarity(self, area, shape, color):
+        start = time.time()
+        image = color_similarity_2d(self.stack(area, shape), color=color)
+        self.timer['color'] += time.time() - start
+        return image
+
+    def rgb_count(self, area, color, shape=(50, 50), threshold=221):
+        """
+        Returns:
+            np.ndarray: Same as GridPredictor.relative_rgb_count(), shape (N,)
+        """
+        image = self.color_similarity(area, shape, color)
+        return np.count_nonzero(self.split(image) > threshold, axis=(1, 2))
+
+    def hsv_count(self, area, h=(0, 360), s=(0, 100), v=(0, 100), shape=(50, 50)):
+        """
+        Returns:
+            np.ndarray: Same as GridPredictor.relative_hsv_count(), shape (N,)
+        """
+        start = time.time()
+        image = cv2.cvtColor(self.stack(area, shape), cv2.COLOR_RGB2HSV)
+        lower = (h[0] / 2, s[0] * 2.55, v[0] * 2.55)
+        upper = (h[1] / 2 + 1, s[1] * 2.55 + 1, v[1] * 2.55 + 1)
+        image = cv2.inRange(image, lower, upper)
+        self.timer['hsv'] += time.time() - start
+        return np.count_nonzero(self.split(image), axis=(1, 2))
+
+    def match(self, template, image, similarity=0.85, index=None):
+        """
+        Args:
+            template (Template):
+            image (np.ndarray): Tall image, shape (N * height, width)
+            similarity (float):
+            index (np.ndarray): Indexes of grids to match, None for all.
+
+        Returns:
+            np.ndarray: Same as Template.match() on each grid, shape (N,) or shape of index.
+        """
+        start = time.time()
+        tiles = self.split(image)
+        if index is not None:
+            tiles = tiles[index]
+        count, height, width = tiles.shape[:3]
+        result = np.zeros(count, dtype=bool)
+        if not count:
+            return result
+
+        templates = template.image if template.is_gif else [template.image]
+        for t in templates:
+            t_height, t_width = t.shape[:2]
+            if t_height > height or t_width > width:
+                # Template larger than image, use the original method
+                result |= np.array([template.match(tile, similarity=similarity) for tile in tiles])
+                break
+            res = cv2.matchTemplate(tiles.reshape(count * height, *tiles.shape[2:]), t, cv2.TM_CCOEFF_NORMED)
+            # Drop windows across two grids
+            res = np.pad(res, ((0, t_height - 1), (0, 0)), mode='constant', constant_values=-1)
+            res = res.reshape(count, height, -1)[:, :height - t_height + 1, :]
+            result |= np.max(res, axis=(1, 2)) > similarity
+        self.timer['match'] += time.time() - start
+        return result
+
+    def predict_enemy_scale(self):
+        area, shape = (-0.415 - 0.7, -0.62 - 0.7, -0.415, -0.62), (50, 50)
+        red = self.color_similarity(area, shape, (255, 130, 132))
+        yellow = self.color_similarity(area, shape, (255, 235, 156))
+        scale = np.zeros(len(self.grids), dtype=int)
+        index = np.arange(len(self.grids))
+        for template, value, image, similarity in [
+            (TEMPLATE_ENEMY_L, 3, red, 0.75),
+            (TEMPLATE_ENEMY_M, 2, yellow, 0.85),
+            (TEMPLATE_ENEMY_S, 1, yellow, 0.85),
+        ]:
+            matched = self.match(template, image, similarity=similarity, index=index)
+            scale[index[matched]] = value
+            index = index[~matched]
+        return scale.tolist()
+
+    def predict_enemy_genre(self):
+        grid = self.grids[0]
+        genre = [None] * len(self.grids)
+        index = np.arange(len(self.grids))
+        scaling_dic = self.config.MAP_ENEMY_GENRE_DETECTION_SCALING
+        images = {}
+        for name, template in grid.template_enemy_genre.items():
+            if template is None:
+                # Raise error in the original method
+                return grid.predict_enemy_genre()
+
+            short_name = name[6:] if name.startswith('Siren_') else name
+            scaling = scaling_dic.get(short_name, 1)
+            scaling = (scaling,) if not isinstance(scaling, tuple) else scaling
+            for scale in scaling:
+                if scale not in images:
+                    shape = tuple(np.round(np.array((60, 60)) * scale).astype(int))
+                    images[scale] = rgb2gray(self.stack((-0.5, -1, 0.5, 0), shape=shape))
+
+                matched = self.match(template, images[scale],
+                                     similarity=self.config.MAP_ENEMY_GENRE_SIMILARITY, index=index)
+                for i in index[matched]:
+                    genre[i] = name
+                index = index[~matched]
+
+        return genre
+
+    def predict_boss(self):
+        image = self.color_similarity((-0.55, -0.2, 0.45, 0.2), (50, 20), (255, 77, 82))
+        boss = self.match(TEMPLATE_ENEMY_BOSS, image, similarity=0.75)
+
+        # Small boss icon
+        area, shape = (0.03, -0.15, 0.63, 0.15), (50, 20)
+        index = np.where(~boss)[0]
+        index = index[self.hsv_count(area, h=(358 - 3, 358 + 3), shape=shape)[index] > 100]
+        if len(index):
+            image = self.color_similarity(area, shape, (255, 77, 82))
+            boss[index] = self.match(TEMPLATE_ENEMY_BOSS, image, similarity=0.7, index=index)
+
+        return boss.tolist()
+
+    def predict_missile_attack(self):
+        return (self.rgb_count((-0.5, -1, 0.5, 0), color=(255, 255, 60), shape=(50, 50)) > 35).tolist()
+
+    def predict_fleet(self):
+        image = self.color_similarity((-1, -2, -0.5, -1.5), (50, 50), (255, 255, 255))
+        return self.match(TEMPLATE_FLEET_AMMO, image).tolist()
+
+    def predict_submarine(self):
+        image = self.color_similarity((-0.86, 0.08, -0.36, 0.58), (50, 50), (255, 243, 156))
+        return self.match(TEMPLATE_SUBMARINE, image).tolist()
+
+    def predict_mystery(self):
+        return (self.rgb_count((-0.3, -2, 0.3, -0.6), color=(148, 255, 247), shape=(20, 50)) > 50).tolist()
+
+    def predict_current_fleet(self):
+        count = self.hsv_count((-0.5, -3.5, 0.5, -2.5), h=(141 - 3, 141 + 10), shape=(50, 50))
+        index = np.where(count >= 600)[0]
+        current = np.zeros(len(self.grids), dtype=bool)
+        if len(index):
+            image = self.color_similarity((-0.5, -3.5, 0.5, -2.5), (60, 60), (24, 255, 107))
+            current[index] = self.match(TEMPLATE_FLEET_CURRENT, image, index=index)
+        return current.tolist()
+
+    def feature(self, name):
+        """
+        Args:
+            name (str): Name of prediction method, such as `predict_enemy_scale`
+
+        Returns:
+            list: Result of each grid.
+        """
+        if self.is_overridden(name):
+            return [getattr(grid, name)() for grid in self.grids]
+        else:
+            return getattr(self, name)()
+
+    def predict(self):
+        """
+        Same as GridPredictor.predict(), but on all grids.
+        """
+        grids = self.grids
+        if not grids:
+            # Nothing to stack
+            return
+        if self.is_overridden('predict'):
+            for grid in grids:
+                grid.predict()
+            return
+
+        # Set features one by one, because overridden methods may read features predicted before.
+        for grid, value in zip(grids, self.feature('predict_enemy_scale')):
+            grid.enemy_scale = value
+        for grid, value in zip(grids, self.feature('predict_enemy_genre')):
+            grid.enemy_genre = value
+        for grid, value in zip(grids, self.feature('predict_boss')):
+            grid.is_boss = value
+        for grid, value in zip(grids, self.feature('predict_submarine')):
+            grid.is_submarine = value
+        for grid, value in zip(grids, self.feature('predict_fleet')):
+            grid.is_fleet = False if grid.is_submarine else value
+        if self.config.MAP_HAS_MYSTERY:
+            for grid, value in zip(grids, self.feature('predict_mystery')):
+                grid.is_mystery = value
+        for grid, value in zip(grids, self.feature('predict_current_fleet')):
+            grid.is_current_fleet = value
+
+        if self.config.MAP_HAS_MISSILE_ATTACK:
+            for grid, value in zip(grids, self.feature('predict_missile_attack')):
+                if value:
+                    grid.is_missile_attack = True
+        for grid in grids:
+            if grid.enemy_genre:
+                grid.is_enemy = True
+            if grid.enemy_scale:
+                grid.is_enemy = True
+            if grid.is_enemy and not grid.enemy_genre:
+                grid.enemy_genre = 'Enemy'
+            if self.config.MAP_HAS_SIREN:
+                if grid.enemy_genre is not None and grid.enemy_genre.startswith('Siren'):
+                    grid.is_siren = True
+                    grid.enemy_scale = 0
@@ -3,10 +3,13 @@ import time
 import numpy as np
 from PIL import ImageDraw, ImageOps
 
+from module.base.resource import del_cached_property
 from module.base.utils import *
 from module.config.config import AzurLaneConfig
 from module.exception import MapDetectionError
 from module.logger import logger
+from module.map_detection.grid_predictor import GRID_HOMO_CACHE, grid_homo_key
+from module.map_detection.homography_cache import HomographyCache
 from module.map_detection.perspective import Perspective
 from module.map_detection.utils import *
 from module.map_detection.utils_assets import *
@@ -52,6 +55,8 @@ class Homography:
     homo_size: tuple
     homo_loca: np.ndarray
     homo_loaded: bool
+    # If homo_loca of the last detection is tracked from the previous one
+    tracked: bool
 
     map_inner: np.ndarray
     _map_edge_count: tuple
@@ -63,6 +68,10 @@ class Homography:
         """
         self.config = config
         self.homo_loaded = False
+        self.tracked = False
+        self._track_loca = None
+        # If current homography is the one in homo_cache
+        self._homo_cache_valid = False
 
     @cached_property
     def ui_mask_homo_stroke(self):
@@ -81,15 +90,53 @@ class Homography:
         image[:, -pad:] = 0
         return image
 
-    def load(self, image):
+    def load(self, image, track=None):
         """
         Args:
             image (np.ndarray): Shape (720, 1280, 3)
+            track (tuple, np.ndarray): Camera movement in grids since the previous image,
+                to track tiles from the previous detection. None to detect from scratch.
         """
         if not self.homo_loaded:
-            self.load_homography(storage=self.config.HOMO_STORAGE, image=image)
+            storage = self.config.HOMO_STORAGE
+            if storage is None:
+                cached = self.homo_cache.get_storage()
+                if cached is not None and self.validate_storage(cached, image=image):
+                    self._homo_cache_valid = True
+                    return
+            self.load_homography(storage=storage, image=image)
+            self.detect(image, track=track)
+            # Save after the solution works on current image, bad solutions are not reused
+            self.homo_cache.set_storage(self.homo_storage)
+            self._homo_cache_valid = True
+            return
+
+        self.detect(image, track=track)
+
+    def validate_storage(self, storage, image):
+        """
+        Load the cached homography and detect current image with it, remove the cache if failed.
 
-        self.detect(image)
+        Args:
+            storage (tuple): ((x, y), [upper-left, upper-right, bottom-left, bottom-right])
+            image (np.ndarray):
+
+        Returns:
+            bool: If valid.
+        """
+        self.load_homography(storage=storage)
+        try:
+            self.detect(image)
+            return True
+        except MapDetectionError:
+            logger.warning('Cached homography does not fit current image, solve again')
+            self.homo_cache.clear()
+            self.homo_loaded = False
+            return False
+
+    @cached_property
+    def homo_cache(self):
+        return HomographyCache(self.config)
 
     def load_homography(self, storage=None, perspective=None, image=None, file=None):
         """
@@ -152,17 +199,24 @@ class Homography:
         self.homo_invt = cv2.invert(homo)[1]
         self.homo_size = tuple(size.tolist())
         self.homo_loaded = True
+        # homo_loca and UI mask of the old homography are meaningless
+        self._track_loca = None
+        del_cached_property(self, 'ui_mask_homo_stroke')
+        self._homo_cache_valid = False
 
-    def detect(self, image):
+    def detect(self, image, track=None):
         """
         Args:
             image (np.ndarray): Screenshot.
+            track (tuple, np.ndarray): Camera movement in grids since the previous image,
+                to track tiles from the previous detection. None to detect from scratch.
 
         Returns:
             bool: If success.
         """
         start_time = time.time()
         self.image = image
+        self.tracked = False
 
         # Image initialization
         image = rgb2gray(crop(image, self.config.DETECTING_AREA))
@@ -178,7 +232,15 @@ class Homography:
         # Image.fromarray(image_edge, mode='L').show()
 
         # Find free tile
-        if self.search_tile_center(image_edge, threshold_good=self.config.HOMO_CENTER_GOOD_THRESHOLD,
+        if track is not None and self._track_loca is not None:
+            # Camera moves right, tiles move left
+            seed = self._track_loca - np.multiply(track, self.config.HOMO_TILE)
+            self.tracked = self.track_tile_center(image_edge, seed=seed,
+                                                  threshold=self.config.HOMO_CENTER_GOOD_THRESHOLD,
+                                                  radius=self.config.HOMO_TRACK_RADIUS)
+        if self.tracked:
+            pass
+        elif self.search_tile_center(image_edge, threshold_good=self.config.HOMO_CENTER_GOOD_THRESHOLD,
                                    threshold=self.config.HOMO_CENTER_THRESHOLD):
             pass
         elif self.search_tile_corner(image_edge, threshold=self.config.HOMO_CORNER_THRESHOLD):
@@ -189,6 +251,7 @@ class Homography:
             raise MapDetectionError('Failed to find a free tile')
 
         self.homo_loca %= self.config.HOMO_TILE
+        self._track_loca = self.homo_loca
 
         # Detect map edges
         self.lower_edge, self.upper_edge, self.left_edge, self.right_edge = False, False, False, False
@@ -244,6 +307,53 @@ class Homography:
         logger.attr_align('tile_center', f'{float2str(similarity)} ({message})')
         return message != 'bad match'
 
+    def track_tile_center(self, image, seed, threshold=0.9, radius=15):
+        """
+        Search for the center of empty tile, around the tiles predicted from the previous detection.
+        Tiles are checked from screen center to outside, until one of them has a good match.
+        Each check is a template matching on a small window, much cheaper than searching the whole image.
+
+        Args:
+            image (np.ndarray): Monochrome image.
+            seed (np.ndarray): Predicted homo_loca.
+            threshold (float):
+            radius (int): Allowed error of the prediction, in pixel.
+
+        Returns:
+            bool: If success.
+        """
+        template = ASSETS.tile_center_image
+        height, width = image.shape[:2]
+        t_height, t_width = template.shape[:2]
+        # Upper-left corner of tile center templates
+        seed = np.round(seed).astype(int) % self.config.HOMO_TILE + self.config.HOMO_CENTER_OFFSET
+        x = np.arange(-1, width // self.config.HOMO_TILE[0] + 2) * self.config.HOMO_TILE[0] + seed[0]
+        y = np.arange(-1, height // self.config.HOMO_TILE[1] + 2) * self.config.HOMO_TILE[1] + seed[1]
+        points = np.array(np.meshgrid(x, y)).reshape((2, -1)).T
+        center = perspective_transform(
+            [np.subtract(self.config.SCREEN_CENTER, self.config.DETECTING_AREA[:2])], self.homo_data)[0]
+        points = points[np.argsort(np.linalg.norm(points + (t_width // 2, t_height // 2) - center, axis=1))]
+
+        similarity = 0.
+        for x, y in points:
+            x1, y1 = max(x - radius, 0), max(y - radius, 0)
+            x2, y2 = min(x + t_width + radius, width), min(y + t_height + radius, height)
+            if x2 - x1 < t_width + radius or y2 - y1 < t_height + radius:
+                # Tile is out of image
+                continue
+            result = cv2.matchTemplate(image[y1:y2, x1:x2], template, cv2.TM_CCOEFF_NORMED)
+            _, sim, _, loca = cv2.minMaxLoc(result)
+            similarity = max(similarity, sim)
+            if sim > threshold:
+                loca = np.add(loca, (x1, y1))
+                self.homo_loca = loca - self.config.HOMO_CENTER_OFFSET
+                self.map_inner = loca
+                logger.attr_align('tile_center', f'{float2str(sim)} (tracked)')
+                return True
+
+        logger.attr_align('tile_center', f'{float2str(similarity)} (track failed)')
+        return False
+
     def search_tile_corner(self, image, threshold=0.8, encourage=1.0):
         """
         Search for the corner of empty tile.
@@ -370,6 +480,63 @@ class Homography:
         self.lower_edge, self.upper_edge = separate_edges(hori, inner=self.map_inner[1])
         self.left_edge, self.right_edge = separate_edges(vert, inner=self.map_inner[0])
 
+    def solve_grids(self, loca):
+        """
+        Solve all tiles in the transformed image of a homo_loca, edges not considered.
+
+        Args:
+            loca (np.ndarray): homo_loca
+
+        Returns:
+            np.ndarray: Screen coordinates of tile corners, shape (y, x, 2)
+            np.ndarray: Perspective data from each tile to HOMO_TILE, shape (y - 1, x - 1, 3, 3)
+            np.ndarray: Inverse of the above, shape (y - 1, x - 1, 3, 3)
+        """
+        x, y = self._grids_axis(loca)
+        points = np.array(np.meshgrid(x, y)).reshape((2, -1)).T
+        points = perspective_transform(points, data=self.homo_invt) + self.config.DETECTING_AREA[:2]
+        points = points.reshape(len(y), len(x), 2)
+
+        dst = area2corner((0, 0, *self.config.HOMO_TILE)).astype(np.float32)
+        homo_data = np.zeros((len(y) - 1, len(x) - 1, 3, 3))
+        homo_invt = np.zeros((len(y) - 1, len(x) - 1, 3, 3))
+        for (x, y), corner in points_to_area_generator(points, shape=(len(x), len(y))):
+            # Same as GridPredictor.__init__
+            homo_data[y, x] = cv2.getPerspectiveTransform(src=corner.astype(np.float32), dst=dst)
+            homo_invt[y, x] = cv2.invert(homo_data[y, x])[1]
+        return points, homo_data, homo_invt
+
+    def _grids_axis(self, loca):
+        """
+        Returns:
+            np.ndarray, np.ndarray: Tile corners in transformed image on x and y, including the ones outside edges.
+        """
+        x = np.arange(-25, 25) * self.config.HOMO_TILE[0] + loca[0]
+        x = x[(x > -5) & (x < self.homo_size[0] + 5)]
+        y = np.arange(-25, 25) * self.config.HOMO_TILE[1] + loca[1]
+        y = y[(y > -5) & (y < self.homo_size[1] + 5)]
+        return x, y
+
+    def get_grids(self, loca):
+        """
+        Args:
+            loca (np.ndarray): homo_loca
+
+        Returns:
+            tuple[np.ndarray]: See `solve_grids()`, or None if not cacheable.
+        """
+        if not self._homo_cache_valid or not self.homo_cache.enabled:
+            return None
+        loca = np.asarray(loca)
+        if np.any(loca != np.round(loca)):
+            return None
+        loca = tuple(loca.astype(int).tolist())
+        grids = self.homo_cache.get_grids(loca)
+        if grids is None:
+            grids = self.solve_grids(loca)
+            self.homo_cache.set_grids(loca, grids)
+        return grids
+
     def generate(self):
         """
         Yields (tuple): ((x, y), [upper-left, upper-right, bottom-left, bottom-right])
@@ -380,6 +547,25 @@ class Homography:
             self.right_edge + 5 if self.right_edge else self.homo_size[0],
             self.upper_edge + 5 if self.upper_edge else self.homo_size[1]
         ]
+        GRID_HOMO_CACHE.clear()
+        grids = self.get_grids(self.homo_loca)
+        if grids is not None:
+            # Crop solved tiles within edges
+            points, homo_data, homo_invt = grids
+            x, y = self._grids_axis(self.homo_loca)
+            x = np.where((x > area[0]) & (x < area[2]))[0]
+            y = np.where((y > area[1]) & (y < area[3]))[0]
+            if len(x) and len(y):
+                x1, x2, y1, y2 = x[0], x[-1] + 1, y[0], y[-1] + 1
+                points, homo_data, homo_invt = points[y1:y2, x1:x2], homo_data[y1:y2, x1:x2], homo_invt[y1:y2, x1:x2]
+            else:
+                points = points[:0, :0]
+            shape = points.shape[:2][::-1]
+            for (x, y), corner in points_to_area_generator(points, shape=shape):
+                GRID_HOMO_CACHE[grid_homo_key(corner, self.config.HOMO_TILE)] = (homo_data[y, x], homo_invt[y, x])
+                yield (x, y), corner
+            return
+
         x = np.arange(-25, 25) * self.config.HOMO_TILE[0] + self.homo_loca[0]
         x = x[(x > area[0]) & (x < area[2])]
         y = np.arange(-25, 25) * self.config.HOMO_TILE[1] + self.homo_loca[1]
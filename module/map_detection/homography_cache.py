@@ -0,0 +1,195 @@
+"""
+Persistent cache of homography solutions.
+
+Homography of a campaign map is fixed, solving it from perspective takes a full detection on the first screenshot,
+and every frame re-generates grid corners and per-grid perspective transforms from homo_loca.
+Solutions are cached per map, so warm runs skip re-solving:
+    storage: ((x, y), [upper-left, upper-right, bottom-left, bottom-right]) of `Homography.homo_storage`,
+        saved to file.
+    grids of an integer homo_loca: screen coordinates of all tile corners, and perspective data of all tiles,
+        kept in memory only, the recently used ones.
+
+Cache file is named by map name and a hash of all parameters that affect the solutions,
+changing any of them makes a new file.
+"""
+import hashlib
+import json
+import os
+import re
+from collections import OrderedDict
+
+import numpy as np
+
+from module.base.asset_pack import ASSET_PACK_FOLDER
+from module.base.decorator import cached_property
+from module.logger import logger
+
+HOMOGRAPHY_CACHE_FOLDER = os.path.join(ASSET_PACK_FOLDER, 'homography')
+# Increase this if the format or the way of solving changed
+HOMOGRAPHY_CACHE_VERSION = 2
+# Config attributes that affect solutions
+HOMOGRAPHY_CACHE_PARAMS = [
+    'DETECTING_AREA',
+    'HOMO_TILE',
+    'HOMO_STORAGE',
+    'INTERNAL_LINES_FIND_PEAKS_PARAMETERS',
+    'EDGE_LINES_FIND_PEAKS_PARAMETERS',
+    'INTERNAL_LINES_HOUGHLINES_THRESHOLD',
+    'EDGE_LINES_HOUGHLINES_THRESHOLD',
+    'HORIZONTAL_LINES_THETA_THRESHOLD',
+    'VERTICAL_LINES_THETA_THRESHOLD',
+    'TRUST_EDGE_LINES',
+    'TRUST_EDGE_LINES_THRESHOLD',
+    'PERSPECTIVE_SOLVER',
+    'VANISH_POINT_RANGE',
+    'DISTANCE_POINT_X_RANGE',
+    'COINCIDENT_POINT_ENCOURAGE_DISTANCE',
+    'ERROR_LINES_TOLERANCE',
+    'MID_DIFF_RANGE_H',
+    'MID_DIFF_RANGE_V',
+]
+
+
+class HomographyCache:
+    # Max number of homo_loca to keep grids
+    GRIDS_LIMIT = 20
+
+    def __init__(self, config, folder=HOMOGRAPHY_CACHE_FOLDER):
+        """
+        Args:
+            config (AzurLaneConfig):
+            folder (str):
+        """
+        self.folder = folder
+        self.name = re.sub(r'[^\w.]', '_', config.MAP_NAME) if config.MAP_NAME else 'default'
+        params = [HOMOGRAPHY_CACHE_VERSION] + [getattr(config, attr, None) for attr in HOMOGRAPHY_CACHE_PARAMS]
+        data = json.dumps(params, default=str)
+        self.digest = hashlib.md5(data.encode('utf-8')).hexdigest()[:12]
+        # Without map name, only solutions from HOMO_STORAGE are reusable
+        self.enabled = bool(config.MAP_NAME) or config.HOMO_STORAGE is not None
+        # Key: homo_loca. Value: (points, homo_data, homo_invt)
+        self.grids = OrderedDict()
+
+    @property
+    def file(self):
+        """
+        Returns:
+            str: Such as `./bin/asset_pack/homography/campaign_main.campaign_7_2.3f2a9c81d0e4.npz`
+        """
+        return os.path.join(self.folder, f'{self.name}.{self.digest}.npz')
+
+    @cached_property
+    def data(self):
+        """
+        Returns:
+            dict: Key: str, value: np.ndarray
+        """
+        if not self.enabled:
+            return {}
+        try:
+            with np.load(self.file) as f:
+                data = {key: f[key] for key in f.files}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f'Failed to load homography cache {self.file}: {e}')
+            return {}
+        logger.info(f'Homography cache loaded: {self.file}')
+        return data
+
+    def get_storage(self):
+        """
+        Returns:
+            tuple: ((x, y), [upper-left, upper-right, bottom-left, bottom-right]), or None if not cached.
+        """
+        size = self.data.get('storage_size', None)
+        points = self.data.get('storage_points', None)
+        if size is None or points is None:
+            return None
+        return tuple(size.tolist()), [tuple(point) for point in points.tolist()]
+
+    def set_storage(self, storage):
+        """
+        Args:
+            storage (tuple): ((x, y), [upper-left, upper-right, bottom-left, bottom-right])
+        """
+        if not self.enabled:
+            return
+        if self.get_storage() != storage:
+            # Grids of the old storage are useless
+            self.data.clear()
+            self.grids.clear()
+            self.data['storage_size'] = np.array(storage[0])
+            self.data['storage_points'] = np.array(storage[1])
+            self.save()
+
+    def clear(self):
+        """
+        Remove all solutions of this map, including the cache file.
+        """
+        self.data.clear()
+        self.grids.clear()
+        try:
+            os.remove(self.file)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f'Failed to remove homography cache {self.file}: {e}')
+
+    def get_grids(self, loca):
+        """
+        Args:
+            loca (tuple[int]): homo_loca
+
+        Returns:
+            tuple[np.ndarray]: (points, homo_data, homo_invt), or None if not cached.
+                See `Homography.solve_grids()`
+        """
+        grids = self.grids.get(loca, None)
+        if grids is not None:
+            self.grids.move_to_end(loca)
+        return grids
+
+    def set_grids(self, loca, grids):
+        """
+        Args:
+            loca (tuple[int]): homo_loca
+            grids (tuple[np.ndarray]): (points, homo_data, homo_invt)
+        """
+        if not self.enabled:
+            return
+        self.grids[loca] = grids
+        self.grids.move_to_end(loca)
+        while len(self.grids) > self.GRIDS_LIMIT:
+            self.grids.popitem(last=False)
+
+    def save(self):
+        """
+        Returns:
+            bool: If success.
+        """
+        if not self.enabled:
+            return False
+        tmp = f'{self.file}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            with open(tmp, 'wb') as f:
+                np.savez(f, **self.data)
+            os.replace(tmp, self.file)
+        except OSError as e:
+            logger.warning(f'Failed to save homography cache {self.file}: {e}')
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return False
+
+        # Remove outdated versions
+        regex = re.compile(rf'^{re.escape(self.name)}\.[0-9a-f]+\.npz$')
+        for old in os.listdir(self.folder):
+            if regex.match(old) and old != os.path.basename(self.file):
+                try:
+                    os.remove(os.path.join(self.folder, old))
+                except OSError:
+                    pass
+        return True
@@ -50,6 +50,8 @@ class Perspective:
     vanish_point: tuple
     distant_point: tuple
     map_inner: np.ndarray
+    # If vanish point and distant point of the last detection are tracked from the previous one
+    tracked: bool
 
     def __init__(self, config):
         """
@@ -57,14 +59,20 @@ class Perspective:
             config (AzurLaneConfig):
         """
         self.config = config
+        self.tracked = False
+        # (vanish_point, distant_point, vanish point value per line) from the last full detection
+        self._track_data = None
 
-    def load(self, image):
+    def load(self, image, track=None):
         """
         Args:
             image (np.ndarray): Shape (720, 1280, 3)
+            track (tuple, np.ndarray): Camera movement in grids since the previous image,
+                to reuse perspective from the previous detection. None to detect from scratch.
         """
         start_time = time.time()
         self.image = image
+        self.tracked = False
 
         # Image initialisation
         image = self.load_image(image)
@@ -119,10 +127,12 @@ class Perspective:
 
         # Calculate perspective
         self.crossings = self.horizontal.cross(self.vertical)
-        self.vanish_point = optimize.brute(self._vanish_point_value, self.config.VANISH_POINT_RANGE)
-        distance_point_x = optimize.brute(self._distant_point_value, self.config.DISTANCE_POINT_X_RANGE)[0]
-        self.distant_point = (distance_point_x, self.vanish_point[1])
-        logger.attr_align('vanish_point', point2str(*self.vanish_point, length=5))
+        if track is not None:
+            self.tracked = self.track_perspective(tolerance=self.config.PERSPECTIVE_TRACK_TOLERANCE)
+        if not self.tracked:
+            self.solve_perspective()
+        logger.attr_align('vanish_point', point2str(*self.vanish_point, length=5)
+                          + (' (tracked)' if self.tracked else ''))
         logger.attr_align('distant_point', point2str(*self.distant_point, length=5))
         if np.linalg.norm(np.subtract(self.vanish_point, self.distant_point)) < 10:
             raise MapDetectionError('Vanish point and distant point too close')
@@ -269,6 +279,137 @@ class Perspective:
         image.show()
         # image.save('123.png')
 
+    def solve_perspective(self):
+        """
+        Calculate vanish point and distant point from lines, using PERSPECTIVE_SOLVER.
+        """
+        if self.config.PERSPECTIVE_SOLVER == 'least_squares':
+            self.vanish_point = self.solve_vanish_point(threshold=self.config.VANISH_POINT_RANSAC_THRESHOLD)
+            distance_point_x = self.solve_distant_point(threshold=self.config.DISTANCE_POINT_RANSAC_THRESHOLD)
+        else:
+            self.vanish_point = optimize.brute(self._vanish_point_value, self.config.VANISH_POINT_RANGE)
+            distance_point_x = optimize.brute(self._distant_point_value, self.config.DISTANCE_POINT_X_RANGE)[0]
+        self.distant_point = (distance_point_x, self.vanish_point[1])
+        value = self._vanish_point_value(self.vanish_point) / len(self.vertical)
+        self._track_data = (self.vanish_point, self.distant_point, value)
+
+    def track_perspective(self, tolerance=0.3):
+        """
+        Reuse vanish point and distant point from the previous detection.
+        Camera moves in parallel with the map plane, so perspective stays the same,
+        as long as lines detected in current image fit the previous vanish point as well as the lines it was solved from.
+
+        Args:
+            tolerance (float): Allowed increase of vanish point value per line, in log10 pixels.
+
+        Returns:
+            bool: If success.
+        """
+        if self._track_data is None:
+            return False
+        vanish_point, distant_point, value = self._track_data
+        current = self._vanish_point_value(vanish_point) / len(self.vertical)
+        if current > value + tolerance:
+            logger.attr_align('vanish_point', f'{float2str(current)} > {float2str(value)} (track failed)')
+            return False
+
+        self.vanish_point = vanish_point
+        self.distant_point = distant_point
+        return True
+
+    def solve_vanish_point(self, threshold=0.01, iteration=3):
+        """
+        Estimate vanish point by weighted least squares intersection of vertical lines,
+        with RANSAC-style outlier rejection.
+        Intersections of all line pairs are hypotheses, the one with most inliers wins.
+        Residual is the angle between a line and the direction from its mid point to the vanish point,
+        so lines are treated equally no matter how far they are from the vanish point.
+
+        Args:
+            threshold (float): Residual threshold of inliers, in radian.
+            iteration (int): Times of re-weighting.
+
+        Returns:
+            np.ndarray: (x, y), or the result of brute force search if lines are not enough.
+        """
+        lines = self.vertical
+        rho, sin, cos = lines.rho, lines.sin, lines.cos
+        anchor = np.array([lines.mid, np.full(len(lines), lines.MID_Y)]).T
+
+        def residual(points):
+            # Shape (n_points, n_lines)
+            distance = np.abs(rho - points[:, :1] * cos - points[:, 1:] * sin)
+            return distance / np.maximum(np.linalg.norm(anchor - points[:, None, :], axis=2), 1)
+
+        # Hypotheses, intersections of all line pairs
+        i, j = np.triu_indices(len(lines), k=1)
+        det = cos[i] * sin[j] - sin[i] * cos[j]
+        valid = np.abs(det) > 1e-6
+        i, j, det = i[valid], j[valid], det[valid]
+        points = np.array([
+            (rho[i] * sin[j] - rho[j] * sin[i]) / det,
+            (cos[i] * rho[j] - cos[j] * rho[i]) / det,
+        ]).T
+        (x1, x2), (y1, y2) = self.config.VANISH_POINT_RANGE
+        points = points[(x1 <= points[:, 0]) & (points[:, 0] <= x2) & (y1 <= points[:, 1]) & (points[:, 1] <= y2)]
+        if not len(points):
+            logger.info('Vanish point not solved, use brute force instead')
+            return optimize.brute(self._vanish_point_value, self.config.VANISH_POINT_RANGE)
+
+        # Most inliers, then least residual
+        res = residual(points)
+        inlier = res < threshold
+        score = np.sum(inlier, axis=1) - np.sum(res * inlier, axis=1) / threshold / (len(lines) + 1)
+        best = np.argmax(score)
+        best, best_inlier = points[best], inlier[best]
+
+        # Weighted least squares on inliers, weight is 1 / distance ** 2 to minimize angle error
+        a = np.array([cos, sin]).T[best_inlier]
+        b = rho[best_inlier]
+        point = best
+        for _ in range(iteration):
+            weight = 1 / np.maximum(np.linalg.norm(anchor[best_inlier] - point, axis=1), 1) ** 2
+            point = np.linalg.solve(a.T.dot(a * weight[:, None]), a.T.dot(b * weight))
+
+        return point
+
+    def solve_distant_point(self, threshold=0.01):
+        """
+        Estimate distant point, which the diagonals of grids meet.
+        Lines linking a crossing to another one on other rows are hypotheses,
+        the x on the horizon with most hypotheses around is the distant point.
+        Diagonals across any number of grids meet at the same point, so missing lines don't matter.
+
+        Args:
+            threshold (float): Threshold of inliers, relative to the distance between vanish point and distant point.
+
+        Returns:
+            float: x of distant point, or the result of brute force search if crossings are not enough.
+        """
+        y = self.vanish_point[1]
+        points = self.crossings.points
+        # Pairs on different rows
+        p, q = np.triu_indices(len(points), k=1)
+        p, q = points[p], points[q]
+        dy = q[:, 1] - p[:, 1]
+        valid = np.abs(dy) > 1
+        p, q, dy = p[valid], q[valid], dy[valid]
+        x = p[:, 0] + (y - p[:, 1]) * (q[:, 0] - p[:, 0]) / dy
+        x1, x2 = self.config.DISTANCE_POINT_X_RANGE[0]
+        x = x[(x1 <= x) & (x <= x2)]
+        if not len(x):
+            logger.info('Distant point not solved, use brute force instead')
+            return optimize.brute(self._distant_point_value, self.config.DISTANCE_POINT_X_RANGE)[0]
+
+        # Consensus in log scale, hypotheses from far away crossings are relatively precise.
+        # Count hypotheses within threshold on sorted values, instead of a matrix of all hypothesis pairs.
+        log = np.log(np.abs(x - self.vanish_point[0]))
+        sorted_log = np.sort(log)
+        count = np.searchsorted(sorted_log, log + threshold, side='left') \
+            - np.searchsorted(sorted_log, log - threshold, side='right')
+        inlier = np.abs(log - log[np.argmax(count)]) < threshold
+        return float(np.median(x[inlier]))
+
     def _vanish_point_value(self, point):
         """Value that measures how close a point to the perspective vanish point. The smaller the better.
         Use log10 to encourage a group of coincident lines and discourage wrong lines.
@@ -3,6 +3,7 @@ import numpy as np
 
 from module.base.decorator import cached_property
 from module.base.mask import Mask
+from module.base.shared_asset import SHARED_ASSETS
 from module.base.utils import crop
 
 UI_MASK = Mask(file='./assets/mask/MASK_MAP_UI.png')
@@ -13,19 +14,38 @@ DETECTING_AREA = (123, 55, 1280, 720)
 
 
 class Assets:
+    @staticmethod
+    def _shared_mask(mask):
+        """
+        Args:
+            mask (Mask):
+
+        Returns:
+            np.ndarray: Mask image shared among Alas instances.
+        """
+        def build():
+            image = mask.image
+            mask.resource_release()
+            return image
+
+        return SHARED_ASSETS.get(mask.name, build, files=[mask.file])
+
     @cached_property
     def ui_mask(self):
-        return UI_MASK.image
+        return self._shared_mask(UI_MASK)
 
     @cached_property
     def ui_mask_os(self):
-        return UI_MASK_OS.image
+        return self._shared_mask(UI_MASK_OS)
 
     @cached_property
     def ui_mask_stroke(self):
-        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
-        image = cv2.erode(self.ui_mask, kernel).astype('uint8')
-        return image
+        def build():
+            kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+            image = cv2.erode(self.ui_mask, kernel).astype('uint8')
+            return image
+
+        return SHARED_ASSETS.get('MASK_MAP_UI_STROKE', build, files=[UI_MASK.file])
 
     @cached_property
     def ui_mask_in_map(self):
@@ -41,11 +61,11 @@ class Assets:
 
     @cached_property
     def tile_center_image(self):
-        return TILE_CENTER.image
+        return self._shared_mask(TILE_CENTER)
 
     @cached_property
     def tile_corner_image(self):
-        return TILE_CORNER.image
+        return self._shared_mask(TILE_CORNER)
 
     @cached_property
     def tile_corner_image_list(self):
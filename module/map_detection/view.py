@@ -4,9 +4,10 @@ import time
 from module.base.utils import *
 from module.exception import MapDetectionError
 from module.logger import logger
-from module.map.map_grids import SelectedGrids
+from module.map.map_grids import GridIndex, SelectedGrids
 from module.map_detection.detector import MapDetector
 from module.map_detection.grid import Grid
+from module.map_detection.grid_predictor import GridPredictorBatch
 from module.map_detection.utils import *
 from module.map_detection.utils_assets import *
 
@@ -28,6 +29,7 @@ class View(MapDetector):
         super().__init__(config)
         self.mode = mode
         self.grid_class = grid_class
+        self._grid_index = None
 
     def __iter__(self):
         return iter(self.grids.values())
@@ -102,9 +104,11 @@ class View(MapDetector):
         Predict grid info.
         """
         start_time = time.time()
-        for grid in self:
-            grid.predict()
+        batch = GridPredictorBatch(list(self))
+        batch.predict()
         logger.attr_align('predict', len(self.grids.keys()), front=float2str(time.time() - start_time) + 's')
+        if batch.timer:
+            logger.attr_align('predict_timer', ', '.join([f'{k} {float2str(v)}s' for k, v in batch.timer.items()]))
 
     def update(self, image):
         """
@@ -117,6 +121,16 @@ class View(MapDetector):
             grid.reset()
             grid.image = image
 
+    @property
+    def grid_index(self):
+        """
+        Returns:
+            GridIndex: Attribute indexes of grids, re-created if grids changed.
+        """
+        if self._grid_index is None or self._grid_index.is_outdated(self.grids):
+            self._grid_index = GridIndex(self.grids)
+        return self._grid_index
+
     def select(self, **kwargs):
         """
         Args:
@@ -125,16 +139,15 @@ class View(MapDetector):
         Returns:
             SelectedGrids:
         """
-        result = []
-        for grid in self:
-            flag = True
-            for k, v in kwargs.items():
-                if grid.__getattribute__(k) != v:
-                    flag = False
-            if flag:
-                result.append(grid)
-
-        return SelectedGrids(result)
+        index = self.grid_index
+        mask, kwargs = index.select(kwargs, strict=False)
+        result = index.to_grids(mask)
+        if kwargs:
+            result = [grid for grid in result
+                      if not any(grid.__getattribute__(k) != v for k, v in kwargs.items())]
+            mask = index.to_mask(result)
+
+        return SelectedGrids(result, index=index, mask=mask)
 
     def predict_swipe(self, prev, with_current_fleet=True, with_sea_grids=True):
         """
@@ -1,5 +1,23 @@
 from module.base.decorator import cached_property
-from module.ocr.al_ocr import AlOcr
+from module.logger import logger
+from module.webui.setting import State
+
+
+def ocr_backend(model_name, model_epoch, root, name):
+    """
+    Returns:
+        AlOcr running on mxnet, or OnnxOcr running on onnxruntime.
+            Fallback to AlOcr if onnxruntime or the exported model is not available.
+    """
+    if State.deploy_config.OcrBackend == 'onnx':
+        from module.ocr.onnx_ocr import OnnxOcr, onnx_available
+        if onnx_available(root):
+            OnnxOcr.THREADS = State.deploy_config.OcrThreads
+            return OnnxOcr(model_name=model_name, model_epoch=model_epoch, root=root, name=name)
+        logger.warning(f'Ocr backend fallback to mxnet: {root}')
+
+    from module.ocr.al_ocr import AlOcr
+    return AlOcr(model_name=model_name, model_epoch=model_epoch, root=root, name=name)
 
 
 class OcrModel:
@@ -13,8 +31,8 @@ class OcrModel:
         # Font: Impact, AgencyFB-Regular, MStiffHeiHK-UltraBold
         # Charset: 0123456789ABCDEFGHIJKLMNPQRSTUVWXYZ:/- (Letter 'O' and <space> is not included)
         # _num_classes: 39
-        return AlOcr(model_name='densenet-lite-gru', model_epoch=15, root='./bin/cnocr_models/azur_lane',
-                    name='azur_lane')
+        return ocr_backend(model_name='densenet-lite-gru', model_epoch=15, root='./bin/cnocr_models/azur_lane',
+                           name='azur_lane')
 
     @cached_property
     def cnocr(self):
@@ -26,11 +44,12 @@ class OcrModel:
         # Font: Various
         # Charset: Number, English character, Chinese character, symbols, <space>
         # _num_classes: 6426
-        return AlOcr(model_name='densenet-lite-gru', model_epoch=39, root='./bin/cnocr_models/cnocr', name='cnocr')
+        return ocr_backend(model_name='densenet-lite-gru', model_epoch=39, root='./bin/cnocr_models/cnocr',
+                           name='cnocr')
 
     @cached_property
     def jp(self):
-        return AlOcr(model_name='densenet-lite-gru', model_epoch=125, root='./bin/cnocr_models/jp', name='jp')
+        return ocr_backend(model_name='densenet-lite-gru', model_epoch=125, root='./bin/cnocr_models/jp', name='jp')
 
     @cached_property
     def tw(self):
@@ -42,7 +61,7 @@ class OcrModel:
         # Font: Various, 6 kinds
         # Charset: Numbers, Upper english characters, Chinese traditional characters
         # _num_classes: 5322
-        return AlOcr(model_name='densenet-lite-gru', model_epoch=63, root='./bin/cnocr_models/tw', name='tw')
+        return ocr_backend(model_name='densenet-lite-gru', model_epoch=63, root='./bin/cnocr_models/tw', name='tw')
 
 
 OCR_MODEL = OcrModel()
\ No newline at end of file
@@ -1,5 +1,8 @@
+import json
+import os
 import re
 import time
+from collections import OrderedDict
 from datetime import timedelta
 from typing import TYPE_CHECKING
 
@@ -18,8 +21,87 @@ else:
     OCR_MODEL = ModelProxyFactory()
 
 
+class OcrCache:
+    """
+    LRU cache of OCR results, keyed by (model, alphabet, preprocessed image).
+    Counters, timers and durations are usually read many times on the same pixels,
+    repeated reads skip the OCR model.
+    """
+
+    def __init__(self, size=256):
+        """
+        Args:
+            size (int): Max results to keep, 0 to disable cache.
+        """
+        self.size = size
+        self.cache = OrderedDict()
+        self.hit = 0
+        self.miss = 0
+
+    @staticmethod
+    def key(lang, alphabet, image):
+        """
+        Args:
+            lang (str):
+            alphabet (str):
+            image (np.ndarray): Preprocessed image.
+
+        Returns:
+            tuple:
+        """
+        return lang, alphabet, image.shape, hash(np.ascontiguousarray(image).tobytes())
+
+    def get(self, key):
+        """
+        Returns:
+            list[str]: Result, or None if not cached.
+        """
+        result = self.cache.get(key, None)
+        if result is None:
+            self.miss += 1
+            return None
+        self.hit += 1
+        self.cache.move_to_end(key)
+        return result
+
+    def set(self, key, result):
+        if self.size <= 0:
+            return
+        self.cache[key] = result
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.size:
+            self.cache.popitem(last=False)
+
+    def resize(self, size):
+        """
+        Args:
+            size (int): Max results to keep, 0 to disable cache.
+        """
+        self.size = size
+        while len(self.cache) > max(size, 0):
+            self.cache.popitem(last=False)
+
+    def clear(self):
+        self.cache.clear()
+
+    @property
+    def hit_rate(self):
+        total = self.hit + self.miss
+        return self.hit / total if total else 0.
+
+    def show(self):
+        logger.info(f'OCR cache: {len(self.cache)}/{self.size}, hit {self.hit}, miss {self.miss}, '
+                    f'hit rate {self.hit_rate:.1%}')
+
+
+OCR_CACHE = OcrCache()
+
+
 class Ocr:
     SHOW_LOG = True
+    # Save images feed to OCR model and their results into this folder,
+    # which can be used in `python -m dev_tools.ocr_onnx benchmark`
+    RECORD_FOLDER = None
 
     def __init__(self, buttons, lang='azur_lane', letter=(255, 255, 255), threshold=128, alphabet=None, name=None):
         """
@@ -82,7 +164,6 @@ class Ocr:
         """
         start_time = time.time()
 
-        self.cnocr.set_cand_alphabet(self.alphabet)
         if direct_ocr:
             image_list = [self.pre_process(i) for i in image]
         else:
@@ -91,7 +172,20 @@ class Ocr:
         # This will show the images feed to OCR model
         # self.cnocr.debug(image_list)
 
-        result_list = self.cnocr.ocr_for_single_lines(image_list)
+        # Only images not in cache go to OCR model
+        key_list = [OCR_CACHE.key(self.lang, self.alphabet, i) for i in image_list]
+        result_list = [OCR_CACHE.get(key) for key in key_list]
+        missing = [index for index, result in enumerate(result_list) if result is None]
+        if missing:
+            self.cnocr.set_cand_alphabet(self.alphabet)
+            results = self.cnocr.ocr_for_single_lines([image_list[index] for index in missing])
+            for index, result in zip(missing, results):
+                result_list[index] = result
+                OCR_CACHE.set(key_list[index], result)
+
+        if Ocr.RECORD_FOLDER:
+            self.record(image_list, result_list)
+
         result_list = [self.after_process(result) for result in result_list]
 
         if len(self.buttons) == 1:
@@ -103,6 +197,24 @@ class Ocr:
         return result_list
 
 
+    def record(self, image_list, result_list):
+        """
+        Args:
+            image_list (list[np.ndarray]): Preprocessed images.
+            result_list (list[list[str]]): Results from OCR model.
+        """
+        folder = os.path.join(Ocr.RECORD_FOLDER, self.lang)
+        os.makedirs(folder, exist_ok=True)
+        prefix = re.sub(r'\W', '_', str(self.name))
+        now = int(time.time() * 1000)
+        with open(os.path.join(folder, 'labels.jsonl'), 'a', encoding='utf-8') as f:
+            for index, (image, result) in enumerate(zip(image_list, result_list)):
+                file = f'{prefix}_{now}_{index}.png'
+                save_image(image, os.path.join(folder, file))
+                row = {'file': file, 'alphabet': self.alphabet, 'result': ''.join(result)}
+                f.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+
 class Digit(Ocr):
     """
     Do OCR on a digit, such as `45`.
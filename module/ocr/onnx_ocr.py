@@ -0,0 +1,261 @@
+import importlib.util
+import json
+import os
+
+import cv2
+import numpy as np
+
+from module.exception import RequestHumanTakeover
+from module.logger import logger
+
+ONNX_MODEL_FILE = 'model.onnx'
+ONNX_META_FILE = 'model.json'
+
+
+def read_charset(file):
+    """
+    Same as `cnocr.cn_ocr.read_charset`, index 0 is the CTC blank.
+
+    Returns:
+        list[str], dict[str, int]: alphabet, inverse alphabet
+    """
+    alphabet = [None]
+    with open(file, 'r', encoding='utf-8') as f:
+        for line in f.readlines():
+            alphabet.append(line.rstrip('\n'))
+    inv_alph_dict = {char: index for index, char in enumerate(alphabet)}
+    return alphabet, inv_alph_dict
+
+
+def ctc_label(class_ids):
+    """
+    Same as `CtcMetrics.ctc_label`, merge repeated labels and remove blanks.
+
+    Args:
+        class_ids (list[int]):
+
+    Returns:
+        list[int]:
+    """
+    prediction = []
+    prev = 0
+    for class_id in class_ids:
+        if class_id != 0 and class_id != prev:
+            prediction.append(class_id)
+        prev = class_id
+    return prediction
+
+
+def onnx_available(root):
+    """
+    Args:
+        root (str): Model folder, like ./bin/cnocr_models/azur_lane
+
+    Returns:
+        bool: If onnxruntime is installed and the model is exported.
+    """
+    if importlib.util.find_spec('onnxruntime') is None:
+        logger.warning('onnxruntime not available, run `pip install onnxruntime` to install it')
+        return False
+    for file in [ONNX_MODEL_FILE, ONNX_META_FILE, 'label_cn.txt']:
+        if not os.path.exists(os.path.join(root, file)):
+            logger.warning(f'Ocr model not exported: {os.path.join(root, file)}, '
+                           f'run `python -m dev_tools.ocr_onnx export` to create it')
+            return False
+    return True
+
+
+class OnnxOcr:
+    """
+    OCR model exported by dev_tools/ocr_onnx.py, running on onnxruntime CPU.
+    It has the same interface and output as AlOcr, without importing mxnet.
+
+    Files in model folder:
+        model.onnx: Network, input (batch, 1, height, width), output (seq_len * batch, num_classes)
+        model.json: Hyperparameters, {"img_height": 32, "seq_len_cmpr_ratio": 4}
+        label_cn.txt: Charset, shared with mxnet model.
+    """
+    # Threads for one inference, 0 to let onnxruntime decide.
+    THREADS = 0
+
+    def __init__(
+            self,
+            model_name='densenet-lite-gru',
+            model_epoch=None,
+            cand_alphabet=None,
+            root='',
+            context='cpu',
+            name=None,
+    ):
+        self._args = (model_name, model_epoch, cand_alphabet, root, context, name)
+        self._model_loaded = False
+        self._cand_alph_idx = None
+        self._cand_mask = None
+
+    def init(self,
+             model_name='densenet-lite-gru',
+             model_epoch=None,
+             cand_alphabet=None,
+             root='',
+             context='cpu',
+             name=None,
+             ):
+        import onnxruntime
+
+        self._model_dir = root
+        model_file = os.path.join(root, ONNX_MODEL_FILE)
+        meta_file = os.path.join(root, ONNX_META_FILE)
+        for file in [model_file, meta_file, os.path.join(root, 'label_cn.txt')]:
+            if not os.path.exists(file):
+                logger.warning(f'Ocr model not prepared: {root}')
+                logger.warning(f'Required file: {file}, run `python -m dev_tools.ocr_onnx export` to create it')
+                raise RequestHumanTakeover
+
+        with open(meta_file, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self._img_height = meta['img_height']
+        self._seq_len_cmpr_ratio = meta['seq_len_cmpr_ratio']
+        self._alphabet, self._inv_alph_dict = read_charset(os.path.join(root, 'label_cn.txt'))
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = self.THREADS
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        logger.info('Loading OCR model: %s' % model_file)
+        self._session = onnxruntime.InferenceSession(
+            model_file, sess_options=options, providers=['CPUExecutionProvider'])
+        self._input_name = self._session.get_inputs()[0].name
+
+    def _ensure_init(self):
+        if not self._model_loaded:
+            self.init(*self._args)
+            self._model_loaded = True
+
+    def set_cand_alphabet(self, cand_alphabet):
+        """
+        Args:
+            cand_alphabet (str, list[str]): Alphabet white list, None to use all.
+        """
+        self._ensure_init()
+        if cand_alphabet is None:
+            self._cand_alph_idx = None
+            self._cand_mask = None
+            return
+
+        cand_alphabet = [word if word != ' ' else '<space>' for word in cand_alphabet]
+        excluded = set([word for word in cand_alphabet if word not in self._inv_alph_dict])
+        if excluded:
+            logger.warning(f'Chars in candidates are not in the vocab, ignoring them: {excluded}')
+        candidates = set(cand_alphabet) - excluded
+        self._cand_alph_idx = [0] + sorted(self._inv_alph_dict[word] for word in candidates)
+        self._cand_mask = np.zeros(len(self._alphabet), dtype=np.float32)
+        self._cand_mask[self._cand_alph_idx] = 1.
+
+    def _preprocess_img_array(self, img):
+        """
+        Same as AlOcr._preprocess_img_array
+
+        Returns:
+            np.ndarray: Shape (1, height, width)
+        """
+        new_width = int(round(self._img_height / img.shape[0] * img.shape[1]))
+        img = cv2.resize(img, (new_width, self._img_height))
+        img = np.expand_dims(img, 0).astype('float32') / 255.0
+        return img
+
+    @staticmethod
+    def _pad_arrays(img_list):
+        """
+        Pad images to the same width with zeros.
+
+        Returns:
+            np.ndarray, list[int]: Shape (batch, 1, height, max_width), widths
+        """
+        img_widths = [img.shape[2] for img in img_list]
+        max_width = max(img_widths)
+        batch = np.zeros((len(img_list), 1, img_list[0].shape[1], max_width), dtype=np.float32)
+        for index, img in enumerate(img_list):
+            batch[index, :, :, :img.shape[2]] = img
+        return batch, img_widths
+
+    def _predict(self, batch):
+        """
+        Returns:
+            np.ndarray: Shape (seq_len, batch, num_classes)
+        """
+        prob = self._session.run(None, {self._input_name: batch})[0]
+        prob = np.reshape(prob, (-1, batch.shape[0], prob.shape[-1]))
+        if self._cand_mask is not None:
+            prob = prob * self._cand_mask
+        return prob
+
+    def _gen_line_pred_chars(self, line_prob, img_width, max_img_width):
+        """
+        Same as AlOcr._gen_line_pred_chars
+
+        Args:
+            line_prob: Shape (seq_length, num_classes)
+            img_width:
+            max_img_width:
+
+        Returns:
+            list[str]:
+        """
+        class_ids = np.argmax(line_prob, axis=-1)
+
+        class_ids *= np.max(line_prob, axis=-1) > 0.5  # Delete low confidence result
+
+        if img_width < max_img_width:
+            end_idx = img_width // self._seq_len_cmpr_ratio
+            if end_idx < len(class_ids):
+                class_ids[end_idx:] = 0
+        prediction = ctc_label(class_ids.tolist())
+        alphabet = self._alphabet
+        res = [alphabet[p] if alphabet[p] != '<space>' else ' ' for p in prediction]
+
+        return res
+
+    def ocr_for_single_lines(self, img_list):
+        """
+        Args:
+            img_list (list[np.ndarray]): Images in monochrome or RGB, one line of text in each.
+
+        Returns:
+            list[list[str]]:
+        """
+        self._ensure_init()
+        if len(img_list) == 0:
+            return []
+
+        img_list = [self._preprocess_img_array(img) for img in img_list]
+        batch, img_widths = self._pad_arrays(img_list)
+        prob = self._predict(batch)
+        max_width = max(img_widths)
+        return [self._gen_line_pred_chars(prob[:, index, :], width, max_width)
+                for index, width in enumerate(img_widths)]
+
+    def ocr_for_single_line(self, img_fp):
+        """
+        Args:
+            img_fp (np.ndarray):
+
+        Returns:
+            list[str]:
+        """
+        return self.ocr_for_single_lines([img_fp])[0]
+
+    def ocr(self, img_fp):
+        # Multi-line detection is not used in Alas
+        return [self.ocr_for_single_line(img_fp)]
+
+    def debug(self, img_list):
+        """
+        Args:
+            img_list: List of numpy array, (height, width)
+        """
+        from PIL import Image
+        self._ensure_init()
+        img_list = [(self._preprocess_img_array(img) * 255.0).astype(np.uint8) for img in img_list]
+        batch, _ = self._pad_arrays(img_list)
+        image = cv2.hconcat(list(batch[:, 0, :, :].astype(np.uint8)))
+        Image.fromarray(image).show()
@@ -1,7 +1,7 @@
 import argparse
 import multiprocessing
-import pickle
-from typing import List
+import time
+from typing import Dict, List
 
 import numpy as np
 import zerorpc
@@ -13,6 +13,22 @@ from module.logger import logger
 process: multiprocessing.Process = None
 
 
+def encode_image(image: np.ndarray) -> list:
+    """
+    Encode image into raw buffer, msgpack sends bytes without copying into python objects.
+
+    Returns:
+        list: [bytes, shape, dtype]
+    """
+    image = np.ascontiguousarray(image)
+    return [image.tobytes(), list(image.shape), image.dtype.str]
+
+
+def decode_image(data: list) -> np.ndarray:
+    buffer, shape, dtype = data
+    return np.frombuffer(buffer, dtype=np.dtype(dtype)).reshape(shape)
+
+
 class ModelProxy:
     client: zerorpc.Client = None
     online = True
@@ -31,98 +47,211 @@ class ModelProxy:
 
     def __init__(self, lang) -> None:
         self.lang = lang
+        # Alphabet travels with each request, instead of a separate round trip
+        self.cand_alphabet = None
+
+    @property
+    def local_model(self):
+        from module.ocr.models import OCR_MODEL
+        model = OCR_MODEL.__getattribute__(self.lang)
+        model.set_cand_alphabet(self.cand_alphabet)
+        return model
 
     def ocr(self, img_fp: np.ndarray):
         if self.online:
-            img_str = img_fp.dumps()
             try:
-                return self.client("ocr", self.lang, img_str)
+                return self.client("ocr", self.lang, self.cand_alphabet, encode_image(img_fp))
             except:
                 self.online = False
-        from module.ocr.models import OCR_MODEL
-        return OCR_MODEL.__getattribute__(self.lang).ocr(img_fp)
+        return self.local_model.ocr(img_fp)
 
     def ocr_for_single_line(self, img_fp: np.ndarray):
         if self.online:
-            img_str = img_fp.dumps()
             try:
-                return self.client("ocr_for_single_line", self.lang, img_str)
+                return self.client("ocr_for_single_line", self.lang, self.cand_alphabet, encode_image(img_fp))
             except:
                 self.online = False
-        from module.ocr.models import OCR_MODEL
-        return OCR_MODEL.__getattribute__(self.lang).ocr_for_single_line(img_fp)
+        return self.local_model.ocr_for_single_line(img_fp)
 
     def ocr_for_single_lines(self, img_list: List[np.ndarray]):
         if self.online:
-            img_str_list = [img_fp.dumps() for img_fp in img_list]
+            img_data_list = [encode_image(img_fp) for img_fp in img_list]
             try:
-                return self.client("ocr_for_single_lines", self.lang, img_str_list)
+                return self.client("ocr_for_single_lines", self.lang, self.cand_alphabet, img_data_list)
             except:
                 self.online = False
-        from module.ocr.models import OCR_MODEL
-        return OCR_MODEL.__getattribute__(self.lang).ocr_for_single_lines(img_list)
+        return self.local_model.ocr_for_single_lines(img_list)
 
     def set_cand_alphabet(self, cand_alphabet: str):
-        if self.online:
-            try:
-                return self.client("set_cand_alphabet", self.lang, cand_alphabet)
-            except:
-                self.online = False
-        from module.ocr.models import OCR_MODEL
-        return OCR_MODEL.__getattribute__(self.lang).set_cand_alphabet(cand_alphabet)
+        self.cand_alphabet = cand_alphabet
 
     def debug(self, img_list: List[np.ndarray]):
+        from module.ocr.models import OCR_MODEL
+        return OCR_MODEL.__getattribute__(self.lang).debug(img_list)
+
+    def metrics(self):
+        """
+        Returns:
+            dict: Metrics of all models on OCR server, see OcrBatcher.metrics()
+        """
         if self.online:
-            img_str_list = [img_fp.dumps() for img_fp in img_list]
             try:
-                return self.client("debug", self.lang, img_str_list)
+                return self.client("metrics")
             except:
                 self.online = False
-        from module.ocr.models import OCR_MODEL
-        return OCR_MODEL.__getattribute__(self.lang).debug(img_list)
+        return {}
 
 
 class ModelProxyFactory:
+    _proxies: Dict[str, ModelProxy] = {}
+
     def __getattribute__(self, __name: str) -> ModelProxy:
         if __name in ["azur_lane", "cnocr", "jp", "tw"]:
             if ModelProxy.client is None:
                 ModelProxy.init(address=State.deploy_config.OcrClientAddress)
-            return ModelProxy(lang=__name)
+            # Reuse proxy, so alphabet set by set_cand_alphabet() is kept for the next call
+            proxies = ModelProxyFactory._proxies
+            if __name not in proxies:
+                proxies[__name] = ModelProxy(lang=__name)
+            return proxies[__name]
         else:
             return super().__getattribute__(__name)
 
 
+class OcrBatcher:
+    """
+    Coalesce `ocr_for_single_lines` requests of one model from many Alas instances into mini-batches.
+
+    Requests are queued, and a worker greenlet takes all pending requests at once,
+    groups them by alphabet, sorts images by width to reduce padding,
+    and runs them in batches of at most `BATCH_SIZE` images.
+    """
+    # Max images in one forward
+    BATCH_SIZE = 64
+    # Wait a little while to collect more requests before a batch
+    BATCH_WINDOW = 0.002
+
+    def __init__(self, model):
+        """
+        Args:
+            model (AlOcr):
+        """
+        import gevent
+        import gevent.queue
+        self.model = model
+        self.queue = gevent.queue.Queue()
+        self.requests = 0
+        self.images = 0
+        self.batches = 0
+        self.max_batch = 0
+        self.inference_time = 0.
+        self.worker = gevent.spawn(self._worker)
+
+    def submit(self, cand_alphabet, img_list):
+        """
+        Args:
+            cand_alphabet (str): Alphabet white list, or None.
+            img_list (list[np.ndarray]):
+
+        Returns:
+            list[list[str]]: OCR results, same as `ocr_for_single_lines`.
+        """
+        from gevent.event import AsyncResult
+        if not img_list:
+            return []
+        result = AsyncResult()
+        self.queue.put((cand_alphabet, img_list, result))
+        return result.get()
+
+    def _worker(self):
+        import gevent
+        while True:
+            pending = [self.queue.get()]
+            gevent.sleep(self.BATCH_WINDOW)
+            while not self.queue.empty():
+                pending.append(self.queue.get_nowait())
+
+            groups = {}
+            for request in pending:
+                groups.setdefault(request[0], []).append(request)
+            for cand_alphabet, requests in groups.items():
+                try:
+                    self._run(cand_alphabet, requests)
+                except Exception as e:
+                    logger.exception(e)
+                    for _, _, result in requests:
+                        if not result.ready():
+                            result.set_exception(e)
+
+    def _run(self, cand_alphabet, requests):
+        # Flatten images, [(request_index, image_index, image), ...]
+        items = [(r, i, image) for r, (_, img_list, _) in enumerate(requests) for i, image in enumerate(img_list)]
+        # Images of similar width in the same batch, less padding
+        items.sort(key=lambda item: item[2].shape[1] / item[2].shape[0])
+        results = [[None] * len(img_list) for _, img_list, _ in requests]
+
+        self.model.set_cand_alphabet(cand_alphabet)
+        for start in range(0, len(items), self.BATCH_SIZE):
+            batch = items[start:start + self.BATCH_SIZE]
+            start_time = time.time()
+            batch_result = self.model.ocr_for_single_lines([image for _, _, image in batch])
+            self.inference_time += time.time() - start_time
+            for (r, i, _), result in zip(batch, batch_result):
+                results[r][i] = result
+            self.batches += 1
+            self.max_batch = max(self.max_batch, len(batch))
+
+        self.requests += len(requests)
+        self.images += len(items)
+        for (_, _, result), res in zip(requests, results):
+            result.set(res)
+
+    def metrics(self):
+        """
+        Returns:
+            dict: queue_depth, requests, images, batches, avg_batch, max_batch, inference_time
+        """
+        return {
+            "queue_depth": self.queue.qsize(),
+            "requests": self.requests,
+            "images": self.images,
+            "batches": self.batches,
+            "avg_batch": round(self.images / self.batches, 2) if self.batches else 0.,
+            "max_batch": self.max_batch,
+            "inference_time": round(self.inference_time, 3),
+        }
+
+
 def start_ocr_server(port=22268):
     from module.ocr.al_ocr import AlOcr
     from module.ocr.models import OcrModel
 
     class OCRServer(OcrModel):
+        def __init__(self):
+            self.batchers: Dict[str, OcrBatcher] = {}
+
+        def _batcher(self, lang) -> OcrBatcher:
+            if lang not in self.batchers:
+                self.batchers[lang] = OcrBatcher(self.__getattribute__(lang))
+            return self.batchers[lang]
+
         def hello(self):
             return "hello"
 
-        def ocr(self, lang, img_fp):
-            img_fp = pickle.loads(img_fp)
+        def ocr(self, lang, cand_alphabet, img_data):
             cnocr: AlOcr = self.__getattribute__(lang)
-            return cnocr.ocr(img_fp)
+            cnocr.set_cand_alphabet(cand_alphabet)
+            return cnocr.ocr(decode_image(img_data))
 
-        def ocr_for_single_line(self, lang, img_fp):
-            img_fp = pickle.loads(img_fp)
-            cnocr: AlOcr = self.__getattribute__(lang)
-            return cnocr.ocr_for_single_line(img_fp)
+        def ocr_for_single_line(self, lang, cand_alphabet, img_data):
+            return self._batcher(lang).submit(cand_alphabet, [decode_image(img_data)])[0]
 
-        def ocr_for_single_lines(self, lang, img_list):
-            img_list = [pickle.loads(img_fp) for img_fp in img_list]
-            cnocr: AlOcr = self.__getattribute__(lang)
-            return cnocr.ocr_for_single_lines(img_list)
+        def ocr_for_single_lines(self, lang, cand_alphabet, img_data_list):
+            img_list = [decode_image(img_data) for img_data in img_data_list]
+            return self._batcher(lang).submit(cand_alphabet, img_list)
 
-        def set_cand_alphabet(self, lang, cand_alphabet):
-            cnocr: AlOcr = self.__getattribute__(lang)
-            return cnocr.set_cand_alphabet(cand_alphabet)
-
-        def debug(self, lang, img_list):
-            img_list = [pickle.loads(img_fp) for img_fp in img_list]
-            cnocr: AlOcr = self.__getattribute__(lang)
-            return cnocr.debug(img_list)
+        def metrics(self):
+            return {lang: batcher.metrics() for lang, batcher in self.batchers.items()}
 
     server = zerorpc.Server(OCRServer())
     try:
@@ -1,5 +1,6 @@
 import time
 
+from module.base.shared_asset import SHARED_ASSETS
 from module.base.utils import *
 from module.config.config import AzurLaneConfig
 from module.logger import logger
@@ -47,13 +48,18 @@ class GlobeDetection:
         logger.info('Loading OS globe map')
 
         # Load GLOBE_MAP
-        image = load_image(GLOBE_MAP)
-        image = self.find_peaks(image, para=self.config.OS_GLOBE_FIND_PEAKS_PARAMETERS)
-        pad = self.config.OS_GLOBE_IMAGE_PAD
-        image = np.pad(image, ((pad, pad), (pad, pad)), mode='constant', constant_values=0)
-        image = image.astype(np.uint8)
-        image = cv2.resize(image, None, fx=self.config.OS_GLOBE_IMAGE_RESIZE, fy=self.config.OS_GLOBE_IMAGE_RESIZE)
-        self.globe = image
+        def build():
+            image = load_image(GLOBE_MAP)
+            image = self.find_peaks(image, para=self.config.OS_GLOBE_FIND_PEAKS_PARAMETERS)
+            pad = self.config.OS_GLOBE_IMAGE_PAD
+            image = np.pad(image, ((pad, pad), (pad, pad)), mode='constant', constant_values=0)
+            image = image.astype(np.uint8)
+            image = cv2.resize(image, None, fx=self.config.OS_GLOBE_IMAGE_RESIZE, fy=self.config.OS_GLOBE_IMAGE_RESIZE)
+            return image
+
+        params = [self.config.OS_GLOBE_FIND_PEAKS_PARAMETERS, self.config.OS_GLOBE_IMAGE_PAD,
+                  self.config.OS_GLOBE_IMAGE_RESIZE]
+        self.globe = SHARED_ASSETS.get('os_globe_map', build, files=[GLOBE_MAP], params=params)
 
         # Load homography
         backup = self.config.temporary(
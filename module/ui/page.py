@@ -6,13 +6,18 @@ MAIN_CHECK = MAIN_GOTO_CAMPAIGN
 
 
 class Page:
-    parent = None
+    # Key: page name, value: Page object
+    all_pages = {}
+    # Key: destination, value: dict{Page: next Page on the shortest path to destination}
+    # Generated by Page.init_routes() once at import
+    routes = {}
 
     def __init__(self, check_button):
         self.check_button = check_button
         self.links = {}
         (filename, line_number, function_name, text) = traceback.extract_stack()[-2]
         self.name = text[:text.find('=')].strip()
+        Page.all_pages[self.name] = self
 
     def __eq__(self, other):
         return self.name == other.name
@@ -26,6 +31,31 @@ class Page:
     def link(self, button, destination):
         self.links[destination] = button
 
+    @classmethod
+    def init_routes(cls):
+        """
+        Breadth-first search from every page over the reversed links,
+        to get the next page on the shortest path from any page to any page.
+        """
+        pages = list(cls.all_pages.values())
+        cls.routes = {}
+        for destination in pages:
+            route = {}
+            visited = {destination}
+            layer = [destination]
+            while layer:
+                new = []
+                for target in layer:
+                    for page in pages:
+                        if page in visited:
+                            continue
+                        if target in page.links:
+                            route[page] = target
+                            visited.add(page)
+                            new.append(page)
+                layer = new
+            cls.routes[destination] = route
+
 
 # Main
 page_main = Page(MAIN_CHECK)
@@ -195,3 +225,5 @@ page_supply_pack.link(button=GOTO_MAIN, destination=page_main)
 page_build = Page(BUILD_CHECK)
 page_main.link(button=MAIN_GOTO_BUILD, destination=page_build)
 page_build.link(button=GOTO_MAIN, destination=page_main)
+
+Page.init_routes()
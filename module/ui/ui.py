@@ -1,5 +1,5 @@
-from module.base.button import Button
-from module.base.decorator import run_once
+from module.base.button import Button, ButtonSet
+from module.base.decorator import cached_property, run_once
 from module.base.timer import Timer
 from module.combat.assets import GET_ITEMS_1, GET_SHIP
 from module.exception import (GameNotRunningError, GamePageUnknownError,
@@ -76,6 +76,14 @@ class UI(InfoHandler):
     ]
     ui_current: Page
 
+    @cached_property
+    def ui_page_check_buttons(self):
+        """
+        Returns:
+            ButtonSet: Check buttons of all known pages, in the order of `ui_pages`.
+        """
+        return ButtonSet([page.check_button for page in self.ui_pages if page.check_button is not None])
+
     def ui_page_appear(self, page):
         """
         Args:
@@ -184,13 +192,12 @@ class UI(InfoHandler):
                 break
 
             # Known pages
-            for page in self.ui_pages:
-                if page.check_button is None:
-                    continue
-                if self.ui_page_appear(page=page):
-                    logger.attr("UI", page.name)
-                    self.ui_current = page
-                    return page
+            for button in self.appear_any(self.ui_page_check_buttons, offset=(30, 30), first=True):
+                for page in self.ui_pages:
+                    if page.check_button is button:
+                        logger.attr("UI", page.name)
+                        self.ui_current = page
+                        return page
 
             # Unknown page but able to handle
             logger.info("Unknown ui page")
@@ -221,27 +228,12 @@ class UI(InfoHandler):
             confirm_wait:
             skip_first_screenshot:
         """
-        # Reset connection
-        for page in self.ui_pages:
-            page.parent = None
-
-        # Create connection
-        visited = [destination]
-        visited = set(visited)
-        while 1:
-            new = visited.copy()
-            for page in visited:
-                for link in self.ui_pages:
-                    if link in visited:
-                        continue
-                    if page in link.links:
-                        link.parent = page
-                        new.add(link)
-            if len(new) == len(visited):
-                break
-            visited = new
+        # Route to destination, precomputed in module/ui/page.py
+        route = {page: parent for page, parent in Page.routes[destination].items()
+                 if page in self.ui_pages and page.check_button is not None}
 
         logger.hr(f"UI goto {destination}")
+        current = getattr(self, 'ui_current', None)
         confirm_timer = Timer(confirm_wait, count=int(confirm_wait // 0.5)).start()
         while 1:
             GOTO_MAIN.clear_offset()
@@ -260,15 +252,15 @@ class UI(InfoHandler):
 
             # Other pages
             clicked = False
-            for page in visited:
-                if page.parent is None or page.check_button is None:
-                    continue
+            for page in self.ui_route_order(route, current=current):
                 if self.appear(page.check_button, offset=offset, interval=5):
-                    logger.info(f'Page switch: {page} -> {page.parent}')
-                    button = page.links[page.parent]
+                    parent = route[page]
+                    logger.info(f'Page switch: {page} -> {parent}')
+                    button = page.links[parent]
                     self.device.click(button)
                     self.ui_button_interval_reset(button)
                     confirm_timer.reset()
+                    current = parent
                     clicked = True
                     break
             if clicked:
@@ -278,9 +270,26 @@ class UI(InfoHandler):
             if self.ui_additional():
                 continue
 
-        # Reset connection
-        for page in self.ui_pages:
-            page.parent = None
+        self.ui_current = destination
+
+    @staticmethod
+    def ui_route_order(route, current=None):
+        """
+        Args:
+            route (dict[Page, Page]): Key: page, value: next page to destination.
+            current (Page): Current page or the page expected to be, if known.
+
+        Returns:
+            list[Page]: Pages to check, pages on the path from current page go first,
+                then the others from near to far from destination.
+        """
+        order = []
+        page = current
+        while page in route and page not in order:
+            order.append(page)
+            page = route[page]
+        order += [page for page in route.keys() if page not in order]
+        return order
 
     def ui_ensure(self, destination, skip_first_screenshot=True):
         """